@@ -3,6 +3,10 @@
 DSM5 PDF Structure Analyzer
 
 This script analyzes the DSM5.pdf to understand the structure of diagnostic sections.
+
+Usage:
+    python analyze_dsm_structure.py
+    python dsm5.py analyze DSM5.pdf --pages 50
 """
 
 import pdfplumber
@@ -16,7 +20,7 @@ def analyze_dsm_structure(pdf_path, num_pages=50):
         print(f"Error: {pdf_path} not found")
         return
     
-    print("Analyzing DSM5.pdf structure...")
+    print(f"Analyzing {os.path.basename(pdf_path)} structure...")
     print("=" * 50)
     
     try:
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+DSM5 Autocomplete Index
+
+Precomputed autocomplete for picking conditions ("F84", "299.0", "withdr",
+"major dep") without scanning every item title client-side:
+
+    - a prefix trie (radix-compressed) over normalized titles, every word
+      suffix of a title ("withdrawal" for "Alcohol Withdrawal") and the
+      ICD-9/ICD-10 codes with and without the dot; every node stores its
+      top-ranked item ids, so a lookup is one walk down the trie
+    - a trigram table (trigram -> item ids) over the titles for fuzzy
+      matches when a prefix finds nothing, e.g. misspellings
+
+Ranking: code and whole-title prefix matches before word matches, then
+shorter titles, then alphabetical.
+
+The index is one compact JSON artifact (autocomplete.json, written next to
+items.json by the single-page splitter); AutocompleteIndex loads it and
+answers complete(), fuzzy() and search(). bench_autocomplete.py times
+lookups.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python autocomplete_index.py single-pages/items.json
+    python autocomplete_index.py single-pages/items.json --query withdr --query F84
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from dsm5_items import load_items
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TOP_K = 10               # Item ids stored per trie node
+MIN_FUZZY_SCORE = 0.5    # Share of the query's trigrams a title must contain for a fuzzy match
+
+RANK_EXACT = 0  # Code or whole-title prefix
+RANK_WORD = 1   # Prefix of a later word of the title
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation; keep dots inside codes (f84.0, 299.00)."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r'(?<![a-z0-9])\.|\.(?![0-9])', ' ', text)
+    text = re.sub(r'[^a-z0-9.]+', ' ', text)
+    return text.strip()
+
+
+def trigrams(text):
+    """Trigrams of a normalized string padded with spaces at both ends."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def index_keys(record):
+    """(key, rank) pairs under which an item is found."""
+    title = normalize(record['title'])
+    words = title.split()
+    keys = [(title, RANK_EXACT)]
+    keys.extend((' '.join(words[i:]), RANK_WORD) for i in range(1, len(words)))
+    for code in (record.get('icd9'), record.get('icd10')):
+        code = normalize(code)
+        if code:
+            keys.append((code, RANK_EXACT))
+            keys.append((code.replace('.', ''), RANK_EXACT))
+    return keys
+
+
+def build_trie(records, top_k=TOP_K):
+    """Radix trie: node = {"i": [item ids], "c": {first char: [edge label, child node]}}."""
+    root = {'entries': {}, 'children': {}}
+    for index, record in enumerate(records):
+        for key, rank in index_keys(record):
+            node = root
+            for ch in key:
+                node = node['children'].setdefault(ch, {'entries': {}, 'children': {}})
+            node['entries'][index] = min(rank, node['entries'].get(index, rank))
+
+    titles = [normalize(record['title']) for record in records]
+
+    def sort_key(entry):
+        index, rank = entry
+        return rank, len(titles[index]), titles[index]
+
+    def finish(node):
+        # Best rank per item over the node and its subtree, keep the top_k
+        best = dict(node['entries'])
+        children = {}
+        for ch, child in node['children'].items():
+            # Collapse chains of single-child nodes without items of their own into one edge
+            label = ch
+            while not child['entries'] and len(child['children']) == 1:
+                (next_ch, next_child), = child['children'].items()
+                label += next_ch
+                child = next_child
+            child_best, packed = finish(child)
+            for index, rank in child_best.items():
+                best[index] = min(rank, best.get(index, rank))
+            children[ch] = [label, packed]
+        packed = {'i': [index for index, _ in sorted(best.items(), key=sort_key)[:top_k]]}
+        if children:
+            packed['c'] = children
+        return best, packed
+
+    return finish(root)[1]
+
+
+def build_trigram_table(records):
+    """Trigram -> item ids over normalized titles, plus each title's trigram count."""
+    table = {}
+    counts = []
+    for index, record in enumerate(records):
+        grams = trigrams(normalize(record['title']))
+        counts.append(len(grams))
+        for gram in grams:
+            table.setdefault(gram, []).append(index)
+    return dict(sorted(table.items())), counts
+
+
+def build_index(records, top_k=TOP_K):
+    """Build the autocomplete artifact (a JSON-serializable dict)."""
+    # First item wins for duplicate ids, matching the rest of the store
+    unique = []
+    seen = set()
+    for record in records:
+        if record['id'] not in seen:
+            seen.add(record['id'])
+            unique.append(record)
+
+    table, counts = build_trigram_table(unique)
+    return {
+        'version': 1,
+        'top_k': top_k,
+        'items': [{
+            'id': record['id'],
+            'title': record['title'],
+            'diagnostic_code': record['diagnostic_code'],
+            'icd9': record.get('icd9', ''),
+            'icd10': record.get('icd10', '')
+        } for record in unique],
+        'trie': build_trie(unique, top_k),
+        'trigrams': table,
+        'trigram_counts': counts
+    }
+
+
+def save_index(index, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+
+class AutocompleteIndex:
+    """Query API over an autocomplete artifact."""
+
+    def __init__(self, index):
+        self.items = index['items']
+        self.top_k = index['top_k']
+        self.trie = index['trie']
+        self.trigrams = index['trigrams']
+        self.trigram_counts = index['trigram_counts']
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def complete_ids(self, prefix):
+        """Item ids whose title, title word or code starts with prefix (best first, at most top_k)."""
+        remaining = normalize(prefix)
+        node = self.trie
+        while remaining:
+            edge = node.get('c', {}).get(remaining[0])
+            if edge is None:
+                return []
+            label, child = edge
+            if remaining.startswith(label):
+                remaining = remaining[len(label):]
+            elif label.startswith(remaining):
+                remaining = ''
+            else:
+                return []
+            node = child
+        return node['i']
+
+    def fuzzy_ids(self, query, min_score=MIN_FUZZY_SCORE):
+        """(item id, score) pairs, scored by the share of the query's trigrams found in each title.
+
+        Containment rather than Jaccard over the whole title, so a short
+        misspelled prefix ("panik") still reaches a long title; titles with
+        the same score are ranked by Jaccard similarity (closest length first).
+        """
+        grams = trigrams(normalize(query))
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigrams.get(gram, ()))
+        scored = []
+        similarity = {}
+        for index, count in shared.items():
+            score = count / len(grams)
+            if score >= min_score:
+                scored.append((index, score))
+                similarity[index] = count / (len(grams) + self.trigram_counts[index] - count)
+        scored.sort(key=lambda pair: (-pair[1], -similarity[pair[0]], self.items[pair[0]]['title']))
+        return scored
+
+    def complete(self, prefix, limit=TOP_K):
+        return [self.items[index] for index in self.complete_ids(prefix)[:limit]]
+
+    def fuzzy(self, query, limit=TOP_K, min_score=MIN_FUZZY_SCORE):
+        return [self.items[index] for index, _ in self.fuzzy_ids(query, min_score)[:limit]]
+
+    def search(self, query, limit=TOP_K):
+        """Prefix matches, or fuzzy matches when no title, word or code starts with the query."""
+        ids = self.complete_ids(query) or [index for index, _ in self.fuzzy_ids(query)]
+        return [self.items[index] for index in ids[:limit]]
+
+
+def main(argv=None):
+    """Main function to build (and optionally query) the autocomplete index."""
+    parser = argparse.ArgumentParser(prog="dsm5 autocomplete", description="Build the title/code autocomplete index")
+    parser.add_argument("items", help="Path to items.json written by the single-page splitter")
+    parser.add_argument("--output", help="Output path (default: autocomplete.json next to items.json)")
+    parser.add_argument("--top-k", type=int, default=TOP_K, help="Items stored per trie node (default: 10)")
+    parser.add_argument("--query", action="append", default=[], help="Query to run against the built index (repeatable)")
+    args = parser.parse_args(argv)
+
+    records = load_items(args.items)
+    output_path = args.output or os.path.join(os.path.dirname(os.path.abspath(args.items)), 'autocomplete.json')
+    index = build_index(records, args.top_k)
+    save_index(index, output_path)
+    logger.info(f"Wrote autocomplete index for {len(index['items'])} items "
+                f"({len(index['trigrams'])} trigrams, {os.path.getsize(output_path)} bytes) to {output_path}")
+
+    autocomplete = AutocompleteIndex(index)
+    for query in args.query:
+        print(f"\n{query!r}:")
+        for item in autocomplete.search(query):
+            print(f"  {item['diagnostic_code']:<20} {item['title']}")
+
+
+if __name__ == "__main__":
+    main()
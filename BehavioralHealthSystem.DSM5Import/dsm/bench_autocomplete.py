@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+DSM5 Autocomplete Benchmark
+
+Times AutocompleteIndex lookups with a realistic query mix: every prefix
+(2+ characters) of every title, title word and code, plus misspelled titles
+for the fuzzy path, and reports per-lookup latency in microseconds.
+
+Pass autocomplete.json, or items.json to build the index in memory first.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python bench_autocomplete.py single-pages/autocomplete.json
+    python bench_autocomplete.py single-pages/items.json --rounds 20
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from autocomplete_index import AutocompleteIndex, build_index, index_keys, normalize
+from dsm5_items import load_items
+from latency_stats import percentile
+
+
+def misspell(text, rng):
+    """Drop one character from a word to exercise the fuzzy path."""
+    if len(text) < 5:
+        return text
+    position = rng.randrange(1, len(text) - 1)
+    return text[:position] + text[position + 1:]
+
+
+def time_lookups(lookup, queries, rounds):
+    """Per-call latencies in microseconds over rounds passes of the query list."""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for query in queries:
+            start = clock()
+            lookup(query)
+            latencies.append((clock() - start) / 1000)
+    return sorted(latencies)
+
+
+def report(name, latencies):
+    print(f"{name:<18} {len(latencies):8d} lookups  p50 {percentile(latencies, 0.50):7.2f} us  "
+          f"p95 {percentile(latencies, 0.95):7.2f} us  p99 {percentile(latencies, 0.99):7.2f} us  "
+          f"mean {statistics.fmean(latencies):7.2f} us")
+
+
+def main():
+    """Main function to benchmark autocomplete lookups."""
+    parser = argparse.ArgumentParser(description="Benchmark the DSM-5 autocomplete index")
+    parser.add_argument("index", help="autocomplete.json, or items.json to build the index in memory")
+    parser.add_argument("--rounds", type=int, default=10, help="Passes over the query mix")
+    args = parser.parse_args()
+
+    if args.index.endswith('autocomplete.json'):
+        autocomplete = AutocompleteIndex.from_file(args.index)
+    else:
+        autocomplete = AutocompleteIndex(build_index(load_items(args.index)))
+
+    rng = random.Random(42)
+    keys = sorted({key for item in autocomplete.items for key, _ in index_keys(item)})
+    prefixes = sorted({key[:length] for key in keys for length in range(2, len(key) + 1)})
+    misspelled = [misspell(normalize(item['title']), rng) for item in autocomplete.items]
+
+    print(f"{len(autocomplete.items)} items, {len(prefixes)} distinct prefixes, {len(misspelled)} misspelled titles")
+    report("complete(prefix)", time_lookups(autocomplete.complete_ids, prefixes, args.rounds))
+    report("fuzzy(typo)", time_lookups(autocomplete.fuzzy_ids, misspelled, args.rounds))
+    report("search(prefix)", time_lookups(autocomplete.search, prefixes, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+DSM5 CLI Startup Benchmark
+
+Measures the wall-clock startup time of lightweight dsm5.py commands in fresh
+interpreters and checks that no heavy PDF/database library was imported.
+Exits non-zero if any command exceeds the budget, so it can run in CI.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python bench_import_time.py
+    python bench_import_time.py --budget-ms 200 --runs 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ['pdfplumber', 'PyPDF2', 'reportlab', 'psycopg2']
+
+# Commands that must stay fast: help output for the CLI and each subcommand
+LIGHTWEIGHT_COMMANDS = [
+    ['--help'],
+    ['chunk', '--help'],
+    ['split', '--help'],
+    ['single-page', '--help'],
+    ['analyze', '--help'],
+    ['find', '--help']
+]
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_PATH = os.path.join(SCRIPT_DIR, 'dsm5.py')
+
+
+def time_command(args, runs):
+    """Best-of-N wall time in milliseconds for running dsm5.py with args."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, CLI_PATH] + args, cwd=SCRIPT_DIR,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def time_interpreter(runs):
+    """Best-of-N wall time for a bare interpreter, used as the baseline."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'])
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def heavy_modules_loaded():
+    """Heavy modules present in sys.modules after building the CLI parser."""
+    probe = (
+        "import sys, dsm5; dsm5.build_parser(); "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', probe], cwd=SCRIPT_DIR,
+                            capture_output=True, text=True)
+    return [m for m in result.stdout.strip().split(',') if m]
+
+
+def main():
+    """Main function to run the startup benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark dsm5.py startup time")
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="Maximum startup time per command, above the bare interpreter")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command (best time is used)")
+    args = parser.parse_args()
+
+    baseline = time_interpreter(args.runs)
+    print(f"Bare interpreter: {baseline:.1f} ms")
+
+    failures = []
+    loaded = heavy_modules_loaded()
+    if loaded:
+        failures.append(f"heavy modules imported at startup: {', '.join(loaded)}")
+
+    for command in LIGHTWEIGHT_COMMANDS:
+        elapsed = time_command(command, args.runs)
+        overhead = elapsed - baseline
+        status = "OK" if overhead <= args.budget_ms else "OVER BUDGET"
+        print(f"dsm5 {' '.join(command):<22} {elapsed:7.1f} ms (+{overhead:.1f} ms) {status}")
+        if overhead > args.budget_ms:
+            failures.append(f"'{' '.join(command)}' took +{overhead:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("All lightweight commands within budget.")
+
+
+if __name__ == "__main__":
+    main()
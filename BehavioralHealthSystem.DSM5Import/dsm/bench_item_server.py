@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+DSM5 Item Server Load Test
+
+Drives the local item server with concurrent keep-alive clients and reports
+latency percentiles and throughput, once with plain GETs and once with
+conditional GETs (If-None-Match), which should come back as 304s.
+
+By default an in-process server is started on a free port from the given
+items.json; pass --url to test a server that is already running.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python bench_item_server.py single-pages/items.json
+    python bench_item_server.py --url http://127.0.0.1:8089 --requests 20000 --threads 16
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+from latency_stats import percentile
+
+
+def fetch_paths(host, port):
+    """Build the request mix: the list route plus every item by code."""
+    conn = http.client.HTTPConnection(host, port)
+    conn.request('GET', '/items')
+    listing = json.loads(conn.getresponse().read())
+    conn.close()
+    return ['/items'] + [f"/items/{quote(item['diagnostic_code'])}" for item in listing['items']]
+
+
+def run_worker(host, port, paths, count, offset, conditional, etags):
+    """Issue count requests over one keep-alive connection; returns (latencies, statuses)."""
+    conn = http.client.HTTPConnection(host, port)
+    latencies = []
+    statuses = {}
+    for i in range(count):
+        path = paths[(offset + i) % len(paths)]
+        headers = {'If-None-Match': etags[path]} if conditional and path in etags else {}
+        start = time.perf_counter()
+        conn.request('GET', path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        if not conditional and response.getheader('ETag'):
+            etags[path] = response.getheader('ETag')
+    conn.close()
+    return latencies, statuses
+
+
+def run_phase(name, host, port, paths, requests, threads, conditional, etags):
+    """Run one load phase and print its latency/throughput summary."""
+    per_thread = max(1, requests // threads)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(
+            lambda t: run_worker(host, port, paths, per_thread, t * 7, conditional, etags),
+            range(threads)
+        ))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+    statuses = {}
+    for _, worker_statuses in results:
+        for status, count in worker_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+    print(f"\n{name}: {len(latencies)} requests, {threads} threads, {elapsed:.2f}s")
+    print(f"  throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"  latency ms: p50 {percentile(latencies, 0.50):.3f}  p95 {percentile(latencies, 0.95):.3f}  "
+          f"p99 {percentile(latencies, 0.99):.3f}  mean {statistics.fmean(latencies):.3f}")
+    print(f"  statuses:   {dict(sorted(statuses.items()))}")
+
+
+def main():
+    """Main function to run the item server load test."""
+    parser = argparse.ArgumentParser(description="Load-test the DSM-5 item server")
+    parser.add_argument("items", nargs="?", help="items.json for an in-process server")
+    parser.add_argument("--url", help="Base URL of a running server (instead of starting one)")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per phase")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent keep-alive clients")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        if not args.items:
+            parser.error("items.json is required when --url is not given")
+        from serve_items import ItemStore, create_server
+        server = create_server(ItemStore.from_file(args.items), port=0)
+        host, port = server.server_address[0], server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        paths = fetch_paths(host, port)
+        etags = {}
+        print(f"Target http://{host}:{port} with {len(paths)} distinct paths")
+        run_phase("Plain GET", host, port, paths, args.requests, args.threads, False, etags)
+        run_phase("Conditional GET (If-None-Match)", host, port, paths, args.requests, args.threads, True, etags)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+DSM5 Shared Text Store Benchmark
+
+Compares handing text to worker processes by pickling it per task with
+handing out SharedTextStore ranges, for two workloads:
+
+    segment   sharded segmentation of the page texts (segment_sharded)
+    items     a per-item task over full_text (compact token estimate)
+
+For each it reports the bytes dispatched to workers through the pool's pipes,
+the time spent pickling the task payloads, the wall time of the whole run
+(best of --rounds, shared runs include building the store) and the peak
+Python heap each task takes in its worker (tracemalloc, in a separate
+untimed run, above the worker's baseline and counting the unpickling of the
+task's arguments). Both modes are checked to give identical results.
+
+The store saves the pickling and the pipe traffic: tasks carry a (name,
+range) payload instead of the text. It also shrinks the worker heap: offsets
+are read from the shared table instead of being copied, shared segmentation
+decodes one page at a time and the shared item task one line at a time, so
+a worker never holds a private copy of its whole shard or item. A worker's
+first shared task also pays the store's one-off attach (about 1 KB).
+
+Requirements:
+    pip install pdfplumber PyPDF2 reportlab
+
+Usage:
+    python bench_shared_text.py DSM5.pdf --workers 8
+    python bench_shared_text.py DSM5.pdf --pages-cache DSM5.pages.json --workers 8 --repeat 20
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from compact_items import estimate_tokens, hyphenated_compounds, normalize_lines, normalize_text
+from shared_text_store import SharedTextStore, attach_cached
+from sharded_segmentation import (SHARDS_PER_WORKER, segment_sequential, segment_shard, segment_shared_shard,
+                                  segment_sharded, shard_bounds, split_shards)
+from tuning_session import load_pages
+
+
+def item_tokens(text):
+    return estimate_tokens(normalize_text(text))
+
+
+def shared_item_tokens(store_name, index):
+    store = attach_cached(store_name)
+    compounds = hyphenated_compounds(store.item_lines(index))
+    return estimate_tokens(normalize_lines(store.item_lines(index), compounds))
+
+
+def traced(task, payload):
+    """Run a task in a worker; return (result, peak heap above the worker's baseline, unpickling included)."""
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    result = task(*pickle.loads(payload))
+    return result, tracemalloc.get_traced_memory()[1] - baseline
+
+
+def heap_peaks(workers, task, args_list):
+    """Per-task worker heap peaks for task(*args) over args_list, in a fresh traced pool."""
+    payloads = [pickle.dumps(args, pickle.HIGHEST_PROTOCOL) for args in args_list]
+    with ProcessPoolExecutor(max_workers=workers, initializer=tracemalloc.start) as pool:
+        return [peak for _, peak in pool.map(partial(traced, task), payloads)]
+
+
+def best_time(run, rounds):
+    """Best wall time of rounds runs, and the last result."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def pickled_size(payloads):
+    """Total pickled bytes of the task payloads and the time it takes to pickle them."""
+    start = time.perf_counter()
+    size = sum(len(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)) for payload in payloads)
+    return size, time.perf_counter() - start
+
+
+def report(name, tasks, dispatched, pickle_seconds, wall_seconds):
+    print(f"  {name:<8} {tasks:6d} tasks  dispatched {dispatched / 1024:10.1f} KB  "
+          f"pickling {pickle_seconds * 1000:8.2f} ms  wall {wall_seconds:7.3f}s")
+
+
+def report_saving(pickled_bytes, shared_bytes, stored_bytes):
+    print(f"  saved    {(pickled_bytes - shared_bytes) / 1024:.1f} KB of pickling and pipe traffic "
+          f"({1 - shared_bytes / pickled_bytes:.1%}); the store holds this text once ({stored_bytes / 1024:.1f} KB)")
+
+
+def report_heap(pickled_peaks, shared_peaks):
+    for name, peaks in (("pickled", pickled_peaks), ("shared", shared_peaks)):
+        print(f"  {name:<8} worker heap per task: max {max(peaks) / 1024:10.1f} KB  "
+              f"mean {sum(peaks) / len(peaks) / 1024:10.1f} KB")
+    pickled_mean, shared_mean = (sum(peaks) / len(peaks) for peaks in (pickled_peaks, shared_peaks))
+    print(f"  saved    {(pickled_mean - shared_mean) / 1024:.1f} KB of worker heap per task "
+          f"({1 - shared_mean / pickled_mean:.1%} of the mean)")
+
+
+def main():
+    """Main function to compare pickled and shared-memory text dispatch."""
+    parser = argparse.ArgumentParser(description="Compare pickled and shared-memory text dispatch to workers")
+    parser.add_argument("input", nargs="?", default="DSM5.pdf", help="Input PDF (default: DSM5.pdf)")
+    parser.add_argument("--pages-cache", metavar="PATH", help="Reuse or write the extracted page text (JSON)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat the extracted pages N times to simulate a larger corpus")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed runs per mode (best is reported)")
+    args = parser.parse_args()
+
+    pages = load_pages(args.input, args.pages_cache)
+    logging.getLogger().setLevel(logging.WARNING)
+    # Distinct string objects per copy, as in a real corpus (pickle would otherwise memoize repeats)
+    text_pages = [{'page_num': copy * len(pages) + page['page_num'], 'text': str(page['text'].encode('utf-8'), 'utf-8')}
+                  for copy in range(args.repeat) for page in pages]
+    items = segment_sequential(text_pages)
+    shard_count = args.workers * SHARDS_PER_WORKER
+    page_bytes = sum(len(page['text'].encode('utf-8')) for page in text_pages)
+    item_bytes = sum(len(item['full_text'].encode('utf-8')) for item in items)
+    print(f"Pages: {len(text_pages)} ({page_bytes / 1024:.1f} KB)  items: {len(items)} ({item_bytes / 1024:.1f} KB)  "
+          f"workers: {args.workers}")
+
+    start = time.perf_counter()
+    store = SharedTextStore.create(text_pages, items)
+    create_seconds = time.perf_counter() - start
+    with store:
+        print(f"Shared store: {store.size / 1024:.1f} KB, built in {create_seconds * 1000:.2f} ms")
+
+        # Segmentation: one task per shard
+        shards = split_shards(text_pages, shard_count)
+        bounds = shard_bounds(len(text_pages), shard_count)
+        pickled_bytes, pickled_seconds = pickled_size(shards)
+        shared_bytes, shared_seconds = pickled_size([(store.name, first, last, {}) for first, last in bounds])
+        pickled_wall, pickled_items = best_time(lambda: segment_sharded(text_pages, args.workers, shard_count), args.rounds)
+        shared_wall, shared_items = best_time(
+            lambda: segment_sharded(text_pages, args.workers, shard_count, shared_text=True), args.rounds)
+        print(f"segment (identical: {pickled_items == shared_items == items})")
+        report("pickled", len(shards), pickled_bytes, pickled_seconds, pickled_wall)
+        report("shared", len(bounds), shared_bytes, shared_seconds, shared_wall)
+        report_saving(pickled_bytes, shared_bytes, page_bytes)
+        report_heap(heap_peaks(args.workers, segment_shard, [(shard,) for shard in shards]),
+                    heap_peaks(args.workers, segment_shared_shard,
+                               [(store.name, first, last, {}) for first, last in bounds]))
+
+        # Per-item tasks over full_text
+        texts = [item['full_text'] for item in items]
+        chunksize = max(1, len(items) // (args.workers * SHARDS_PER_WORKER))
+        pickled_bytes, pickled_seconds = pickled_size(texts)
+        shared_bytes, shared_seconds = pickled_size([(store.name, index) for index in range(len(items))])
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            pickled_wall, pickled_tokens = best_time(
+                lambda: list(pool.map(item_tokens, texts, chunksize=chunksize)), args.rounds)
+            shared_wall, shared_tokens = best_time(
+                lambda: list(pool.map(partial(shared_item_tokens, store.name), range(len(items)), chunksize=chunksize)),
+                args.rounds)
+        print(f"items (identical: {pickled_tokens == shared_tokens})")
+        report("pickled", len(texts), pickled_bytes, pickled_seconds, pickled_wall)
+        report("shared", len(texts), shared_bytes, shared_seconds, shared_wall)
+        report_saving(pickled_bytes, shared_bytes, item_bytes)
+        report_heap(heap_peaks(args.workers, item_tokens, [(text,) for text in texts]),
+                    heap_peaks(args.workers, shared_item_tokens, [(store.name, index) for index in range(len(items))]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+DSM5 Two-Phase Extraction Check
+
+Checks that two-phase mode skips a substantial part of a book laid out like
+DSM-5: Section I front matter whose prose discusses "diagnostic criteria",
+Section II chapters of items with running heads, and Section III, the
+appendices and the index after the last item (about a quarter of the real
+book's 947 pages). Without an input PDF a synthetic book with those
+proportions is written with reportlab.
+
+Reports the pages the locator read and its time, the fraction of pages
+skipped, and the pdfplumber time the skipped pages would have cost
+(extrapolated from a sample). With --verify the two-phase items are also
+compared with a full run. Exits non-zero if the skipped fraction is below
+--min-skipped, the locator costs more than it saves, or verification fails.
+
+Requirements:
+    pip install pdfplumber PyPDF2 reportlab
+
+Usage:
+    python bench_two_phase.py
+    python bench_two_phase.py --verify
+    python bench_two_phase.py DSM5.pdf --min-skipped 0.2
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from two_phase_extraction import compare_items, locate_item_pages
+
+CHAPTERS = ['Neurodevelopmental Disorders', 'Schizophrenia Spectrum and Other Psychotic Disorders',
+            'Bipolar and Related Disorders', 'Depressive Disorders', 'Anxiety Disorders',
+            'Obsessive-Compulsive and Related Disorders', 'Trauma- and Stressor-Related Disorders',
+            'Dissociative Disorders', 'Somatic Symptom and Related Disorders', 'Feeding and Eating Disorders',
+            'Elimination Disorders', 'Sleep-Wake Disorders', 'Sexual Dysfunctions', 'Gender Dysphoria',
+            'Disruptive, Impulse-Control, and Conduct Disorders', 'Substance-Related and Addictive Disorders',
+            'Neurocognitive Disorders', 'Personality Disorders', 'Paraphilic Disorders', 'Other Mental Disorders']
+SECTIONS = ['Diagnostic Features', 'Associated Features Supporting Diagnosis', 'Prevalence',
+            'Development and Course', 'Risk and Prognostic Factors', 'Functional Consequences',
+            'Differential Diagnosis']
+PROSE = ("The individual reports persistent symptoms that cause clinically significant distress or "
+         "impairment in social, occupational, or other important areas of functioning and are not "
+         "better explained by another mental disorder or the effects of a substance").split()
+
+SAMPLE_PAGES = 20  # Skipped pages timed with pdfplumber to estimate the saving
+
+
+def prose_lines(rng, count):
+    return [' '.join(rng.choice(PROSE) for _ in range(12)) for _ in range(count)]
+
+
+def write_book(path, items_per_chapter=8, front_pages=28, back_pages=220, seed=1):
+    """Write a DSM-5-shaped synthetic book; returns its page count."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(seed)
+    pdf = canvas.Canvas(path, pagesize=letter)
+    page_count = 0
+
+    def page(head, lines):
+        nonlocal page_count
+        page_count += 1
+        pdf.setFont("Helvetica", 8)
+        pdf.drawString(50, 770, f"{head} {page_count}" if page_count % 2 else f"{page_count} {head}")
+        y = 740
+        for line in lines:
+            pdf.drawString(50, y, line)
+            y -= 12
+        pdf.showPage()
+
+    for index in range(front_pages):
+        page("Use of the Manual", ["Use of the Manual"] + prose_lines(rng, 20) +
+             ["The diagnostic criteria are offered as guidelines for making diagnoses, and their use",
+              "should be informed by clinical judgment. Diagnostic Criteria and Codes are listed in Section II."])
+
+    code = 0
+    for chapter in CHAPTERS:
+        for number in range(items_per_chapter):
+            code += 1
+            title = f"{chapter.split()[0].rstrip(',-')} Disorder {number + 1}"
+            page(chapter, [title, f"Diagnostic Criteria {290 + code // 10}.{code % 10}{code % 7} (F{10 + code % 89}.{code % 9})",
+                           "A. Persistent deficits, as manifested by the following:",
+                           "1. Deficits in reciprocity.", "2. Deficits in nonverbal behaviors.",
+                           "B. The symptoms cause clinically significant distress.",
+                           "Specify if:", "With accompanying impairment"] + prose_lines(rng, 12))
+            sections = SECTIONS[:]
+            for _ in range(rng.randint(1, 4)):
+                taken, sections = sections[:3], sections[3:] or SECTIONS[-1:]
+                page(chapter, [line for section in taken for line in [section] + prose_lines(rng, 6)])
+            page(chapter, ["Differential Diagnosis"] + prose_lines(rng, 8) + ["Comorbidity"] + prose_lines(rng, 6))
+
+    for index in range(back_pages):
+        if index < back_pages // 2:
+            lines = ["Highlights of Changes From DSM-IV to DSM-5"] + prose_lines(rng, 10) + [
+                "The diagnostic criteria for this disorder were revised; comorbidity with other disorders",
+                "is described in the text. Diagnostic Criteria now include specifiers."]
+        else:
+            lines = ["Index"] + [f"{rng.choice(PROSE).capitalize()}, {rng.randint(1, 900)}" for _ in range(30)] + [
+                "Comorbidity, 12, 87", "Diagnostic criteria, 19-24"]
+        page("Appendix", lines)
+
+    pdf.save()
+    return page_count
+
+
+def layout_seconds(pdf_path, pages):
+    """pdfplumber extraction time for a sample of the given pages, extrapolated to all of them."""
+    import pdfplumber
+
+    sample = pages[::max(1, len(pages) // SAMPLE_PAGES)][:SAMPLE_PAGES]
+    if not sample:
+        return 0.0
+    with pdfplumber.open(pdf_path) as pdf:
+        start = time.perf_counter()
+        for page_num in sample:
+            pdf.pages[page_num].extract_text()
+        elapsed = time.perf_counter() - start
+    return elapsed * len(pages) / len(sample)
+
+
+def verify(pdf_path):
+    """Compare two-phase items with a full run of the single-page splitter."""
+    from split_dsm5_single_page import DSMSinglePageSplitter
+    from running_heads import strip_running_lines
+
+    splitter = DSMSinglePageSplitter(pdf_path)
+    locator = locate_item_pages(pdf_path, reader=splitter.get_source().reader)
+    two_phase = splitter.find_diagnostic_sections(strip_running_lines(splitter.extract_text_with_pages(locator['pages'])))
+    full = splitter.find_diagnostic_sections(strip_running_lines(splitter.extract_text_with_pages()))
+    splitter.close_source()
+    return compare_items(two_phase, full)
+
+
+def main():
+    """Main function to check the two-phase skipped fraction."""
+    parser = argparse.ArgumentParser(description="Check how much of a DSM-5-shaped book two-phase mode skips")
+    parser.add_argument("input", nargs="?", help="Input PDF (default: a synthetic DSM-5-sized book)")
+    parser.add_argument("--min-skipped", type=float, default=0.2, help="Minimum fraction of pages skipped")
+    parser.add_argument("--verify", action="store_true", help="Also compare the items with a full run")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.input
+        if pdf_path is None:
+            pdf_path = os.path.join(tmp, "synthetic_dsm5.pdf")
+            print(f"Synthetic book: {write_book(pdf_path)} pages")
+
+        locator = locate_item_pages(pdf_path)
+        candidates = set(locator['pages'])
+        skipped = [page for page in range(locator['total_pages']) if page not in candidates]
+        saved_seconds = layout_seconds(pdf_path, skipped)
+        print(f"Locator: read {locator['locator_pages']}/{locator['total_pages']} pages in "
+              f"{locator['locate_seconds']:.2f}s; ranges {locator['ranges']}")
+        print(f"Skipped: {len(skipped)} pages ({locator['skipped_fraction']:.1%}), "
+              f"about {saved_seconds:.2f}s of layout extraction")
+
+        failures = []
+        if locator['skipped_fraction'] < args.min_skipped:
+            failures.append(f"skipped {locator['skipped_fraction']:.1%} of pages (minimum {args.min_skipped:.0%})")
+        if locator['locate_seconds'] >= saved_seconds:
+            failures.append(f"locator took {locator['locate_seconds']:.2f}s to save {saved_seconds:.2f}s")
+        if args.verify and not verify(pdf_path)['ok']:
+            failures.append("two-phase items differ from a full run")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("Two-phase mode skips a substantial part of the book.")
+
+
+if __name__ == "__main__":
+    main()
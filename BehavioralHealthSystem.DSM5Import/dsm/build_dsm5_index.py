@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+DSM5 Code Index Builder
+
+This script builds precomputed lookup tables from the segmented item store
+(items.json written by split_dsm5_single_page.py):
+
+    code_index.json     normalized ICD-9 / ICD-10 code -> item ids
+    related_items.json  item id -> related item ids (with the sections that mention them)
+
+Every "ddd.d (Xdd.d)" pair (V codes included) and every standalone ICD-10
+code that belongs to the item is indexed, not only the first code next to
+"Diagnostic Criteria", so substance disorders and specifiers with several
+codes are found by any of them. An item's codes come from its header line,
+its Diagnostic Criteria and Specifiers, and coding notes; codes mentioned in
+prose (Diagnostic Features, Prevalence, ...) usually name other disorders and
+are not indexed. Mentions of other
+disorders (by title or code) in Differential Diagnosis and Comorbidity become
+edges in the adjacency list. Code lookups and "related conditions" queries
+are then dictionary lookups; nothing re-scans text at request time.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python build_dsm5_index.py single-pages/items.json
+    python build_dsm5_index.py single-pages/items.json --output-dir index --lookup F84.0
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+
+from dsm5_items import CODE_PATTERN, ICD10_PATTERN, load_items
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CODE_INDEX_FILE = "code_index.json"
+RELATED_ITEMS_FILE = "related_items.json"
+
+# Sections whose disorder mentions refer to *other* items
+CROSS_REFERENCE_SECTIONS = ['Differential Diagnosis', 'Comorbidity']
+
+# Sections whose codes are the item's own (elsewhere only coding notes count)
+CODE_SECTIONS = ['Diagnostic Criteria', 'Specifiers']
+CODING_NOTE_PATTERN = re.compile(r'^\s*Coding\s+note\b', re.IGNORECASE)
+
+
+def normalize_code(code):
+    """Normalize an ICD-9, ICD-10 or "ICD-9 (ICD-10)" code for lookup."""
+    code = re.sub(r'\s+', '', code).upper()
+    if code.startswith('(') and code.endswith(')'):
+        code = code[1:-1]
+    return code
+
+
+def extract_code_pairs(text):
+    """Return every (ICD-9, ICD-10) pair in the text, in order of appearance.
+
+    Standalone ICD-10 codes are returned as ('', ICD-10).
+    """
+    text = text or ''
+    pairs = []
+    paired_spans = []
+    for match in CODE_PATTERN.finditer(text):
+        pairs.append((match.start(), (match.group(1), match.group(2))))
+        paired_spans.append(match.span())
+    for match in ICD10_PATTERN.finditer(text):
+        if not any(start <= match.start() < end for start, end in paired_spans):
+            pairs.append((match.start(), ('', match.group(1))))
+    return [pair for _, pair in sorted(pairs)]
+
+
+def coding_notes(text):
+    """The coding notes in a section: each "Coding note" line through the end of its sentence."""
+    lines = (text or '').splitlines()
+    notes = []
+    for i, line in enumerate(lines):
+        if not CODING_NOTE_PATTERN.match(line):
+            continue
+        note = [line]
+        while not note[-1].rstrip().endswith('.') and i + len(note) < len(lines) and lines[i + len(note)].strip():
+            note.append(lines[i + len(note)])
+        notes.append('\n'.join(note))
+    return notes
+
+
+def item_codes(record):
+    """Code pairs belonging to an item: its header code, criteria and specifier codes, and coding notes."""
+    pairs = extract_code_pairs(record['diagnostic_code'])
+    for name, text in record['sections'].items():
+        if name in CODE_SECTIONS:
+            pairs.extend(extract_code_pairs(text))
+        elif name not in CROSS_REFERENCE_SECTIONS:
+            for note in coding_notes(text):
+                pairs.extend(extract_code_pairs(note))
+
+    unique_pairs = []
+    for pair in pairs:
+        if pair not in unique_pairs:
+            unique_pairs.append(pair)
+    return unique_pairs
+
+
+def build_code_index(records):
+    """Build the normalized code -> [item id] table and the per-item code list."""
+    code_index = {}
+    codes_by_item = {}
+
+    for record in records:
+        pairs = item_codes(record)
+        codes_by_item.setdefault(record['id'], [])
+        for icd9, icd10 in pairs:
+            pair_text = f"{icd9} ({icd10})" if icd9 else icd10
+            if pair_text not in codes_by_item[record['id']]:
+                codes_by_item[record['id']].append(pair_text)
+            keys = (normalize_code(icd9), normalize_code(icd10), normalize_code(pair_text)) if icd9 else (icd10,)
+            for key in keys:
+                ids = code_index.setdefault(key, [])
+                if record['id'] not in ids:
+                    ids.append(record['id'])
+
+    return code_index, codes_by_item
+
+
+def build_title_pattern(records):
+    """Compile one alternation over all item titles, longest first so specific titles win."""
+    titles = sorted({record['title'] for record in records}, key=len, reverse=True)
+    if not titles:
+        return None
+    alternation = '|'.join(re.escape(title).replace(r'\ ', r'\s+') for title in titles)
+    return re.compile(rf'(?<!\w)(?:{alternation})(?!\w)', re.IGNORECASE)
+
+
+def build_related_items(records, code_index):
+    """Build the item -> related items adjacency list from cross-reference sections."""
+    ids_by_title = {}
+    for record in records:
+        ids = ids_by_title.setdefault(record['title'].lower(), [])
+        if record['id'] not in ids:
+            ids.append(record['id'])
+
+    title_pattern = build_title_pattern(records)
+    related = {}
+
+    for record in records:
+        edges = related.setdefault(record['id'], {})
+        for section in CROSS_REFERENCE_SECTIONS:
+            text = record['sections'].get(section, '')
+            if not text:
+                continue
+
+            targets = []
+            if title_pattern:
+                for match in title_pattern.finditer(text):
+                    mention = re.sub(r'\s+', ' ', match.group(0)).lower()
+                    targets.extend(ids_by_title.get(mention, []))
+            for icd9, icd10 in extract_code_pairs(text):
+                targets.extend(code_index.get(normalize_code(icd10), []))
+
+            for target in targets:
+                if target == record['id']:
+                    continue
+                via = edges.setdefault(target, [])
+                if section not in via:
+                    via.append(section)
+
+    return {
+        item_id: [{'id': target, 'via': via} for target, via in edges.items()]
+        for item_id, edges in related.items()
+    }
+
+
+def build_index(records, output_dir):
+    """Build and write both lookup tables; returns their paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    code_index, codes_by_item = build_code_index(records)
+    related = build_related_items(records, code_index)
+
+    code_index_path = os.path.join(output_dir, CODE_INDEX_FILE)
+    with open(code_index_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'codes': code_index, 'items': codes_by_item}, f, indent=2, ensure_ascii=False)
+
+    related_path = os.path.join(output_dir, RELATED_ITEMS_FILE)
+    with open(related_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'related': related}, f, indent=2, ensure_ascii=False)
+
+    edge_count = sum(len(edges) for edges in related.values())
+    logger.info(f"Indexed {len(code_index)} code keys across {len(codes_by_item)} items")
+    logger.info(f"Wrote {edge_count} related-item edges")
+    return code_index_path, related_path
+
+
+class DSM5Index:
+    """Read-only view over the precomputed lookup tables."""
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, CODE_INDEX_FILE), 'r', encoding='utf-8') as f:
+            code_data = json.load(f)
+        with open(os.path.join(index_dir, RELATED_ITEMS_FILE), 'r', encoding='utf-8') as f:
+            related_data = json.load(f)
+
+        self.codes = code_data['codes']
+        self.codes_by_item = code_data['items']
+        self.related = related_data['related']
+
+    def lookup_code(self, code):
+        """Item ids for an ICD-9, ICD-10 or paired code."""
+        return self.codes.get(normalize_code(code), [])
+
+    def item_codes(self, item_id):
+        """All code pairs recorded for an item."""
+        return self.codes_by_item.get(item_id, [])
+
+    def related_items(self, item_id):
+        """Related items as [{'id': ..., 'via': [section, ...]}]."""
+        return self.related.get(item_id, [])
+
+
+def main(argv=None):
+    """Main function to run the index builder."""
+    parser = argparse.ArgumentParser(prog="dsm5 index", description="Build the DSM-5 code index and related-items graph")
+    parser.add_argument("items", help="Path to items.json written by the single-page splitter")
+    parser.add_argument("--output-dir", help="Directory for the index files (default: next to items.json)")
+    parser.add_argument("--lookup", metavar="CODE", help="Look up a code in the built index")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.items))
+    records = load_items(args.items)
+    build_index(records, output_dir)
+
+    if args.lookup:
+        index = DSM5Index(output_dir)
+        for item_id in index.lookup_code(args.lookup):
+            related = ', '.join(edge['id'] for edge in index.related_items(item_id)) or '-'
+            print(f"{item_id}: codes={index.item_codes(item_id)} related={related}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+DSM5 Compact Item Format
+
+add_standardized_headers pads every item with all 13 headers and
+"[No data available for this section]" placeholders, which is dead text in
+every output and every downstream prompt. This script writes a compact
+canonical serialization of the item store instead:
+
+    - empty sections are omitted (no placeholders)
+    - wrapped lines are re-joined, hyphenated line breaks are removed and
+      whitespace is collapsed; list lines (A., 1., a., Note:, Specify) keep
+      their own line. A line-break hyphen is kept when the word is a
+      hyphenated compound: it appears hyphenated elsewhere in the item
+      ("social-emotional") or starts with a compound prefix ("self-esteem")
+    - per-section character counts and token estimates are recorded
+
+One item per line (JSON Lines, compact separators, DSM-5 section order).
+With --max-tokens, items over the ceiling are reported (most expensive
+first), and with --trim their lowest-priority sections are dropped until
+they fit, so costly items are visible before they reach the model.
+Diagnostic Criteria is never dropped or cut; an item still over the
+ceiling with only its criteria left is marked over_budget and logged. The
+compact-vs-padded size is measured before trimming.
+
+Token counts are estimates (about 4 characters per token for English
+prose), good for budgeting rather than billing.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python compact_items.py single-pages/items.json
+    python compact_items.py single-pages/items.json --max-tokens 3000 --trim --output items.compact.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+
+from dsm5_items import STANDARD_SECTIONS, load_items
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+# Lines that start a new list entry and must not be joined to the previous line. Only the
+# note labels ignore case: wrapped prose may start with "with", "e.g." or "i.e."
+LIST_LINE_PATTERN = re.compile(r'^(?:(?:[A-Z]|\d{1,2}|[a-z])\.(?:\s|$)|(?i:Note:|Coding\s+note:)|Specify\b|With\b)')
+
+# Hyphenated words inside a line ("social-emotional"), and prefixes that always take a hyphen
+COMPOUND_PATTERN = re.compile(r'\b[a-z]+(?:-[a-z]+)+\b', re.IGNORECASE)
+COMPOUND_PREFIXES = {'self', 'all', 'ex', 'half', 'ill', 'well', 'cross', 'quasi'}
+
+# Sections dropped first when trimming to a budget (Diagnostic Criteria is never dropped)
+TRIM_ORDER = [
+    'Culture-Related Diagnostic Issues',
+    'Gender-Related Diagnostic Issues',
+    'Development and Course',
+    'Prevalence',
+    'Associated Features Supporting Diagnosis',
+    'Functional Consequences',
+    'Suicide Risk',
+    'Risk and Prognostic Factors',
+    'Comorbidity',
+    'Differential Diagnosis',
+    'Diagnostic Features',
+    'Specifiers'
+]
+
+
+def estimate_tokens(text):
+    """Rough token estimate for budgeting."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def hyphenated_compounds(texts):
+    """Lowercased hyphenated words written inside a line anywhere in texts."""
+    return {word.lower() for text in texts for line in (text or '').split('\n')
+            for word in COMPOUND_PATTERN.findall(line)}
+
+
+def keeps_hyphen(previous, line, compounds):
+    """True if a hyphen at a line break belongs to a compound word ("self-" + "esteem")."""
+    head = re.findall(r'[A-Za-z]+-$', previous)
+    tail = re.match(r'[a-z]+', line)
+    if not head or not tail:
+        return False
+    prefix = head[0][:-1].lower()
+    return prefix in COMPOUND_PREFIXES or f"{prefix}-{tail.group(0)}" in compounds
+
+
+def normalize_text(text, compounds=frozenset()):
+    """Re-join wrapped lines, remove line-break hyphenation and collapse whitespace.
+
+    compounds holds known hyphenated words (default: those in text itself).
+    """
+    return normalize_lines((text or '').split('\n'), compounds or hyphenated_compounds([text]))
+
+
+def normalize_lines(raw_lines, compounds):
+    """normalize_text() over an iterable of raw lines, so text can be read one line at a time."""
+    lines = []
+    for raw_line in raw_lines:
+        line = re.sub(r'\s+', ' ', raw_line).strip()
+        if not line:
+            continue
+        if not lines or LIST_LINE_PATTERN.match(line):
+            lines.append(line)
+        elif lines[-1].endswith('-') and line[:1].islower():
+            keep = keeps_hyphen(lines[-1], line, compounds)
+            lines[-1] = (lines[-1] if keep else lines[-1][:-1]) + line
+        else:
+            lines[-1] = f"{lines[-1]} {line}"
+    return '\n'.join(lines)
+
+
+def compact_item(record):
+    """Build the compact canonical form of a store record."""
+    sections = {}
+    compounds = hyphenated_compounds(record['sections'].values())
+    for name in STANDARD_SECTIONS:
+        text = normalize_text(record['sections'].get(name, ''), compounds)
+        if text:
+            sections[name] = text
+
+    compact = {
+        'id': record['id'],
+        'title': record['title'],
+        'code': record['diagnostic_code'],
+        'pages': [record['page_start'], record['page_end']],
+        'sections': sections
+    }
+    update_stats(compact)
+    return compact
+
+
+def update_stats(compact):
+    """(Re)compute per-section character and token estimates."""
+    chars = {name: len(text) for name, text in compact['sections'].items()}
+    tokens = {name: estimate_tokens(text) for name, text in compact['sections'].items()}
+    compact['stats'] = {
+        'chars': chars,
+        'tokens': tokens,
+        'total_tokens': sum(tokens.values()) + estimate_tokens(compact['title'] + compact['code'])
+    }
+
+
+def trim_to_budget(compact, max_tokens):
+    """Drop low-priority sections until the item fits; Diagnostic Criteria is kept whole."""
+    trimmed = []
+    for name in TRIM_ORDER:
+        if compact['stats']['total_tokens'] <= max_tokens:
+            break
+        if name in compact['sections']:
+            del compact['sections'][name]
+            trimmed.append(name)
+            update_stats(compact)
+
+    if trimmed:
+        compact['trimmed'] = trimmed
+    if compact['stats']['total_tokens'] > max_tokens:
+        compact['over_budget'] = True
+        logger.warning(f"Still over budget after trimming: {compact['code']} {compact['title']} - "
+                       f"{compact['stats']['total_tokens']} tokens (Diagnostic Criteria is never cut)")
+    return compact
+
+
+def serialize(compact):
+    """Canonical one-line JSON for an item."""
+    return json.dumps(compact, ensure_ascii=False, separators=(',', ':'))
+
+
+def padded_size(record):
+    """Characters of the padded standardized text, for comparison with the compact form."""
+    placeholder = '[No data available for this section]'
+    return sum(len(name) + len(record['sections'].get(name) or placeholder) + 3 for name in STANDARD_SECTIONS)
+
+
+def main(argv=None):
+    """Main function to write the compact item format."""
+    parser = argparse.ArgumentParser(prog="dsm5 compact", description="Write compact canonical DSM-5 items with token estimates")
+    parser.add_argument("items", help="Path to items.json written by the single-page splitter")
+    parser.add_argument("--output", help="Output .jsonl path (default: items.compact.jsonl next to items.json)")
+    parser.add_argument("--max-tokens", type=int, help="Token ceiling per item; items above it are reported")
+    parser.add_argument("--trim", action="store_true", help="Trim items above --max-tokens instead of only reporting them")
+    parser.add_argument("--top", type=int, default=10, help="Number of most expensive items to list")
+    args = parser.parse_args(argv)
+
+    records = load_items(args.items)
+    output_path = args.output or os.path.join(os.path.dirname(os.path.abspath(args.items)), 'items.compact.jsonl')
+
+    compact_items = [compact_item(record) for record in records]
+    # Measured before trimming, so the saving is the format's alone
+    padded_chars = sum(padded_size(record) for record in records)
+    compact_chars = sum(sum(item['stats']['chars'].values()) for item in compact_items)
+    over_budget = []
+    if args.max_tokens:
+        over_budget = [item for item in compact_items if item['stats']['total_tokens'] > args.max_tokens]
+        for item in sorted(over_budget, key=lambda i: i['stats']['total_tokens'], reverse=True):
+            largest = max(item['stats']['tokens'].items(), key=lambda kv: kv[1], default=('-', 0))
+            logger.warning(f"Over budget: {item['code']} {item['title']} - {item['stats']['total_tokens']} tokens "
+                           f"(ceiling {args.max_tokens}, largest section: {largest[0]} {largest[1]})")
+        if args.trim:
+            for item in over_budget:
+                trim_to_budget(item, args.max_tokens)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for item in compact_items:
+            f.write(serialize(item) + '\n')
+
+    total_tokens = sum(item['stats']['total_tokens'] for item in compact_items)
+    logger.info(f"Wrote {len(compact_items)} compact items to {output_path}")
+    logger.info(f"Section text before trimming: {compact_chars} chars compact vs {padded_chars} padded "
+                f"({1 - compact_chars / padded_chars if padded_chars else 0:.1%} saved by the format)")
+    logger.info(f"~{total_tokens} tokens total as written")
+    if args.max_tokens:
+        action = "trimmed" if args.trim else "reported"
+        still_over = sum(1 for item in compact_items if item.get('over_budget'))
+        logger.info(f"{len(over_budget)} items over {args.max_tokens} tokens ({action}; "
+                    f"{still_over} still over with only Diagnostic Criteria left)")
+
+    print(f"\nTop {args.top} items by estimated tokens:")
+    for item in sorted(compact_items, key=lambda i: i['stats']['total_tokens'], reverse=True)[:args.top]:
+        print(f"  {item['stats']['total_tokens']:7d}  {item['code']:<20} {item['title']}")
+
+
+if __name__ == "__main__":
+    main()
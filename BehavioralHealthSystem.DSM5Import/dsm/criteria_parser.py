@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+DSM5 Diagnostic Criteria Parser
+
+Turns the free-text "Diagnostic Criteria" section of an item into a compact
+criterion tree, so callers can pick individual criteria instead of
+re-parsing (or sending an LLM) the whole wall of text:
+
+    {
+      "criteria": [
+        {"id": "A", "text": "...", "notes": [...],
+         "symptoms": [{"id": "1", "text": "...", "notes": [...],
+                       "subitems": [{"id": "a", "text": "..."}]}]}
+      ],
+      "specifiers": [{"text": "Specify if:", "options": ["With ..."]}],
+      "notes": ["Coding note: ..."]
+    }
+
+Criterion letters must appear in order (A, B, C, ...) so stray "I." or
+"E." at the start of a wrapped line are treated as continuation text.
+Lines broken with a trailing hyphen are re-joined.
+
+A note belongs to the symptom above it. A note after a criterion's last
+symptom is moved to the criterion only when it qualifies the whole list
+("Do not include symptoms that are clearly attributable to another medical
+condition", "At least one of these must be (1), (2), or (3)"):
+
+    - the list is complete: at least as many symptoms as the criterion asks
+      for ("three (or more) of the following")
+    - the note is not indented deeper than the symptom
+    - it is phrased about the list (these, the above, symptoms, at least,
+      one of ..., or two or more symptom references), not about the symptom
+      ("Note: In children, there may be frightening dreams ..." stays)
+
+Numbered options after "Specify whether:" ("1. With good or fair insight")
+are split on their numbering; later unnumbered lines continue the option.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python criteria_parser.py single-pages/items.json --item autism-spectrum-disorder
+"""
+
+import argparse
+import json
+import re
+import string
+
+CRITERION_PATTERN = re.compile(r'^([A-Z])\.\s+(.*)$')
+SYMPTOM_PATTERN = re.compile(r'^(\d{1,2})\.\s+(.*)$')
+SUBITEM_PATTERN = re.compile(r'^([a-z])\.\s+(.*)$')
+NOTE_PATTERN = re.compile(r'^((?:Coding\s+)?Note:)\s*(.*)$', re.IGNORECASE)
+SPECIFY_PATTERN = re.compile(r'^Specify\b', re.IGNORECASE)
+# "A4", "Criterion A4" or "(4)" in a note
+SYMPTOM_REFERENCE_PATTERN = re.compile(r'\b[A-Z](\d{1,2})\b|\((\d{1,2})\)')
+# Wording that makes a note about the symptom list rather than one symptom
+LIST_NOTE_PATTERN = re.compile(
+    r'\b(?:these|the above|the following|symptoms|criteria|at least|(?:one|any|all|each|none) of)\b', re.IGNORECASE)
+# "three (or more) of the following" in a criterion's text
+REQUIRED_COUNT_PATTERN = re.compile(r'\b(\w+)\s*(?:\(or more\)\s*)?of the following', re.IGNORECASE)
+COUNT_WORDS = {word: number for number, word in enumerate(
+    ['one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten'], start=1)}
+
+
+def append_text(node, key, line):
+    """Append a wrapped line to a text field, re-joining hyphenated breaks."""
+    current = node.get(key, '')
+    if not current:
+        node[key] = line
+    elif current.endswith('-') and line[:1].islower():
+        node[key] = current[:-1] + line
+    else:
+        node[key] = f"{current} {line}"
+
+
+def indent(line):
+    """Leading whitespace width of a raw line."""
+    return len(line) - len(line.lstrip())
+
+
+def symptom_references(note):
+    """Symptom numbers a note refers to ("A4", "(4)")."""
+    return {first or second for first, second in SYMPTOM_REFERENCE_PATTERN.findall(note['text'])}
+
+
+def list_is_complete(criterion):
+    """True unless the criterion asks for more symptoms than were read."""
+    match = REQUIRED_COUNT_PATTERN.search(criterion['text'])
+    if not match:
+        return True
+    word = match.group(1).lower()
+    required = int(word) if word.isdigit() else COUNT_WORDS.get(word, 0)
+    return len(criterion['symptoms']) >= required
+
+
+def qualifies_list(note, symptom):
+    """True if a note after the last symptom is about the whole list (see module docstring)."""
+    if note['indent'] > symptom['indent']:
+        return False
+    references = symptom_references(note)
+    if references == {symptom['id']}:
+        return False
+    return len(references) > 1 or bool(LIST_NOTE_PATTERN.search(note['text']))
+
+
+def settle_trailing_notes(criterion, symptom, trailing_notes):
+    """Move notes after a criterion's last symptom to the criterion (see module docstring)."""
+    if list_is_complete(criterion):
+        for note in trailing_notes:
+            if qualifies_list(note, symptom):
+                symptom['notes'].remove(note)
+                criterion['notes'].append(note)
+    trailing_notes.clear()
+
+
+def parse_criteria(text):
+    """Parse a Diagnostic Criteria section into a criterion tree (see module docstring)."""
+    tree = {'criteria': [], 'specifiers': [], 'notes': []}
+    criterion = None
+    symptom = None
+    subitem = None
+    specifier = None
+    # The node that continuation lines and notes attach to
+    target = None
+    target_key = 'text'
+    # Notes read since the current symptom's last line (settled when the criterion ends)
+    trailing_notes = []
+    numbered_options = False
+
+    for raw_line in (text or '').split('\n'):
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        expected_letter = string.ascii_uppercase[len(tree['criteria'])] if len(tree['criteria']) < 26 else None
+        criterion_match = CRITERION_PATTERN.match(line)
+        symptom_match = SYMPTOM_PATTERN.match(line)
+        subitem_match = SUBITEM_PATTERN.match(line)
+        note_match = NOTE_PATTERN.match(line)
+
+        if criterion_match and criterion_match.group(1) == expected_letter:
+            if trailing_notes:
+                settle_trailing_notes(criterion, symptom, trailing_notes)
+            criterion = {'id': criterion_match.group(1), 'text': criterion_match.group(2), 'symptoms': [], 'notes': []}
+            tree['criteria'].append(criterion)
+            symptom = subitem = specifier = None
+            target, target_key = criterion, 'text'
+
+        elif symptom_match and criterion is not None and specifier is None:
+            symptom = {'id': symptom_match.group(1), 'text': symptom_match.group(2), 'subitems': [], 'notes': [],
+                       'indent': indent(raw_line)}
+            criterion['symptoms'].append(symptom)
+            subitem = None
+            trailing_notes.clear()
+            target, target_key = symptom, 'text'
+
+        elif subitem_match and symptom is not None and specifier is None:
+            subitem = {'id': subitem_match.group(1), 'text': subitem_match.group(2)}
+            symptom['subitems'].append(subitem)
+            trailing_notes.clear()
+            target, target_key = subitem, 'text'
+
+        elif note_match:
+            note = {'text': f"{note_match.group(1)} {note_match.group(2)}".strip(), 'indent': indent(raw_line)}
+            # Notes belong to the innermost criterion/symptom being read
+            owner = symptom if symptom is not None and specifier is None else criterion
+            if owner is None or specifier is not None:
+                tree['notes'].append(note)
+            else:
+                owner['notes'].append(note)
+                if owner is symptom:
+                    trailing_notes.append(note)
+            target, target_key = note, 'text'
+
+        elif SPECIFY_PATTERN.match(line):
+            if trailing_notes:
+                settle_trailing_notes(criterion, symptom, trailing_notes)
+            specifier = {'text': line, 'options': []}
+            tree['specifiers'].append(specifier)
+            numbered_options = False
+            target, target_key = specifier, 'text'
+
+        elif specifier is not None and target is specifier:
+            # Lines after "Specify ...:" are its options until the next structural line;
+            # once they are numbered, only a new number starts an option
+            if symptom_match:
+                numbered_options = True
+                specifier['options'].append(symptom_match.group(2))
+            elif not specifier['options'] or (line[:1].isupper() and not numbered_options):
+                specifier['options'].append(line)
+            else:
+                specifier['options'][-1] = f"{specifier['options'][-1]} {line}"
+
+        elif target is not None:
+            append_text(target, target_key, line)
+
+        else:
+            # Text before criterion A (rare): keep it as a top-level note
+            note = {'text': line}
+            tree['notes'].append(note)
+            target, target_key = note, 'text'
+
+    if trailing_notes:
+        settle_trailing_notes(criterion, symptom, trailing_notes)
+
+    # Notes are plain strings once parsing is done
+    tree['notes'] = [note['text'] for note in tree['notes']]
+    for node in tree['criteria']:
+        node['notes'] = [note['text'] for note in node['notes']]
+        for symptom_node in node['symptoms']:
+            symptom_node['notes'] = [note['text'] for note in symptom_node['notes']]
+            del symptom_node['indent']
+    return tree
+
+
+def select_criteria(tree, criterion_ids):
+    """Return only the listed criteria (e.g. ['A', 'C']) from a tree."""
+    wanted = {criterion_id.upper() for criterion_id in criterion_ids}
+    return [node for node in tree['criteria'] if node['id'] in wanted]
+
+
+def render_criteria(nodes):
+    """Render criterion nodes back to compact text for prompts."""
+    lines = []
+    for node in nodes:
+        lines.append(f"{node['id']}. {node['text']}")
+        lines.extend(f"   {note}" for note in node['notes'])
+        for symptom in node['symptoms']:
+            lines.append(f"   {symptom['id']}. {symptom['text']}")
+            lines.extend(f"      {subitem['id']}. {subitem['text']}" for subitem in symptom['subitems'])
+            lines.extend(f"      {note}" for note in symptom['notes'])
+    return '\n'.join(lines)
+
+
+def main():
+    """Main function to print the criterion tree of one item."""
+    from dsm5_items import load_items
+
+    parser = argparse.ArgumentParser(description="Parse an item's Diagnostic Criteria into a criterion tree")
+    parser.add_argument("items", help="Path to items.json")
+    parser.add_argument("--item", required=True, help="Item id")
+    args = parser.parse_args()
+
+    for record in load_items(args.items):
+        if record['id'] == args.item:
+            tree = record.get('criteria_tree') or parse_criteria(record['sections'].get('Diagnostic Criteria', ''))
+            print(json.dumps(tree, indent=2, ensure_ascii=False))
+            return
+    print(f"Item not found: {args.item}")
+
+
+if __name__ == "__main__":
+    main()
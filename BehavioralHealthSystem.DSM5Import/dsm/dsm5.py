@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+DSM5 Command-Line Tools
+
+Single entry point for the DSM-5 PDF scripts in this folder.
+
+Heavy libraries (pdfplumber, PyPDF2, reportlab, psycopg2, azure) are only imported
+inside the subcommand that needs them, so --help and lightweight commands
+start quickly. bench_import_time.py keeps that startup under a fixed budget.
+
+Usage:
+    python dsm5.py --help
+    python dsm5.py chunk DSM5.pdf --pages-per-split 25 --output-dir chunks
+    python dsm5.py split DSM5.pdf --output-dir diagnostic-items
+    python dsm5.py split DSM5.pdf --output-dir diagnostic-items --slim
+    python dsm5.py single-page DSM5.pdf --output-dir single-pages
+    python dsm5.py single-page DSM5.pdf --bundle single-pages/items.zip
+    python dsm5.py single-page DSM5.pdf --combined single-pages/dsm5_items.pdf
+    python dsm5.py single-page DSM5.pdf --profile profile --profile-top 20
+    python dsm5.py single-page DSM5.pdf --segment-workers 8 --shared-text
+    python dsm5.py analyze DSM5.pdf --pages 50
+    python dsm5.py find "Cannabis Withdrawal" --input DSM5.pdf
+    python dsm5.py index single-pages/items.json --lookup F84.0
+    python dsm5.py load-postgres single-pages/items.json --create-table
+    python dsm5.py serve single-pages/items.json --port 8089
+    python dsm5.py compact single-pages/items.json --max-tokens 3000
+    python dsm5.py upload single-pages --azurite
+    python dsm5.py group single-pages/items.json --threshold 0.8
+    python dsm5.py autocomplete single-pages/items.json --query withdr
+    python dsm5.py session DSM5.pdf --pages-cache DSM5.pages.json
+    python dsm5.py slim diagnostic-items --report slim_report.json
+    python dsm5.py load-test --standin single-pages/items.json --concurrency 32 --ramp 10 --duration 30
+"""
+
+import argparse
+import sys
+
+DEFAULT_INPUT = "DSM5.pdf"
+
+
+def cmd_chunk(args):
+    """Split the PDF into fixed-size page chunks."""
+    from split_dsm5 import split_pdf
+    split_pdf(args.input, pages_per_split=args.pages_per_split, output_dir=args.output_dir)
+
+
+def cmd_split(args):
+    """Split the PDF into one page-range PDF per diagnostic item."""
+    from split_dsm5_diagnostic import DSMDiagnosticSplitter
+    splitter = DSMDiagnosticSplitter(args.input, args.output_dir)
+    attach_profiler(splitter, args)
+    attach_page_extractor(splitter, args)
+    splitter.split_by_diagnostic_items(two_phase=args.two_phase, verify=args.verify, slim=args.slim)
+    report_profile(splitter, args)
+
+
+def cmd_single_page(args):
+    """Render each diagnostic item onto a single page."""
+    from split_dsm5_single_page import DSMSinglePageSplitter
+    splitter = DSMSinglePageSplitter(args.input, args.output_dir)
+    splitter.segment_workers = args.segment_workers
+    splitter.shared_text = args.shared_text
+    attach_profiler(splitter, args)
+    attach_page_extractor(splitter, args)
+    splitter.split_by_diagnostic_items(bundle_path=args.bundle, two_phase=args.two_phase, verify=args.verify,
+                                       strip_running_heads=not args.keep_running_heads,
+                                       combined_path=args.combined, batch_pages=args.batch_pages)
+    report_profile(splitter, args)
+
+
+def cmd_analyze(args):
+    """Print the diagnostic structure found on the first pages."""
+    from analyze_dsm_structure import analyze_dsm_structure
+    analyze_dsm_structure(args.input, num_pages=args.pages)
+
+
+def cmd_find(args):
+    """Print every line matching a phrase with its context."""
+    from find_pattern import find_pattern
+    find_pattern(args.input, args.phrase, lines_after=args.context)
+
+
+def cmd_index(args):
+    """Build the code index and related-items graph from items.json."""
+    from build_dsm5_index import main
+    main(args.tool_args)
+
+
+def cmd_load_postgres(args):
+    """Bulk-load items.json into PostgreSQL."""
+    from load_dsm5_postgres import main
+    main(args.tool_args)
+
+
+def attach_profiler(splitter, args):
+    """Attach a stage profiler to a splitter when --profile is given."""
+    if args.profile:
+        from stage_profiler import StageProfiler
+        splitter.profiler = StageProfiler(args.profile)
+
+
+def report_profile(splitter, args):
+    """Write the profile report (pstats, collapsed stacks, slowest pages/items)."""
+    if splitter.profiler:
+        splitter.profiler.write_report(top=args.profile_top)
+
+
+def attach_page_extractor(splitter, args):
+    """Extract pages in isolated, time/memory-limited workers when --isolate-pages is given."""
+    if args.isolate_pages:
+        from page_isolation import IsolatedPageExtractor
+        splitter.page_extractor = IsolatedPageExtractor(
+            args.input,
+            workers=args.extract_workers,
+            page_timeout=args.page_timeout,
+            memory_mb=args.page_memory_mb,
+            quarantine_path=args.quarantine,
+            retry_quarantined=args.retry_quarantined
+        )
+
+
+def add_isolation_arguments(parser):
+    """Options shared by the splitters for isolated page extraction."""
+    parser.add_argument("--isolate-pages", action="store_true",
+                        help="Extract each page in a supervised worker with a time and memory budget, "
+                             "falling back to PyPDF2 and quarantining pages that still fail")
+    parser.add_argument("--extract-workers", type=int, default=1, metavar="N", help="With --isolate-pages, worker processes")
+    parser.add_argument("--page-timeout", type=float, default=30.0, metavar="SECONDS",
+                        help="With --isolate-pages, time budget per page and backend (default: 30)")
+    parser.add_argument("--page-memory-mb", type=int, default=2048, metavar="MB",
+                        help="With --isolate-pages, address-space limit per worker (default: 2048; not on Windows)")
+    parser.add_argument("--quarantine", metavar="PATH", help="Quarantine list (default: INPUT.quarantine.json)")
+    parser.add_argument("--retry-quarantined", action="store_true", help="Try quarantined pages again instead of skipping them")
+
+
+def add_profile_arguments(parser):
+    """Options shared by the splitters for --profile mode."""
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="DIR",
+                        help="Profile each stage: .pstats per stage, stacks.collapsed and profile_summary.json in DIR (default: profile)")
+    parser.add_argument("--profile-top", type=int, default=10, help="Slowest pages and items to list with --profile")
+
+
+def add_two_phase_arguments(parser):
+    """Options shared by the splitters for two-phase extraction."""
+    parser.add_argument("--two-phase", action="store_true",
+                        help="Locate item pages with a cheap pass, then run layout extraction only on those ranges")
+    parser.add_argument("--verify", action="store_true",
+                        help="With --two-phase, also run a full extraction and compare the items")
+
+
+def cmd_serve(args):
+    """Serve items.json over local read-only HTTP."""
+    from serve_items import main
+    main(args.tool_args)
+
+
+def cmd_compact(args):
+    """Write the compact canonical item format with token estimates."""
+    from compact_items import main
+    main(args.tool_args)
+
+
+def cmd_upload(args):
+    """Upload split outputs to the dsm5-data blob container."""
+    from upload_dsm5_blobs import main
+    main(args.tool_args)
+
+
+def cmd_group(args):
+    """Collapse duplicate items and group near-duplicate variants."""
+    from item_groups import main
+    main(args.tool_args)
+
+
+def cmd_autocomplete(args):
+    """Build (and query) the title/code autocomplete index."""
+    from autocomplete_index import main
+    main(args.tool_args)
+
+
+def cmd_slim(args):
+    """Rewrite existing page-range PDFs as text-only copies."""
+    from pdf_slimming import main
+    main(args.tool_args)
+
+
+def cmd_load_test(args):
+    """Load-test the DSM-5 administration endpoints (Functions host or local stand-in)."""
+    from load_test_admin import main
+    main(args.tool_args)
+
+
+def cmd_session(args):
+    """Start a long-lived rule tuning session (REPL or local socket API)."""
+    from tuning_session import main
+    main(args.tool_args)
+
+
+def add_tool_parser(subparsers, name, handler, help_text):
+    """Register a subcommand that forwards its arguments to a script's own parser."""
+    parser = subparsers.add_parser(name, help=help_text, add_help=False)
+    parser.set_defaults(handler=handler, forwards_args=True)
+    return parser
+
+
+def build_parser():
+    """Build the argument parser (no heavy imports)."""
+    parser = argparse.ArgumentParser(
+        prog="dsm5",
+        description="DSM-5 PDF splitting, analysis and loading tools"
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="<command>")
+    subparsers.required = True
+
+    chunk = subparsers.add_parser("chunk", help="Split the PDF into fixed-size page chunks")
+    chunk.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="Input PDF (default: DSM5.pdf)")
+    chunk.add_argument("--pages-per-split", type=int, default=25, help="Pages per output file")
+    chunk.add_argument("--output-dir", default=".", help="Output directory")
+    chunk.set_defaults(handler=cmd_chunk)
+
+    split = subparsers.add_parser("split", help="One page-range PDF per diagnostic item")
+    split.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="Input PDF (default: DSM5.pdf)")
+    split.add_argument("--output-dir", default=".", help="Output directory")
+    split.add_argument("--slim", action="store_true",
+                       help="Rewrite each item PDF as a text-only copy (no images or vector art, compressed streams, "
+                            "shared fonts) and log its size before and after")
+    add_two_phase_arguments(split)
+    add_profile_arguments(split)
+    add_isolation_arguments(split)
+    split.set_defaults(handler=cmd_split)
+
+    single_page = subparsers.add_parser("single-page", help="One condensed single-page PDF per diagnostic item")
+    single_page.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="Input PDF (default: DSM5.pdf)")
+    single_page.add_argument("--output-dir", default="single-pages", help="Output directory")
+    outputs = single_page.add_mutually_exclusive_group()
+    outputs.add_argument("--bundle", metavar="PATH",
+                         help="Write all items into one .zip or .tar bundle (with PATH.index.json) instead of separate files")
+    outputs.add_argument("--combined", metavar="PATH",
+                         help="Write all items into one PDF with an outline and a PATH.pages.json code -> page range index")
+    single_page.add_argument("--batch-pages", type=int, default=50,
+                             help="With --combined, maximum pages per pageRanges batch (default: 50)")
+    single_page.add_argument("--segment-workers", type=int, default=1, metavar="N",
+                             help="Segment contiguous page shards in N processes and stitch them (same items as N=1)")
+    single_page.add_argument("--shared-text", action="store_true",
+                             help="With --segment-workers, share page text through one shared memory buffer instead of pickling it per shard")
+    single_page.add_argument("--keep-running-heads", action="store_true",
+                             help="Do not strip repeated page heads, page numbers and footers before segmentation")
+    add_two_phase_arguments(single_page)
+    add_profile_arguments(single_page)
+    add_isolation_arguments(single_page)
+    single_page.set_defaults(handler=cmd_single_page)
+
+    analyze = subparsers.add_parser("analyze", help="Print codes, criteria and titles found on the first pages")
+    analyze.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="Input PDF (default: DSM5.pdf)")
+    analyze.add_argument("--pages", type=int, default=50, help="Number of pages to scan")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    find = subparsers.add_parser("find", help="Find lines matching a phrase and print their context")
+    find.add_argument("phrase", help="Exact line to search for, e.g. \"Cannabis Withdrawal\"")
+    find.add_argument("--input", default=DEFAULT_INPUT, help="Input PDF (default: DSM5.pdf)")
+    find.add_argument("--context", type=int, default=15, help="Lines to print after each match")
+    find.set_defaults(handler=cmd_find)
+
+    add_tool_parser(subparsers, "index", cmd_index, "Build the code index and related-items graph")
+    add_tool_parser(subparsers, "load-postgres", cmd_load_postgres, "Bulk-load items.json into PostgreSQL")
+    add_tool_parser(subparsers, "serve", cmd_serve, "Serve items.json over local read-only HTTP")
+    add_tool_parser(subparsers, "compact", cmd_compact, "Write compact items.compact.jsonl with token estimates")
+    add_tool_parser(subparsers, "upload", cmd_upload, "Upload PDFs and items to the dsm5-data blob container")
+    add_tool_parser(subparsers, "group", cmd_group, "Collapse duplicate items and group near-duplicate variants")
+    add_tool_parser(subparsers, "autocomplete", cmd_autocomplete, "Build the title/code autocomplete index")
+    add_tool_parser(subparsers, "slim", cmd_slim, "Rewrite page-range PDFs as text-only copies")
+    add_tool_parser(subparsers, "load-test", cmd_load_test, "Load-test the DSM-5 administration endpoints")
+    add_tool_parser(subparsers, "session", cmd_session, "Tune segmentation rules live against cached page text")
+
+    return parser
+
+
+def main(argv=None):
+    """Parse arguments and dispatch to the selected subcommand."""
+    parser = build_parser()
+    args, tool_args = parser.parse_known_args(argv)
+    if tool_args and not getattr(args, 'forwards_args', False):
+        parser.error(f"unrecognized arguments: {' '.join(tool_args)}")
+    args.tool_args = tool_args
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
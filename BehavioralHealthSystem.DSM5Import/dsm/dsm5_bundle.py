@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+DSM5 Item Bundles
+
+Streams rendered items into a single uncompressed zip or tar archive and
+writes a sidecar index (<bundle>.index.json) mapping each diagnostic code to
+its member name, data offset and size. Consumers can read one item with a
+single seek + read on the archive, or stream the whole archive sequentially,
+instead of opening hundreds of small files.
+
+Members are stored uncompressed (PDFs are already compressed), so a member's
+bytes sit contiguously at its recorded offset.
+
+Requirements:
+    (standard library only)
+"""
+
+import json
+import logging
+import struct
+import tarfile
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMATS = ('zip', 'tar')
+
+# Local file header: fixed 30 bytes, then file name and extra field
+ZIP_LOCAL_HEADER_SIZE = 30
+ZIP_LOCAL_HEADER_LENGTHS = struct.Struct('<HH')  # name length, extra length (at offset 26)
+
+
+def bundle_format(path):
+    """Infer the bundle format from the file extension."""
+    return 'tar' if path.lower().endswith('.tar') else 'zip'
+
+
+def index_path(bundle_path):
+    """Path of the sidecar index for a bundle."""
+    return bundle_path + '.index.json'
+
+
+class _ViewReader:
+    """Minimal file-like reader over a memoryview, so tarfile can stream it without a copy."""
+
+    def __init__(self, view):
+        self.view = view
+        self.position = 0
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else min(self.position + size, len(self.view))
+        chunk = self.view[self.position:end]
+        self.position = end
+        return chunk
+
+
+class BundleWriter:
+    """Write rendered items into one zip or tar archive with a code -> offset index."""
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.format = fmt or bundle_format(path)
+        if self.format not in BUNDLE_FORMATS:
+            raise ValueError(f"Unsupported bundle format: {self.format}")
+        self.members = []
+        self._archive = (zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED)
+                         if self.format == 'zip' else tarfile.open(path, 'w'))
+
+    def add(self, name, data, code=None, title=None):
+        """Append one member; data may be bytes or a memoryview."""
+        if self.format == 'zip':
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            self._archive.writestr(info, data)
+            entry = {'name': name, 'header_offset': info.header_offset}
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, _ViewReader(memoryview(data)))
+            # Data is the last block run written, padded to the tar block size
+            padded_size = -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            entry = {'name': name, 'offset': self._archive.offset - padded_size}
+
+        entry.update({'code': code, 'title': title, 'size': len(data)})
+        self.members.append(entry)
+
+    def close(self):
+        """Finish the archive and write the sidecar index; returns the index dict."""
+        self._archive.close()
+
+        if self.format == 'zip':
+            # Data starts after the variable-length local header
+            with open(self.path, 'rb') as f:
+                for entry in self.members:
+                    f.seek(entry['header_offset'] + 26)
+                    name_length, extra_length = ZIP_LOCAL_HEADER_LENGTHS.unpack(f.read(4))
+                    entry['offset'] = entry.pop('header_offset') + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length
+
+        codes = {}
+        for position, entry in enumerate(self.members):
+            if entry['code'] in codes:
+                logger.warning(f"Duplicate code in bundle: {entry['code']} ({entry['name']})")
+                continue
+            codes[entry['code']] = position
+
+        index = {'version': 1, 'format': self.format, 'members': self.members, 'codes': codes}
+        with open(index_path(self.path), 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        return index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._archive.close()
+
+
+def load_bundle_index(bundle_path):
+    """Read a bundle's sidecar index."""
+    with open(index_path(bundle_path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_member(bundle_path, code, index=None):
+    """Read one item's bytes from a bundle by diagnostic code (a single seek + read)."""
+    index = index or load_bundle_index(bundle_path)
+    entry = index['members'][index['codes'][code]]
+    with open(bundle_path, 'rb') as f:
+        f.seek(entry['offset'])
+        return f.read(entry['size'])
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+DSM5 Item Store
+
+Shared helpers for the segmented item store (items.json) written by the
+single-page splitter and read by the loaders and indexers.
+
+Each record holds the item id, title, diagnostic code, 1-based page range and
+the standardized sections, plus a content hash over those fields so that
+downstream stages can detect unchanged items. The Diagnostic Criteria section
+is also stored as a parsed criterion tree (see criteria_parser.py).
+
+Requirements:
+    (standard library only)
+"""
+
+import hashlib
+import json
+import re
+
+from criteria_parser import parse_criteria
+
+# Canonical section names, in DSM-5 order. "Functional Consequences of <title>"
+# is stored under the generic name so every record has the same keys.
+STANDARD_SECTIONS = [
+    'Diagnostic Criteria',
+    'Specifiers',
+    'Diagnostic Features',
+    'Associated Features Supporting Diagnosis',
+    'Prevalence',
+    'Development and Course',
+    'Risk and Prognostic Factors',
+    'Culture-Related Diagnostic Issues',
+    'Gender-Related Diagnostic Issues',
+    'Suicide Risk',
+    'Functional Consequences',
+    'Differential Diagnosis',
+    'Comorbidity'
+]
+
+# "ddd.d (Xdd.d)" pairs, including V codes such as "V62.3 (Z55.9)"
+CODE_PATTERN = re.compile(r'\b(V\d{2}\.\d+|\d{3}\.\d+)\s*\(([A-Z]\d{2}(?:\.[0-9A-Z]+)?)\)')
+
+# ICD-10-CM codes on their own, e.g. "F34.1" or "F88"
+ICD10_PATTERN = re.compile(r'(?<![\w.])([A-Z]\d{2}(?:\.[0-9A-Z]{1,4})?)(?![\w.]|\.\d)')
+
+
+def item_id(title):
+    """Normalized condition id, matching DSM5DataService (lowercase, dashes, no apostrophes)."""
+    return title.strip().lower().replace(' ', '-').replace("'", '')
+
+
+def canonical_section_name(name):
+    """Map a splitter section header onto its canonical store name."""
+    if name.startswith('Functional Consequences'):
+        return 'Functional Consequences'
+    return name
+
+
+def content_hash(record):
+    """SHA-256 over the fields that define an item's content."""
+    payload = {
+        'title': record['title'],
+        'diagnostic_code': record['diagnostic_code'],
+        'page_start': record['page_start'],
+        'page_end': record['page_end'],
+        'sections': record['sections']
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def item_record(item):
+    """Build a store record from a splitter item (0-based pages, raw section dict)."""
+    sections = {}
+    for name, text in (item.get('sections') or {}).items():
+        if text:
+            sections[canonical_section_name(name)] = text
+
+    code_match = CODE_PATTERN.search(item['diagnostic_code'])
+    record = {
+        'id': item_id(item['title']),
+        'title': item['title'],
+        'diagnostic_code': item['diagnostic_code'],
+        'icd9': code_match.group(1) if code_match else '',
+        'icd10': code_match.group(2) if code_match else '',
+        'page_start': item['start_page'] + 1,
+        'page_end': item['end_page'] + 1,
+        'sections': {name: sections[name] for name in STANDARD_SECTIONS if name in sections}
+    }
+    record['content_hash'] = content_hash(record)
+    
+    # Derived data and extraction statistics are not part of the content hash
+    record['criteria_tree'] = parse_criteria(record['sections'].get('Diagnostic Criteria', ''))
+    if 'running_heads_removed' in item:
+        record['running_heads_removed'] = item['running_heads_removed']
+    return record
+
+
+def save_items(records, path):
+    """Write store records to a JSON file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'items': records}, f, indent=2, ensure_ascii=False)
+
+
+def load_items(path):
+    """Read store records from a JSON file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['items'] if isinstance(data, dict) else data
@@ -1,18 +1,39 @@
+"""
+DSM5 Pattern Finder
+
+Prints every line that exactly matches a phrase (default: Cannabis Withdrawal)
+with the surrounding lines, to help locate diagnostic criteria pages.
+
+Usage:
+    python find_pattern.py
+    python dsm5.py find "Cannabis Withdrawal" --input DSM5.pdf
+"""
+
 import pdfplumber
 
-# Find Cannabis Withdrawal diagnostic criteria page
-pdf = pdfplumber.open('DSM5.pdf')
-
-# Search through all pages
-for i, page in enumerate(pdf.pages):
-    text = page.extract_text()
-    if 'Cannabis Withdrawal' in text:
-        lines = text.split('\n')
-        
-        # Find all occurrences of Cannabis Withdrawal
-        for j, line in enumerate(lines):
-            if 'Cannabis Withdrawal' in line and line.strip() == 'Cannabis Withdrawal':
-                print(f'\n=== PAGE {i+1}, Lines {j-2} to {j+15} ===\n')
-                for k, l in enumerate(lines[max(0,j-2):min(len(lines),j+15)], start=max(0,j-2)):
-                    marker = ' <-- Cannabis Withdrawal' if k == j else ''
-                    print(f'{k:3d}: {l}{marker}')
+
+def find_pattern(pdf_path, phrase='Cannabis Withdrawal', lines_before=2, lines_after=15):
+    """Print each exact-line occurrence of phrase with its context."""
+    pdf = pdfplumber.open(pdf_path)
+
+    # Search through all pages
+    for i, page in enumerate(pdf.pages):
+        text = page.extract_text()
+        if text and phrase in text:
+            lines = text.split('\n')
+
+            # Find all occurrences of the phrase
+            for j, line in enumerate(lines):
+                if phrase in line and line.strip() == phrase:
+                    start = max(0, j - lines_before)
+                    end = min(len(lines), j + lines_after)
+                    print(f'\n=== PAGE {i+1}, Lines {j-lines_before} to {j+lines_after} ===\n')
+                    for k, l in enumerate(lines[start:end], start=start):
+                        marker = f' <-- {phrase}' if k == j else ''
+                        print(f'{k:3d}: {l}{marker}')
+
+    pdf.close()
+
+
+if __name__ == "__main__":
+    find_pattern('DSM5.pdf')
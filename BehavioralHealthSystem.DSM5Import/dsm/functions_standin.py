@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+DSM5 Administration API Stand-In
+
+Local stand-in for the read endpoints of DSM5AdministrationFunctions, served
+from the splitter's items.json, so the data path can be load-tested offline
+(load_test_admin.py). Conditions are the rows load_dsm5_postgres.py would
+load; filters and response bodies follow the Functions host and
+PgDSM5DataService (ordinal Contains filters, ordered by name, criteria only
+with includeDetails=true, camelCase indented JSON).
+
+Routes (plus the serve_items.py routes):
+    GET /api/dsm5-admin/conditions?category=&searchTerm=&includeDetails=false
+    GET /api/dsm5-admin/conditions/{conditionId}
+    GET /api/dsm5-admin/data-status
+
+Rendered responses go through the serve_items LRU; --cache-size 0 (the
+default here) renders every request, like the host querying storage.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python functions_standin.py single-pages/items.json --port 7071
+    python load_test_admin.py --standin single-pages/items.json
+"""
+
+import argparse
+import logging
+import os
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, unquote
+
+from load_dsm5_postgres import record_to_row
+from serve_items import DEFAULT_HOST, ItemStore, create_server
+from dsm5_items import load_items
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 7071
+API_PREFIX = ['api', 'dsm5-admin']
+
+
+def parse_bool(value):
+    """bool.Parse: "true"/"false" in any case, anything else is an error."""
+    if value.strip().lower() not in ('true', 'false'):
+        raise ValueError(f"String '{value}' was not recognized as a valid Boolean.")
+    return value.strip().lower() == 'true'
+
+
+class FunctionsStandInStore(ItemStore):
+    """ItemStore that also answers the DSM5AdministrationFunctions read routes."""
+
+    json_indent = 2  # The Functions serialize with WriteIndented
+
+    def __init__(self, records, cache_size=0, data_bytes=0):
+        super().__init__(records, cache_size)
+        loaded_at = datetime.now(timezone.utc)
+        self.conditions = {}
+        for record in records:
+            # First item wins for duplicate ids, matching the loader's upsert order
+            self.conditions.setdefault(record['id'], record_to_row(record, loaded_at))
+        self.ordered = sorted(self.conditions.values(), key=lambda row: row['Name'])
+        self.data_bytes = data_bytes
+
+    @classmethod
+    def from_file(cls, items_path, cache_size=0):
+        records = load_items(items_path)
+        logger.info(f"Loaded {len(records)} items from {items_path}")
+        return cls(records, cache_size, os.path.getsize(items_path))
+
+    def _build(self, path, query=''):
+        parts = [unquote(part) for part in path.split('/') if part]
+        if parts[:2] != API_PREFIX:
+            return super()._build(path, query)
+        route = parts[2:]
+        try:
+            if route == ['conditions']:
+                return self.list_conditions(parse_qs(query))
+            if len(route) == 2 and route[0] == 'conditions':
+                return self.condition_details(route[1])
+            if route == ['data-status']:
+                return self.data_status()
+        except ValueError as e:
+            return 500, {'success': False, 'message': "Error getting DSM-5 conditions", 'error': str(e)}
+        return 404, {'error': f"Unknown route: {path}"}
+
+    def list_conditions(self, params):
+        category = params.get('category', [''])[0]
+        search_term = params.get('searchTerm', [''])[0]
+        include_details = parse_bool(params.get('includeDetails', ['false'])[0])
+
+        conditions = [row for row in self.ordered
+                      if (not category or category in row['Category'])
+                      and (not search_term or search_term in row['Name'] or search_term in row['Description'])]
+        # The service clears criteria before the function counts them unless details are requested
+        payload = {
+            'success': True,
+            'totalConditions': len(conditions),
+            'conditions': [{
+                'id': row['Id'],
+                'name': row['Name'],
+                'code': row['Code'],
+                'category': row['Category'],
+                'description': row['Description'],
+                'criteriaCount': len(row['DiagnosticCriteria']) if include_details else 0,
+                'pageNumbers': row['PageNumbers'],
+                'isAvailableForAssessment': row['IsAvailableForAssessment'],
+                'lastUpdated': row['LastUpdated'],
+                'criteria': row['DiagnosticCriteria'] if include_details else None
+            } for row in conditions]
+        }
+        return 200, payload
+
+    def condition_details(self, condition_id):
+        row = self.conditions.get(condition_id)
+        if row is None:
+            return 404, {'success': False, 'message': f"DSM-5 condition not found: {condition_id}"}
+        payload = {
+            'success': True,
+            'condition': {
+                'id': row['Id'],
+                'name': row['Name'],
+                'code': row['Code'],
+                'category': row['Category'],
+                'description': row['Description'],
+                'diagnosticCriteria': row['DiagnosticCriteria'],
+                'differentialDiagnosis': row['DifferentialDiagnosis'],
+                'prevalence': row['Prevalence'],
+                'developmentAndCourse': row['DevelopmentAndCourse'],
+                'riskAndPrognosticFactors': row['RiskAndPrognosticFactors'],
+                'pageNumbers': row['PageNumbers'],
+                'isAvailableForAssessment': row['IsAvailableForAssessment'],
+                'lastUpdated': row['LastUpdated'],
+                'extractionMetadata': row['ExtractionMetadata']
+            }
+        }
+        return 200, payload
+
+    def data_status(self):
+        rows = self.ordered
+        payload = {
+            'success': True,
+            'dataStatus': {
+                'isInitialized': bool(rows),
+                'totalConditions': len(rows),
+                'availableConditions': sum(1 for row in rows if row['IsAvailableForAssessment']),
+                'categories': sorted({row['Category'] for row in rows}),
+                'lastUpdated': max((row['LastUpdated'] for row in rows), default=None),
+                'dataVersion': "1.0",
+                'storageInfo': {
+                    'containerExists': True,
+                    'totalBlobSize': self.data_bytes,
+                    'blobCount': len(rows)
+                }
+            }
+        }
+        return 200, payload
+
+
+def serve(items_path, host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=0):
+    """Run the stand-in until interrupted (also the target of load_test_admin's server process)."""
+    store = FunctionsStandInStore.from_file(items_path, cache_size)
+    server = create_server(store, host, port)
+    logger.info(f"Serving {len(store.conditions)} conditions on http://{host}:{server.server_port}/api/dsm5-admin")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    """Main function to run the administration API stand-in."""
+    parser = argparse.ArgumentParser(description="Serve the DSM5AdministrationFunctions read routes from items.json")
+    parser.add_argument("items", help="Path to items.json written by the single-page splitter")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port (default: 7071, like func start)")
+    parser.add_argument("--cache-size", type=int, default=0, help="Rendered responses kept in the LRU (default: 0)")
+    args = parser.parse_args(argv)
+    serve(args.items, args.host, args.port, args.cache_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+DSM5 Duplicate and Variant Grouping
+
+The substance-related chapters repeat near-identical items (Cannabis/Alcohol
+Withdrawal, the intoxication variants, ...) and the segmenter sometimes emits
+the same item twice. This stage groups the item store so each shared
+structure is stored, rendered and uploaded once:
+
+    - exact duplicates (same title, code and sections) are collapsed into the
+      first occurrence; the other page ranges are kept as "duplicates"
+    - near-duplicates are found with a MinHash sketch (bottom-k of 64-bit
+      hashes of word 5-shingles) and grouped when their estimated Jaccard
+      similarity reaches the threshold
+    - each group stores one base item in full plus, per variant, only the
+      fields that differ from the base: a changed section is stored as a
+      line-level patch against the base section (or in full when that is
+      shorter), sections the base lacks in full, and the base sections the
+      variant lacks by name; criteria_tree is derived from the sections and
+      is rebuilt rather than stored (unless the store was written by an
+      older parser)
+
+expand_group() rebuilds the full records, and main() checks that every item
+round-trips before writing groups.json. upload_dsm5_blobs.py --groups
+uploads one blob per group instead of one per item.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python item_groups.py single-pages/items.json
+    python item_groups.py single-pages/items.json --threshold 0.7 --output single-pages/groups.json
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import logging
+import os
+import re
+from difflib import SequenceMatcher
+
+from criteria_parser import parse_criteria
+from dsm5_items import STANDARD_SECTIONS, load_items
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SHINGLE_WORDS = 5
+SKETCH_SIZE = 128
+DEFAULT_THRESHOLD = 0.8
+
+
+def exact_key(item):
+    """Fingerprint of what makes two items the same (title, code, sections; not pages)."""
+    payload = json.dumps([item['title'], item['diagnostic_code'], item['sections']], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def drop_exact_duplicates(items):
+    """Keep the first of each set of exact duplicates; works on splitter items and store records."""
+    unique = []
+    seen = {}
+    for item in items:
+        key = exact_key(item)
+        if key in seen:
+            logger.info(f"Collapsed exact duplicate: {item['diagnostic_code']} {item['title']}")
+            continue
+        seen[key] = item
+        unique.append(item)
+    return unique
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Set of word shingles over normalized (lowercase, punctuation-free) text."""
+    words = re.findall(r'\w+', text.lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_sketch(shingle_set, sketch_size=SKETCH_SIZE):
+    """Bottom-k MinHash sketch: the sketch_size smallest 64-bit shingle hashes."""
+    hashes = (int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+              for shingle in shingle_set)
+    return frozenset(heapq.nsmallest(sketch_size, hashes))
+
+
+def estimate_jaccard(sketch_a, sketch_b, sketch_size=SKETCH_SIZE):
+    """Estimate Jaccard similarity from two bottom-k sketches."""
+    if not sketch_a or not sketch_b:
+        return 0.0
+    union_bottom = heapq.nsmallest(sketch_size, sketch_a | sketch_b)
+    shared = sum(1 for value in union_bottom if value in sketch_a and value in sketch_b)
+    return shared / len(union_bottom)
+
+
+def item_text(record):
+    """All section text of an item, for fingerprinting."""
+    return '\n'.join(text for text in record['sections'].values() if text)
+
+
+def line_patch(base_text, text):
+    """Line-level patch turning base_text into text: [[first, last, [lines]], ...] over base lines."""
+    base_lines = base_text.split('\n')
+    lines = text.split('\n')
+    matcher = SequenceMatcher(None, base_lines, lines, autojunk=False)
+    return [[i1, i2, lines[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def apply_patch(base_text, patch):
+    """Apply a line_patch() to base_text."""
+    base_lines = base_text.split('\n')
+    lines = []
+    position = 0
+    for first, last, replacement in patch:
+        lines.extend(base_lines[position:first])
+        lines.extend(replacement)
+        position = last
+    lines.extend(base_lines[position:])
+    return '\n'.join(lines)
+
+
+def patch_chars(patch):
+    return sum(len(line) for _, _, replacement in patch for line in replacement)
+
+
+def variant_delta(base, variant):
+    """Fields and sections of variant that differ from base (see module docstring)."""
+    delta = {key: value for key, value in variant.items()
+             if key not in ('sections', 'criteria_tree') and base.get(key) != value}
+    # criteria_tree is rebuilt on expansion; only a tree from another parser version is stored
+    if 'criteria_tree' in variant and variant['criteria_tree'] != parse_criteria(
+            variant['sections'].get('Diagnostic Criteria', '')):
+        delta['criteria_tree'] = variant['criteria_tree']
+    delta['sections'] = {}
+    delta['patches'] = {}
+    for name, text in variant['sections'].items():
+        base_text = base['sections'].get(name)
+        if base_text == text:
+            continue
+        patch = line_patch(base_text, text) if base_text is not None else None
+        if patch is not None and patch_chars(patch) < len(text):
+            delta['patches'][name] = patch
+        else:
+            delta['sections'][name] = text
+    removed = [name for name in base['sections'] if name not in variant['sections']]
+    if removed:
+        delta['removed_sections'] = removed
+    return delta
+
+
+def expand_variant(base, delta):
+    """Rebuild a full record from a base record and a variant delta."""
+    record = {key: value for key, value in base.items() if key not in ('sections', 'criteria_tree')}
+    record.update({key: value for key, value in delta.items()
+                   if key not in ('sections', 'patches', 'removed_sections', 'criteria_tree')})
+    removed = set(delta.get('removed_sections', []))
+    sections = {name: text for name, text in base['sections'].items() if name not in removed}
+    for name, patch in delta.get('patches', {}).items():
+        sections[name] = apply_patch(base['sections'][name], patch)
+    sections.update(delta['sections'])
+    # Store records keep their sections in STANDARD_SECTIONS order
+    record['sections'] = {name: sections[name] for name in STANDARD_SECTIONS if name in sections}
+    if 'criteria_tree' in delta:
+        record['criteria_tree'] = delta['criteria_tree']
+    elif 'criteria_tree' in base:
+        record['criteria_tree'] = parse_criteria(record['sections'].get('Diagnostic Criteria', ''))
+    return record
+
+
+def expand_group(group):
+    """Full records (base first) for a group."""
+    return [group['base']] + [expand_variant(group['base'], delta) for delta in group['variants']]
+
+
+def group_items(records, threshold=DEFAULT_THRESHOLD):
+    """Group records into {base, variants, duplicates} entries (see module docstring)."""
+    # Exact duplicates first
+    unique = []
+    duplicates = {}
+    first_by_key = {}
+    for record in records:
+        key = exact_key(record)
+        if key in first_by_key:
+            duplicates.setdefault(first_by_key[key], []).append(
+                {'page_start': record['page_start'], 'page_end': record['page_end']})
+            continue
+        first_by_key[key] = len(unique)
+        unique.append(record)
+
+    # Near-duplicates: all pairs of sketches (hundreds of items), joined with union-find
+    sketches = [minhash_sketch(shingles(item_text(record))) for record in unique]
+    parent = list(range(len(unique)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for i in range(len(unique)):
+        for j in range(i + 1, len(unique)):
+            if estimate_jaccard(sketches[i], sketches[j]) >= threshold:
+                parent[find(j)] = find(i)
+
+    components = {}
+    for index in range(len(unique)):
+        components.setdefault(find(index), []).append(index)
+
+    groups = []
+    for members in components.values():
+        # The item with the most text is the base; variants store their differences from it
+        base_index = max(members, key=lambda index: (len(item_text(unique[index])), -index))
+        base = unique[base_index]
+        group = {
+            'base': base,
+            'variants': [variant_delta(base, unique[index]) for index in members if index != base_index]
+        }
+        member_duplicates = [dict(duplicate, id=unique[index]['id'])
+                             for index in members for duplicate in duplicates.get(index, [])]
+        if member_duplicates:
+            group['duplicates'] = member_duplicates
+        groups.append(group)
+
+    groups.sort(key=lambda group: group['base']['page_start'])
+    return groups
+
+
+def section_chars(record_or_delta):
+    """Section text stored in a record or a delta (full sections plus patch lines)."""
+    return (sum(len(text) for text in record_or_delta['sections'].values())
+            + sum(patch_chars(patch) for patch in record_or_delta.get('patches', {}).values()))
+
+
+def main(argv=None):
+    """Main function to group the item store."""
+    parser = argparse.ArgumentParser(prog="dsm5 group", description="Collapse duplicate items and group near-duplicate variants")
+    parser.add_argument("items", help="Path to items.json written by the single-page splitter")
+    parser.add_argument("--output", help="Output path (default: groups.json next to items.json)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Estimated Jaccard similarity for near-duplicates (default: 0.8)")
+    args = parser.parse_args(argv)
+
+    records = load_items(args.items)
+    output_path = args.output or os.path.join(os.path.dirname(os.path.abspath(args.items)), 'groups.json')
+
+    groups = group_items(records, args.threshold)
+
+    # Every unique record must round-trip through base + delta, field for field
+    expected = {}
+    for record in records:
+        expected.setdefault(exact_key(record), record)
+    expanded = [record for group in groups for record in expand_group(group)]
+    mismatches = [record['id'] for record in expanded if expected.get(exact_key(record)) != record]
+    if mismatches or len(expanded) != len(expected):
+        raise ValueError(f"Grouping does not round-trip: {len(expanded)} expanded vs {len(expected)} unique; {mismatches}")
+
+    duplicate_count = sum(len(group.get('duplicates', [])) for group in groups)
+    variant_count = sum(len(group['variants']) for group in groups)
+    chars_before = sum(section_chars(record) for record in records)
+    chars_after = sum(section_chars(group['base']) + sum(section_chars(delta) for delta in group['variants'])
+                      for group in groups)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': 1,
+            'threshold': args.threshold,
+            'stats': {
+                'items': len(records),
+                'exact_duplicates': duplicate_count,
+                'groups': len(groups),
+                'variants': variant_count,
+                'section_chars_before': chars_before,
+                'section_chars_after': chars_after
+            },
+            'groups': groups
+        }, f, indent=2, ensure_ascii=False)
+
+    logger.info(f"{len(records)} items -> {len(groups)} groups ({duplicate_count} exact duplicates collapsed, "
+                f"{variant_count} variants stored as deltas)")
+    logger.info(f"Section text: {chars_before} -> {chars_after} chars "
+                f"({100 * (1 - chars_after / max(chars_before, 1)):.0f}% smaller); wrote {output_path}")
+    for group in groups:
+        if group['variants']:
+            names = ', '.join(f"{delta.get('title', group['base']['title'])} "
+                              f"({len(delta['sections']) + len(delta['patches'])} sections differ)"
+                              for delta in group['variants'])
+            logger.info(f"  {group['base']['title']}: {names}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+DSM5 Latency Statistics
+
+Shared helpers for the benchmarks and load tests (bench_item_server.py,
+bench_autocomplete.py, load_test_admin.py), so they all report percentiles
+the same way.
+
+test_latency_stats.py checks the ranks (python -m unittest test_latency_stats).
+
+Requirements:
+    (standard library only)
+"""
+
+import math
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list: the ceil(fraction * n)-th value."""
+    if not sorted_values:
+        return 0.0
+    # Round first so float noise (0.07 * 100 = 7.000000000000001) does not move the rank up
+    rank = math.ceil(round(fraction * len(sorted_values), 9))
+    return sorted_values[min(len(sorted_values) - 1, max(0, rank - 1))]
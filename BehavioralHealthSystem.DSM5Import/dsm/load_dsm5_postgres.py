@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+DSM5 PostgreSQL Bulk Loader
+
+This script bulk-loads the segmented DSM-5 items (items.json written by
+split_dsm5_single_page.py) into the dsm5_conditions table used when the app
+runs with STORAGE_BACKEND=PostgreSQL.
+
+Items are streamed with COPY into a temporary staging table and then upserted
+into dsm5_conditions in a single transaction. A "ContentHash" column records
+the item's content hash, so reloading the same items only touches rows whose
+content actually changed.
+
+Requirements:
+    pip install psycopg2-binary
+
+Usage:
+    python load_dsm5_postgres.py single-pages/items.json
+    python load_dsm5_postgres.py single-pages/items.json --host localhost --dbname bhs_dev --create-table
+
+Connection settings default to the app's POSTGRES_HOST, POSTGRES_PORT,
+POSTGRES_DATABASE, POSTGRES_USERNAME and POSTGRES_PASSWORD variables.
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+from dsm5_items import STANDARD_SECTIONS, load_items
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TARGET_TABLE = "dsm5_conditions"
+STAGING_TABLE = "dsm5_conditions_staging"
+EXTRACTION_VERSION = "splitter-1.0"
+
+# (column, SQL type) in COPY order; matches the EF Core mapping in BhsDbContext
+COLUMNS = [
+    ('Id', 'text'),
+    ('Name', 'text'),
+    ('Code', 'text'),
+    ('Category', 'text'),
+    ('Description', 'text'),
+    ('DiagnosticCriteria', 'jsonb'),
+    ('DiagnosticFeatures', 'text'),
+    ('AssociatedFeatures', 'text'),
+    ('Prevalence', 'text'),
+    ('DevelopmentAndCourse', 'text'),
+    ('RiskAndPrognosticFactors', 'jsonb'),
+    ('CultureRelatedIssues', 'text'),
+    ('GenderRelatedIssues', 'text'),
+    ('SuicideRisk', 'text'),
+    ('FunctionalConsequences', 'text'),
+    ('DifferentialDiagnosis', 'jsonb'),
+    ('Comorbidity', 'text'),
+    ('Specifiers', 'jsonb'),
+    ('PageNumbers', 'jsonb'),
+    ('PresentSections', 'jsonb'),
+    ('MissingSections', 'jsonb'),
+    ('IsAvailableForAssessment', 'boolean'),
+    ('LastUpdated', 'timestamptz'),
+    ('ExtractionMetadata', 'jsonb'),
+    ('ContentHash', 'text')
+]
+
+# Non-nullable text columns that may legitimately be empty
+NOT_NULL_TEXT_COLUMNS = ['Category', 'Description']
+
+# Store section name -> plain text column
+TEXT_SECTION_COLUMNS = {
+    'Diagnostic Features': 'DiagnosticFeatures',
+    'Associated Features Supporting Diagnosis': 'AssociatedFeatures',
+    'Prevalence': 'Prevalence',
+    'Development and Course': 'DevelopmentAndCourse',
+    'Culture-Related Diagnostic Issues': 'CultureRelatedIssues',
+    'Gender-Related Diagnostic Issues': 'GenderRelatedIssues',
+    'Suicide Risk': 'SuicideRisk',
+    'Functional Consequences': 'FunctionalConsequences',
+    'Comorbidity': 'Comorbidity'
+}
+
+# Labelled paragraphs inside "Risk and Prognostic Factors"
+RISK_FACTOR_LABELS = [
+    ('temperamental', r'Temperamental'),
+    ('environmental', r'Environmental'),
+    ('geneticAndPhysiological', r'Genetic\s+and\s+physiological'),
+    ('courseModifiers', r'Course\s+modifiers')
+]
+
+
+def quote_ident(name):
+    """Quote a PostgreSQL identifier (EF Core creates case-sensitive column names)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def parse_risk_factors(text):
+    """Split the risk section on its DSM-5 labels; unlabelled text is kept as course modifiers."""
+    if not text:
+        return None
+
+    label_pattern = '|'.join(f'(?P<{key}>{pattern})' for key, pattern in RISK_FACTOR_LABELS)
+    matches = list(re.finditer(rf'(?im)^\s*(?:{label_pattern})\s*\.', text))
+    factors = {key: None for key, _ in RISK_FACTOR_LABELS}
+
+    if not matches:
+        factors['courseModifiers'] = text
+        return factors
+
+    for idx, match in enumerate(matches):
+        end = matches[idx + 1].start() if idx + 1 < len(matches) else len(text)
+        factors[match.lastgroup] = text[match.end():end].strip()
+    return factors
+
+
+def criteria_to_json(record):
+    """Map the item's criterion tree onto DSM5DiagnosticCriterion objects."""
+    tree = record.get('criteria_tree')
+    criteria_text = record['sections'].get('Diagnostic Criteria', '')
+    if not tree or not tree['criteria']:
+        # No lettered criteria recognised: keep the section as one criterion
+        return [{
+            'criterionId': '',
+            'title': 'Diagnostic Criteria',
+            'description': criteria_text,
+            'subCriteria': [],
+            'isRequired': True
+        }] if criteria_text else []
+
+    criteria = []
+    for node in tree['criteria']:
+        description = ' '.join([node['text']] + node['notes'])
+        criteria.append({
+            'criterionId': node['id'],
+            'title': f"Criterion {node['id']}",
+            'description': description,
+            'subCriteria': [{
+                'id': f"{node['id']}{symptom['id']}",
+                'name': '',
+                'description': ' '.join([symptom['text']] + symptom['notes']),
+                'examples': [f"{subitem['id']}. {subitem['text']}" for subitem in symptom['subitems']],
+                'isRequired': False
+            } for symptom in node['symptoms']],
+            'isRequired': True
+        })
+    return criteria
+
+
+def record_to_row(record, loaded_at):
+    """Map an item store record onto dsm5_conditions column values."""
+    sections = record['sections']
+    specifiers_text = sections.get('Specifiers', '')
+    differential_text = sections.get('Differential Diagnosis', '')
+    description = sections.get('Diagnostic Features', '').split('\n\n')[0][:500]
+
+    row = {
+        'Id': record['id'],
+        'Name': record['title'],
+        'Code': record['diagnostic_code'],
+        'Category': '',
+        'Description': description,
+        'DiagnosticCriteria': criteria_to_json(record),
+        'RiskAndPrognosticFactors': parse_risk_factors(sections.get('Risk and Prognostic Factors', '')),
+        'DifferentialDiagnosis': [differential_text] if differential_text else [],
+        'Specifiers': [{
+            'type': 'Specifier',
+            'name': 'Specifiers',
+            'description': specifiers_text,
+            'criteria': []
+        }] if specifiers_text else [],
+        'PageNumbers': list(range(record['page_start'], record['page_end'] + 1)),
+        'PresentSections': [name for name in STANDARD_SECTIONS if sections.get(name)],
+        'MissingSections': [name for name in STANDARD_SECTIONS if not sections.get(name)],
+        'IsAvailableForAssessment': True,
+        'LastUpdated': loaded_at.isoformat(),
+        'ExtractionMetadata': {
+            'extractedAt': loaded_at.isoformat(),
+            'sourcePdfUrl': '',
+            'pageRanges': f"{record['page_start']}-{record['page_end']}",
+            'confidenceScore': 1.0,
+            'processingTimeMs': 0,
+            'extractionVersion': EXTRACTION_VERSION,
+            'notes': ['Loaded from splitter item store by load_dsm5_postgres.py']
+        },
+        'ContentHash': record['content_hash']
+    }
+    for section, column in TEXT_SECTION_COLUMNS.items():
+        row[column] = sections.get(section) or None
+    return row
+
+
+def rows_to_csv(rows):
+    """Encode rows as a CSV buffer for COPY (None becomes an empty field, read as NULL)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in rows:
+        values = []
+        for column, sql_type in COLUMNS:
+            value = row[column]
+            if value is None:
+                values.append(None)
+            elif sql_type == 'jsonb':
+                values.append(json.dumps(value, ensure_ascii=False))
+            elif sql_type == 'boolean':
+                values.append('true' if value else 'false')
+            else:
+                values.append(value)
+        writer.writerow(values)
+    buffer.seek(0)
+    return buffer
+
+
+def create_table_sql():
+    """DDL for dsm5_conditions, for local databases that EF Core has not created yet."""
+    columns = ',\n    '.join(
+        f"{quote_ident(name)} {sql_type}" + (' PRIMARY KEY' if name == 'Id' else '')
+        for name, sql_type in COLUMNS
+    )
+    return f"CREATE TABLE IF NOT EXISTS {TARGET_TABLE} (\n    {columns}\n);"
+
+
+def upsert_sql():
+    """INSERT ... ON CONFLICT that only rewrites rows whose content hash changed."""
+    column_list = ', '.join(quote_ident(name) for name, _ in COLUMNS)
+    updates = ',\n        '.join(
+        f"{quote_ident(name)} = EXCLUDED.{quote_ident(name)}"
+        for name, _ in COLUMNS if name != 'Id'
+    )
+    return f"""
+    INSERT INTO {TARGET_TABLE} ({column_list})
+    SELECT {column_list} FROM {STAGING_TABLE}
+    ON CONFLICT ("Id") DO UPDATE SET
+        {updates}
+    WHERE {TARGET_TABLE}."ContentHash" IS DISTINCT FROM EXCLUDED."ContentHash"
+    RETURNING (xmax = 0) AS inserted;
+    """
+
+
+def load_items_to_postgres(records, conn, create_table=False):
+    """COPY records into a staging table and upsert them in one transaction.
+
+    Returns a dict with inserted, updated and unchanged counts.
+    """
+    loaded_at = datetime.now(timezone.utc)
+
+    # The upsert can touch each id only once, so keep the first record per id
+    unique_records = {}
+    for record in records:
+        if record['id'] in unique_records:
+            logger.warning(f"Skipping duplicate item id: {record['id']} [{record['diagnostic_code']}]")
+            continue
+        unique_records[record['id']] = record
+    rows = [record_to_row(record, loaded_at) for record in unique_records.values()]
+    staging_columns = ', '.join(f"{quote_ident(name)} {sql_type}" for name, sql_type in COLUMNS)
+    column_list = ', '.join(quote_ident(name) for name, _ in COLUMNS)
+
+    with conn:
+        with conn.cursor() as cur:
+            if create_table:
+                cur.execute(create_table_sql())
+            cur.execute(
+                "SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = 'ContentHash'",
+                (TARGET_TABLE,)
+            )
+            if cur.fetchone() is None:
+                # The column belongs to the EF Core model; the Functions host adds it at startup
+                raise RuntimeError(f'{TARGET_TABLE} has no "ContentHash" column. Start the Functions host once '
+                                   f'with STORAGE_BACKEND=PostgreSQL to update the schema, or use --create-table '
+                                   f'for a new local database.')
+            cur.execute(f"CREATE TEMP TABLE {STAGING_TABLE} ({staging_columns}) ON COMMIT DROP;")
+
+            # csv writes None and '' identically, so keep '' for the NOT NULL text columns
+            force_not_null = ', '.join(quote_ident(name) for name in NOT_NULL_TEXT_COLUMNS)
+            cur.copy_expert(
+                f"COPY {STAGING_TABLE} ({column_list}) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL ({force_not_null}))",
+                rows_to_csv(rows)
+            )
+            logger.info(f"Copied {len(rows)} items into {STAGING_TABLE}")
+
+            cur.execute(upsert_sql())
+            results = cur.fetchall()
+
+    inserted = sum(1 for (is_insert,) in results if is_insert)
+    updated = len(results) - inserted
+    return {
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': len(rows) - len(results)
+    }
+
+
+def main(argv=None):
+    """Main function to run the PostgreSQL bulk loader."""
+    parser = argparse.ArgumentParser(prog="dsm5 load-postgres", description="Bulk-load DSM-5 items into PostgreSQL")
+    parser.add_argument("items", help="Path to items.json written by the single-page splitter")
+    parser.add_argument("--host", default=os.environ.get("POSTGRES_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("POSTGRES_PORT", "5432")))
+    parser.add_argument("--dbname", default=os.environ.get("POSTGRES_DATABASE", "bhs_dev"))
+    parser.add_argument("--user", default=os.environ.get("POSTGRES_USERNAME", "bhs_admin"))
+    parser.add_argument("--password", default=os.environ.get("POSTGRES_PASSWORD", ""))
+    parser.add_argument("--sslmode", default=os.environ.get("POSTGRES_SSLMODE", "prefer"))
+    parser.add_argument("--create-table", action="store_true",
+                        help="Create dsm5_conditions if it does not exist (local databases)")
+    args = parser.parse_args(argv)
+
+    import psycopg2
+
+    records = load_items(args.items)
+    logger.info(f"Loaded {len(records)} items from {args.items}")
+
+    try:
+        conn = psycopg2.connect(
+            host=args.host,
+            port=args.port,
+            dbname=args.dbname,
+            user=args.user,
+            password=args.password,
+            sslmode=args.sslmode
+        )
+    except psycopg2.OperationalError as e:
+        logger.error(f"Could not connect to PostgreSQL: {e}")
+        sys.exit(1)
+
+    try:
+        counts = load_items_to_postgres(records, conn, create_table=args.create_table)
+    except RuntimeError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    logger.info(f"Inserted: {counts['inserted']}, Updated: {counts['updated']}, Unchanged: {counts['unchanged']}")
+
+
+if __name__ == "__main__":
+    main()
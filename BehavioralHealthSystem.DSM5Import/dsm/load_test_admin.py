@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+DSM5 Administration API Load Test
+
+asyncio load harness for the DSM-5 read path used during assessments:
+
+    list     GET /api/dsm5-admin/conditions (unfiltered, searchTerm or category)
+    detail   GET /api/dsm5-admin/conditions/{conditionId}
+    status   GET /api/dsm5-admin/data-status
+
+Virtual users run a closed loop (request, optional think time, repeat) over
+one pooled aiohttp session. --concurrency users are started evenly over
+--ramp seconds and all run for another --duration seconds; --mix weights the
+endpoints. Condition ids, search terms and categories are discovered from
+the target before the run.
+
+Reported per endpoint and overall, for the steady phase (after the ramp) and
+the whole run: requests, errors, throughput and p50/p95/p99 latency.
+--report writes the summary and a per-second timeline as JSON.
+
+The target is a running Functions host (--url, default func start's
+http://localhost:7071/api; --function-key for deployed apps), or the bundled
+stand-in (--standin items.json, functions_standin.py) started in its own
+process for offline baselines.
+
+Requirements:
+    pip install aiohttp
+
+Usage:
+    python dsm5.py load-test --standin single-pages/items.json --concurrency 32 --ramp 10 --duration 30
+    python dsm5.py load-test --url https://<app>.azurewebsites.net/api --function-key <key> --mix list=2,detail=7,status=1
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import socket
+import statistics
+import time
+import urllib.request
+from urllib.parse import quote
+from collections import namedtuple
+
+from latency_stats import percentile
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = "http://localhost:7071/api"
+DEFAULT_MIX = "list=5,detail=4,status=1"
+ENDPOINTS = ('list', 'detail', 'status')
+MIN_TERM_LENGTH = 4  # Shorter title words make poor search terms
+
+Sample = namedtuple('Sample', 'endpoint started latency_ms status size error')
+
+
+def parse_mix(text):
+    """Parse "list=5,detail=4,status=1" into {endpoint: weight}."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r} (endpoints: {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("the mix needs at least one positive weight")
+    return mix
+
+
+async def fetch_json(session, url):
+    async with session.get(url) as response:
+        response.raise_for_status()
+        return json.loads(await response.read())
+
+
+async def discover(session, base_url):
+    """Condition ids, search terms and categories to draw requests from."""
+    listing = await fetch_json(session, f"{base_url}/dsm5-admin/conditions")
+    status = await fetch_json(session, f"{base_url}/dsm5-admin/data-status")
+    conditions = listing['conditions']
+    terms = sorted({word.strip('(),.') for condition in conditions for word in condition['name'].split()
+                    if len(word.strip('(),.')) >= MIN_TERM_LENGTH})
+    return {
+        'ids': [condition['id'] for condition in conditions],
+        'terms': terms,
+        'categories': [category for category in status['dataStatus']['categories'] if category]
+    }
+
+
+def build_request(endpoint, rng, targets, details_fraction):
+    """(path, query params) for one request of the given endpoint."""
+    if endpoint == 'detail':
+        # Ids keep "/" from titles such as "Substance/Medication-Induced ..."; send it as one path segment
+        return f"/dsm5-admin/conditions/{quote(rng.choice(targets['ids']), safe='')}", {}
+    if endpoint == 'status':
+        return "/dsm5-admin/data-status", {}
+    filters = [{}]
+    if targets['terms']:
+        filters.append({'searchTerm': rng.choice(targets['terms'])})
+    if targets['categories']:
+        filters.append({'category': rng.choice(targets['categories'])})
+    params = dict(rng.choice(filters))
+    if rng.random() < details_fraction:
+        params['includeDetails'] = 'true'
+    return "/dsm5-admin/conditions", params
+
+
+async def virtual_user(session, base_url, args, mix, targets, samples, rng, start_delay, started_at, deadline):
+    """Closed-loop client: send, record, think, repeat until the deadline."""
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(start_delay)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while loop.time() < deadline:
+        endpoint = rng.choices(names, weights)[0]
+        path, params = build_request(endpoint, rng, targets, args.details_fraction)
+        start = time.perf_counter()
+        status, size, error = None, 0, None
+        try:
+            async with session.get(f"{base_url}{path}", params=params) as response:
+                body = await response.read()
+                status, size = response.status, len(body)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = type(e).__name__
+        end = time.perf_counter()
+        samples.append(Sample(endpoint, start - started_at, (end - start) * 1000, status, size, error))
+        if args.think_ms:
+            await asyncio.sleep(args.think_ms / 1000)
+
+
+async def run_load(base_url, args, mix):
+    """Discover targets, then run the ramp and steady phases; returns (samples, elapsed seconds, targets)."""
+    import aiohttp
+
+    headers = {'x-functions-key': args.function_key} if args.function_key else {}
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+        try:
+            targets = await discover(session, base_url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RuntimeError(f"Could not read conditions from {base_url}: {type(e).__name__}: {e}") from e
+        if not targets['ids'] and 'detail' in mix:
+            raise RuntimeError("The target has no conditions; detail requests need at least one")
+        logger.info(f"Discovered {len(targets['ids'])} conditions, {len(targets['terms'])} search terms, "
+                    f"{len(targets['categories'])} categories")
+
+        samples = []
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        deadline = loop.time() + args.ramp + args.duration
+        users = [
+            virtual_user(session, base_url, args, mix, targets, samples, random.Random(args.seed + index),
+                         args.ramp * index / args.concurrency, started_at, deadline)
+            for index in range(args.concurrency)
+        ]
+        await asyncio.gather(*users)
+        return samples, time.perf_counter() - started_at, targets
+
+
+def summarize(samples, seconds):
+    """Requests, errors, throughput and latency percentiles of a set of samples."""
+    latencies = sorted(sample.latency_ms for sample in samples)
+    errors = sum(1 for sample in samples if sample.error or sample.status >= 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput': len(samples) / seconds if seconds > 0 else 0.0,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'mean_ms': statistics.fmean(latencies) if latencies else 0.0,
+        'max_ms': latencies[-1] if latencies else 0.0,
+        'mean_bytes': statistics.fmean(sample.size for sample in samples) if samples else 0.0
+    }
+
+
+def build_report(samples, elapsed, ramp):
+    """Summaries per phase and endpoint, plus a per-second timeline."""
+    phases = {
+        'steady': ([sample for sample in samples if sample.started >= ramp], elapsed - ramp),
+        'overall': (samples, elapsed)
+    }
+    report = {}
+    for phase, (phase_samples, seconds) in phases.items():
+        report[phase] = {'all': summarize(phase_samples, seconds)}
+        for endpoint in ENDPOINTS:
+            endpoint_samples = [sample for sample in phase_samples if sample.endpoint == endpoint]
+            if endpoint_samples:
+                report[phase][endpoint] = summarize(endpoint_samples, seconds)
+
+    timeline = {}
+    for sample in samples:
+        timeline.setdefault(int(sample.started), []).append(sample)
+    report['timeline'] = [{'second': second, **summarize(bucket, 1.0)} for second, bucket in sorted(timeline.items())]
+    report['statuses'] = {}
+    for sample in samples:
+        key = sample.error or str(sample.status)
+        report['statuses'][key] = report['statuses'].get(key, 0) + 1
+    return report
+
+
+def print_report(report):
+    for phase in ('steady', 'overall'):
+        print(f"\n{phase}:")
+        print(f"  {'endpoint':<8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9} {'max ms':>9}")
+        for endpoint, stats in report[phase].items():
+            print(f"  {endpoint:<8} {stats['requests']:9d} {stats['errors']:7d} {stats['throughput']:9.1f} "
+                  f"{stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f} {stats['max_ms']:9.2f}")
+    print(f"\nstatuses: {dict(sorted(report['statuses'].items()))}")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_standin(items_path, cache_size):
+    """Start functions_standin.py in its own process; returns (process, base URL)."""
+    from functions_standin import serve
+
+    port = free_port()
+    process = multiprocessing.Process(target=serve, args=(items_path, '127.0.0.1', port, cache_size), daemon=True)
+    process.start()
+    base_url = f"http://127.0.0.1:{port}/api"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            with urllib.request.urlopen(f"{base_url}/dsm5-admin/data-status", timeout=1):
+                return process, base_url
+        except OSError:
+            if not process.is_alive() or time.monotonic() > deadline:
+                process.terminate()
+                raise RuntimeError(f"The stand-in server did not start (exit code {process.exitcode})")
+            time.sleep(0.1)
+
+
+def main(argv=None):
+    """Main function to load-test the DSM-5 administration endpoints."""
+    parser = argparse.ArgumentParser(prog="dsm5 load-test", description="Load-test the DSM-5 administration endpoints")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default=DEFAULT_URL, help=f"Functions API base URL (default: {DEFAULT_URL})")
+    target.add_argument("--standin", metavar="ITEMS", help="Start the bundled stand-in server over this items.json instead")
+    parser.add_argument("--standin-cache-size", type=int, default=0, help="Stand-in LRU size (default: 0, no response cache)")
+    parser.add_argument("--function-key", help="x-functions-key header for a deployed Functions app")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users at full load (default: 16)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which users are started (default: 5)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds at full load after the ramp (default: 20)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Endpoint weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--details-fraction", type=float, default=0.0,
+                        help="Share of list requests with includeDetails=true (default: 0)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause per user between requests (default: 0)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds (default: 30)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the request sequence")
+    parser.add_argument("--report", metavar="PATH", help="Write the summary and per-second timeline as JSON")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    process = None
+    base_url = args.url.rstrip('/')
+    if args.standin:
+        process, base_url = start_standin(args.standin, args.standin_cache_size)
+    try:
+        mix = ', '.join(f"{name}={weight:g}" for name, weight in args.mix.items())
+        logger.info(f"Target {base_url}: {args.concurrency} users, {args.ramp:g}s ramp, {args.duration:g}s steady, mix {mix}")
+        samples, elapsed, _ = asyncio.run(run_load(base_url, args, args.mix))
+    except RuntimeError as e:
+        logger.error(str(e))
+        return
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+
+    report = build_report(samples, elapsed, args.ramp)
+    print_report(report)
+    if args.report:
+        report['config'] = {
+            'url': base_url, 'standin': bool(args.standin), 'concurrency': args.concurrency, 'ramp': args.ramp,
+            'duration': args.duration, 'mix': args.mix, 'details_fraction': args.details_fraction,
+            'think_ms': args.think_ms
+        }
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Wrote report to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
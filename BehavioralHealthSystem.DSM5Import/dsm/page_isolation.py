@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+DSM5 Isolated Page Extraction
+
+One pathological page (heavy vector art, broken fonts) can keep pdfplumber's
+extract_text() busy for minutes and stall a full-book run. With
+IsolatedPageExtractor every page is extracted in a supervised worker process
+under a time and memory budget:
+
+    - pages are handed to long-lived worker processes (one PDF open per
+      worker); a page that runs past --page-timeout gets its worker killed
+      and replaced. A worker reports ready once the PDF is open and its
+      page tree parsed, and only then gets pages, so the page clock never
+      includes a (replacement) worker's cold start
+    - a page that times out is retried once on a warm worker before it
+      counts as failed, so one slow start cannot quarantine a healthy page
+    - workers run under an address-space limit (--page-memory-mb, where the
+      platform supports resource.RLIMIT_AS), so a runaway page fails with
+      MemoryError instead of exhausting the machine
+    - a page that fails, times out or runs out of memory with pdfplumber is
+      retried with PyPDF2's cheaper text extraction under the same budget
+    - outcomes are kept in a persistent quarantine list (<pdf>.quarantine.json
+      by default, tied to the PDF's SHA-256):
+          degraded     pdfplumber failed, PyPDF2 worked -> later runs go straight to PyPDF2
+          quarantined  both failed                      -> later runs skip the page
+                                                           (--retry-quarantined tries again)
+
+Requirements:
+    pip install pdfplumber PyPDF2
+
+Usage:
+    python dsm5.py single-page DSM5.pdf --isolate-pages --page-timeout 20 --extract-workers 4
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from multiprocessing.connection import wait
+
+from pdf_source import PdfSource
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_TIMEOUT = 30.0   # Seconds per page (per backend attempt)
+DEFAULT_MEMORY_MB = 2048      # Address-space limit per worker process
+STARTUP_TIMEOUT = 120.0       # Seconds for a worker to open the PDF and report ready
+TIMEOUT_RETRIES = 1           # Extra attempts on a warm worker after a timeout, per backend
+
+PRIMARY_BACKEND = 'pdfplumber'
+FALLBACK_BACKEND = 'pypdf2'
+
+READY = 'ready'  # First message from a worker
+
+
+def limit_memory(memory_mb):
+    """Cap this process's address space; returns False where the platform cannot."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return False
+    limit = memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        return False
+    return True
+
+
+def worker_main(pdf_path, memory_mb, conn):
+    """Worker loop: send READY once warm, then receive (page_num, backend), send (page_num, status, text or error)."""
+    if memory_mb:
+        limit_memory(memory_mb)
+    source = PdfSource(pdf_path)
+    try:
+        # Open both backends and parse the page tree before any page is timed
+        len(source.plumber.pages)
+        len(source.reader.pages)
+        conn.send(READY)
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            page_num, backend = task
+            try:
+                if backend == PRIMARY_BACKEND:
+                    page = source.plumber.pages[page_num]
+                    text = page.extract_text()
+                    page.flush_cache()
+                else:
+                    text = source.reader.pages[page_num].extract_text()
+                conn.send((page_num, 'ok', text or ''))
+            except MemoryError:
+                # The heap may be in a bad state; report and let the supervisor replace this worker
+                conn.send((page_num, 'memory', 'MemoryError'))
+                break
+            except Exception as e:
+                conn.send((page_num, 'error', f"{type(e).__name__}: {e}"))
+    finally:
+        source.close()
+
+
+class PageWorker:
+    """One supervised worker process and the task it is running."""
+
+    def __init__(self, context, pdf_path, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(pdf_path, memory_mb, child_conn), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.spawned = time.monotonic()
+        self.ready = False
+        self.task = None
+        self.started = None
+
+    def send(self, task):
+        self.task = task
+        self.started = time.monotonic()
+        self.conn.send(task)
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Quarantine:
+    """Persistent per-PDF list of degraded and quarantined pages."""
+
+    def __init__(self, path, pdf_path):
+        self.path = path
+        self.pdf_sha256 = file_sha256(pdf_path)
+        self.pages = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('pdf_sha256') == self.pdf_sha256:
+                self.pages = {int(page): entry for page, entry in data.get('pages', {}).items()}
+            else:
+                logger.warning(f"Quarantine list {path} belongs to a different PDF; starting a new one")
+
+    def status(self, page_num):
+        entry = self.pages.get(page_num)
+        return entry['status'] if entry else None
+
+    def mark(self, page_num, status, failures):
+        # Keep the history from earlier runs (a degraded page that later fails outright)
+        previous = self.pages.get(page_num, {}).get('failures', [])
+        self.pages[page_num] = {
+            'status': status,
+            'failures': previous + failures,
+            'recorded_at': datetime.now(timezone.utc).isoformat()
+        }
+
+    def clear(self, page_num):
+        self.pages.pop(page_num, None)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': 1,
+                'pdf_sha256': self.pdf_sha256,
+                'pages': {str(page): entry for page, entry in sorted(self.pages.items())}
+            }, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class IsolatedPageExtractor:
+    """Extract page text in supervised worker processes with timeouts, memory caps and fallback."""
+
+    def __init__(self, pdf_path, workers=1, page_timeout=DEFAULT_PAGE_TIMEOUT, memory_mb=DEFAULT_MEMORY_MB,
+                 quarantine_path=None, retry_quarantined=False):
+        self.pdf_path = pdf_path
+        self.workers = max(1, workers)
+        self.page_timeout = page_timeout
+        self.memory_mb = memory_mb
+        self.quarantine_path = quarantine_path or f"{pdf_path}.quarantine.json"
+        self.retry_quarantined = retry_quarantined
+
+    def extract(self, page_numbers):
+        """Return text_pages ({'page_num', 'text', 'backend'}, in page order) for the given 0-based pages."""
+        quarantine = Quarantine(self.quarantine_path, self.pdf_path)
+        queue = deque()
+        skipped = 0
+        for page_num in page_numbers:
+            status = quarantine.status(page_num)
+            if status == 'quarantined' and not self.retry_quarantined:
+                skipped += 1
+            elif status == 'degraded':
+                queue.append((page_num, FALLBACK_BACKEND))
+            else:
+                queue.append((page_num, PRIMARY_BACKEND))
+        if skipped:
+            logger.warning(f"Skipping {skipped} quarantined pages listed in {self.quarantine_path}")
+
+        if self.memory_mb and os.name == 'nt':
+            logger.warning("Per-page memory limits are not supported on this platform; only timeouts apply")
+
+        results = {}
+        failures = {}
+        timeouts = {}
+        counts = {'timeout': 0, 'memory': 0, 'error': 0, 'crashed': 0, 'degraded': 0, 'quarantined': 0, 'retried': 0}
+        context = multiprocessing.get_context()
+        pool = [PageWorker(context, self.pdf_path, self.memory_mb) for _ in range(min(self.workers, len(queue) or 1))]
+
+        def handle(page_num, backend, status, payload):
+            if status == 'ok':
+                results[page_num] = (payload, backend)
+                if backend == FALLBACK_BACKEND and failures.get(page_num):
+                    quarantine.mark(page_num, 'degraded', failures[page_num])
+                    counts['degraded'] += 1
+                elif backend == PRIMARY_BACKEND:
+                    quarantine.clear(page_num)
+                return
+            failures.setdefault(page_num, []).append({'backend': backend, 'reason': status, 'detail': payload})
+            if status == 'timeout':
+                timeouts[page_num, backend] = timeouts.get((page_num, backend), 0) + 1
+                if timeouts[page_num, backend] <= TIMEOUT_RETRIES:
+                    counts['retried'] += 1
+                    logger.warning(f"Page {page_num + 1}: {backend} timeout ({payload}); retrying on a warm worker")
+                    queue.appendleft((page_num, backend))
+                    return
+            counts[status] += 1
+            logger.warning(f"Page {page_num + 1}: {backend} {status} ({payload})")
+            if backend == PRIMARY_BACKEND:
+                queue.append((page_num, FALLBACK_BACKEND))
+            else:
+                quarantine.mark(page_num, 'quarantined', failures[page_num])
+                counts['quarantined'] += 1
+
+        try:
+            while queue or any(worker.task for worker in pool):
+                for worker in pool:
+                    if worker.ready and worker.task is None and queue:
+                        worker.send(queue.popleft())
+
+                # Busy workers run against the page timeout, starting ones against the startup timeout
+                watched = [worker for worker in pool if worker.task is not None or not worker.ready]
+                next_deadline = min(worker.started + self.page_timeout if worker.ready
+                                    else worker.spawned + STARTUP_TIMEOUT for worker in watched)
+                ready = wait([worker.conn for worker in watched], timeout=max(0.0, next_deadline - time.monotonic()))
+
+                for index, worker in enumerate(pool):
+                    if not worker.ready:
+                        if worker.conn in ready:
+                            try:
+                                worker.conn.recv()
+                            except EOFError:
+                                raise RuntimeError(f"Page worker exited with code {worker.process.exitcode} "
+                                                   f"while opening {self.pdf_path}")
+                            worker.ready = True
+                        elif time.monotonic() - worker.spawned >= STARTUP_TIMEOUT:
+                            raise RuntimeError(f"Page worker did not open {self.pdf_path} within {STARTUP_TIMEOUT:g}s")
+                        continue
+                    if worker.task is None:
+                        continue
+                    page_num, backend = worker.task
+                    if worker.conn in ready:
+                        try:
+                            _, status, payload = worker.conn.recv()
+                        except EOFError:
+                            status, payload = 'crashed', f"worker exited with code {worker.process.exitcode}"
+                        worker.task = None
+                        handle(page_num, backend, status, payload)
+                        if status in ('memory', 'crashed'):
+                            worker.kill()
+                            pool[index] = PageWorker(context, self.pdf_path, self.memory_mb)
+                    elif time.monotonic() - worker.started >= self.page_timeout:
+                        worker.kill()
+                        pool[index] = PageWorker(context, self.pdf_path, self.memory_mb)
+                        handle(page_num, backend, 'timeout', f"exceeded {self.page_timeout:g}s")
+        finally:
+            for worker in pool:
+                if worker.task is None:
+                    worker.stop()
+                else:
+                    worker.kill()
+            quarantine.save()
+
+        logger.info(f"Extracted {len(results)} pages in isolated workers: {counts['retried']} timeouts retried, "
+                    f"{counts['timeout']} timeouts, "
+                    f"{counts['memory']} out-of-memory, {counts['error'] + counts['crashed']} errors; "
+                    f"{counts['degraded']} recovered with PyPDF2, {counts['quarantined']} quarantined")
+
+        return [
+            {'page_num': page_num, 'text': text, 'backend': backend}
+            for page_num, (text, backend) in sorted(results.items())
+            if text
+        ]
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+DSM5 Text-Only PDF Slimming
+
+create_diagnostic_pdfs copies book pages verbatim: images, decorative vector
+art and every embedded font come along, and the importer base64-encodes the
+whole file for Document Intelligence. Only the text layer matters there, so
+slim_pdf() rewrites a page-range PDF as a text-only copy:
+
+    - image XObjects and inline images are removed, together with their
+      resource entries
+    - non-text drawing operators are removed: path construction and painting
+      (m l c v y h re, S s f F f* B B* b b* n), clipping (W W*) and shading
+      fills (sh); text objects, graphics state and colors are kept so text
+      keeps its position and appearance
+    - content streams are Flate-compressed
+    - fonts whose dictionaries and font programs are byte-identical are
+      deduplicated so each is embedded once
+    - link annotations, thumbnails and page metadata are dropped (their
+      targets are pages outside the range)
+
+Form XObjects are kept as they are, since they may carry text.
+
+The per-file size before and after is logged and returned, so the saving in
+upload bytes is visible for every item.
+
+Requirements:
+    pip install PyPDF2
+
+Usage:
+    python dsm5.py split DSM5.pdf --output-dir diagnostic-items --slim
+    python pdf_slimming.py diagnostic-items --report slim_report.json
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, ContentStream, DictionaryObject, IndirectObject, NameObject, StreamObject
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Path construction, path painting, clipping and shading operators
+DRAWING_OPERATORS = {
+    b'm', b'l', b'c', b'v', b'y', b'h', b're',
+    b'S', b's', b'f', b'F', b'f*', b'B', b'B*', b'b', b'b*', b'n',
+    b'W', b'W*', b'sh'
+}
+INLINE_IMAGE = b'INLINE IMAGE'
+
+# Page keys that only matter in the full book
+DROPPED_PAGE_KEYS = {'/Annots', '/Thumb', '/Metadata', '/PieceInfo', '/B'}
+
+
+def format_size(size):
+    """Human-readable byte count."""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def object_digest(obj, memo):
+    """Content hash of a PDF object graph (dictionaries, arrays, streams), following references."""
+    if isinstance(obj, IndirectObject):
+        if obj.idnum not in memo:
+            memo[obj.idnum] = b'cycle'  # Guards self-references while the object is hashed
+            memo[obj.idnum] = object_digest(obj.get_object(), memo)
+        return memo[obj.idnum]
+    digest = hashlib.sha256()
+    if isinstance(obj, DictionaryObject):
+        digest.update(b'dict')
+        for key in sorted(obj.keys()):
+            digest.update(key.encode('utf-8'))
+            digest.update(object_digest(obj.raw_get(key), memo))
+        if isinstance(obj, StreamObject):
+            digest.update(b'stream')
+            digest.update(obj.get_data())
+    elif isinstance(obj, ArrayObject):
+        digest.update(b'array')
+        for value in obj:
+            digest.update(object_digest(value, memo))
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+    return digest.digest()
+
+
+def filter_operations(operations, xobjects, stats):
+    """Keep text, state and color operators; drop images and non-text drawing."""
+    kept = []
+    used_xobjects = set()
+    used_names = set()
+    for operands, operator in operations:
+        if operator == INLINE_IMAGE:
+            stats['images_removed'] += 1
+            continue
+        if operator in DRAWING_OPERATORS:
+            stats['drawing_ops_removed'] += 1
+            continue
+        if operator == b'Do':
+            name = operands[0]
+            xobject = xobjects.get(name)
+            if xobject is None or xobject.get_object().get('/Subtype') == '/Image':
+                stats['images_removed'] += 1
+                continue
+            used_xobjects.add(name)
+        for operand in operands:
+            if isinstance(operand, NameObject):
+                used_names.add(operand)
+        kept.append((operands, operator))
+    return kept, used_xobjects, used_names
+
+
+def slim_resources(resources, used_xobjects, used_names, fonts, memo, stats):
+    """Copy of a page's resources without images and shadings, with identical fonts shared."""
+    slim = DictionaryObject()
+    for key, value in resources.items():
+        if key == '/Shading':
+            continue
+        if key == '/XObject':
+            value = DictionaryObject({name: ref for name, ref in value.get_object().items() if name in used_xobjects})
+            if not value:
+                continue
+        elif key == '/Pattern':
+            value = DictionaryObject({name: ref for name, ref in value.get_object().items() if name in used_names})
+            if not value:
+                continue
+        elif key == '/Font':
+            shared = DictionaryObject()
+            for name in value.get_object().keys():
+                ref = value.get_object().raw_get(name)
+                canonical = fonts.setdefault(object_digest(ref, memo), ref)
+                if isinstance(ref, IndirectObject) and canonical is not ref and canonical.idnum != ref.idnum:
+                    stats['fonts_deduplicated'] += 1
+                shared[NameObject(name)] = canonical
+            value = shared
+        slim[NameObject(key)] = value
+    return slim
+
+
+def slim_pdf(input_path, output_path=None):
+    """Write a text-only copy of input_path (in place by default); returns a size and removal report."""
+    output_path = output_path or input_path
+    bytes_before = os.path.getsize(input_path)
+    stats = Counter()
+    fonts = {}
+    memo = {}
+
+    reader = PdfReader(input_path)
+    writer = PdfWriter()
+    for page in reader.pages:
+        slim_page = PageObject(reader)
+        for key, value in page.items():
+            if key not in DROPPED_PAGE_KEYS:
+                slim_page[NameObject(key)] = value
+
+        resources = page.get('/Resources')
+        resources = resources.get_object() if resources is not None else DictionaryObject()
+        xobjects = resources.get('/XObject')
+        xobjects = xobjects.get_object() if xobjects is not None else {}
+
+        contents = page.get_contents()
+        used_xobjects, used_names = set(), set()
+        if contents is not None:
+            content = contents if isinstance(contents, ContentStream) else ContentStream(contents, reader)
+            content.operations, used_xobjects, used_names = filter_operations(content.operations, xobjects, stats)
+            slim_page[NameObject('/Contents')] = content.flate_encode()
+        slim_page[NameObject('/Resources')] = slim_resources(resources, used_xobjects, used_names, fonts, memo, stats)
+        writer.add_page(slim_page)
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        writer.write(f)
+    os.replace(tmp_path, output_path)
+
+    return {
+        'file': os.path.basename(output_path),
+        'pages': len(reader.pages),
+        'bytes_before': bytes_before,
+        'bytes_after': os.path.getsize(output_path),
+        'images_removed': stats['images_removed'],
+        'drawing_ops_removed': stats['drawing_ops_removed'],
+        'fonts_deduplicated': stats['fonts_deduplicated']
+    }
+
+
+def slim_pdfs(paths, output_dir=None):
+    """Slim each PDF (in place, or into output_dir) and log the per-file and total sizes."""
+    reports = []
+    # Items with the same code and title share a file name; slim each file once
+    for path in dict.fromkeys(paths):
+        output_path = os.path.join(output_dir, os.path.basename(path)) if output_dir else None
+        try:
+            report = slim_pdf(path, output_path)
+        except Exception as e:
+            logger.error(f"Error slimming {path}: {str(e)}")
+            continue
+        reports.append(report)
+        saved = 1 - report['bytes_after'] / report['bytes_before'] if report['bytes_before'] else 0.0
+        logger.info(f"Slimmed {report['file']}: {format_size(report['bytes_before'])} -> "
+                    f"{format_size(report['bytes_after'])} ({saved:.0%} smaller; {report['images_removed']} images, "
+                    f"{report['drawing_ops_removed']} drawing operators, {report['fonts_deduplicated']} duplicate fonts removed)")
+
+    before = sum(report['bytes_before'] for report in reports)
+    after = sum(report['bytes_after'] for report in reports)
+    if before:
+        logger.info(f"Slimmed {len(reports)} PDFs: {format_size(before)} -> {format_size(after)} "
+                    f"({1 - after / before:.0%} smaller)")
+    return reports
+
+
+def main(argv=None):
+    """Main function to slim page-range PDFs to their text layer."""
+    parser = argparse.ArgumentParser(prog="dsm5 slim", description="Rewrite page-range PDFs as text-only copies")
+    parser.add_argument("paths", nargs="+", help="PDF files, or directories of PDFs")
+    parser.add_argument("--output-dir", help="Write slimmed copies here instead of replacing the inputs")
+    parser.add_argument("--report", metavar="PATH", help="Write the per-file size report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.paths:
+        paths.extend(sorted(glob.glob(os.path.join(path, '*.pdf'))) if os.path.isdir(path) else [path])
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    reports = slim_pdfs(paths, args.output_dir)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+        logger.info(f"Wrote size report to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
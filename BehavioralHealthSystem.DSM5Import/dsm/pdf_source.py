@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+DSM5 Shared PDF Source
+
+Memory-maps the input PDF once and hands pdfplumber and PyPDF2 file-like
+streams over the same read-only mapping. Previously the splitters opened the
+book twice (pdfplumber for text, PdfReader for page copies), and PdfReader
+read the whole file into a private BytesIO; now both parsers read from the
+shared mapping and each parsed document is created once per source and
+reused by every stage (locator pass, extraction, verification, page copies).
+
+A PdfSource pickles as its path, so worker processes re-attach to the file
+with their own read-only mapping of the same OS page cache instead of
+receiving a copy of the bytes.
+
+Requirements:
+    pip install pdfplumber PyPDF2
+"""
+
+import io
+import logging
+import mmap
+
+logger = logging.getLogger(__name__)
+
+
+class MappedStream(io.RawIOBase):
+    """Seekable binary stream over a memoryview, with its own read position."""
+
+    def __init__(self, view):
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def readinto(self, buffer):
+        end = min(self._position + len(buffer), len(self._view))
+        size = max(end - self._position, 0)
+        buffer[:size] = self._view[self._position:end]
+        self._position += size
+        return size
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._position + size, len(self._view))
+        data = self._view[self._position:end].tobytes()
+        self._position = max(end, self._position)
+        return data
+
+    @property
+    def mode(self):
+        # PyPDF2 warns about streams without a binary mode
+        return 'rb'
+
+
+class PdfSource:
+    """One memory-mapped PDF shared by pdfplumber and PyPDF2 across pipeline stages."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self._map)
+        self._plumber = None
+        self._reader = None
+
+    def stream(self):
+        """A new independent stream over the shared mapping (no copy of the file)."""
+        return MappedStream(self.view)
+
+    @property
+    def plumber(self):
+        """The pdfplumber document, opened once per source."""
+        if self._plumber is None:
+            import pdfplumber
+            self._plumber = pdfplumber.open(self.stream())
+        return self._plumber
+
+    @property
+    def reader(self):
+        """The PyPDF2 reader, parsed once per source."""
+        if self._reader is None:
+            from PyPDF2 import PdfReader
+            self._reader = PdfReader(self.stream())
+        return self._reader
+
+    @property
+    def size(self):
+        return len(self.view)
+
+    def close(self):
+        """Release the parsed documents and the mapping."""
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+        self._reader = None
+        if self._map is not None:
+            self.view.release()
+            try:
+                self._map.close()
+            except BufferError:
+                # A parser still holds a slice of the view; the mapping closes when it is collected
+                logger.debug(f"Mapping for {self.path} still in use; leaving it to the garbage collector")
+            self._map = None
+            self._file.close()
+
+    def __reduce__(self):
+        # Workers attach to the same file with their own mapping
+        return (PdfSource, (self.path,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
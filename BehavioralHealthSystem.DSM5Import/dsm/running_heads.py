@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+DSM5 Running Head Stripper
+
+Every DSM-5 page carries running heads, page numbers and chapter footers.
+Left in the extracted text they get glued into each item's full_text,
+confuse the title lookback and inflate downstream token counts.
+
+DSM running heads change per chapter and per disorder ("56 Neurodevelopmental
+Disorders" on even pages, "Autism Spectrum Disorder 57" on odd pages), so
+each one only appears on a few pages. detect_running_lines() therefore
+decides locally, for each page, which of its first and last few lines are
+running lines. Only a line that carries a page number token (a standalone
+number at its start or end) is a candidate:
+
+    1. Within WINDOW_PAGES pages either side, lines are compared without
+       their page number token and with digits normalized, so "56
+       Neurodevelopmental Disorders" and "Neurodevelopmental Disorders 57"
+       match; a line at the page edge on at least MIN_REPEATS of those pages
+       (or a bare page number) is a running head pattern, and its number
+       minus the PDF page index is a page offset.
+    2. An offset shown by at least MIN_OFFSET_PAGES neighbouring pages gives
+       this page's printed number. A candidate whose token is that number is
+       a running line, even if it appears only once (a disorder's head on a
+       one-page disorder); a repeated line whose number does not follow the
+       page ("Criterion 2" at the foot of several pages) is not.
+
+Section headers, criterion lines and code lines are never running lines.
+strip_running_lines() removes running lines before segmentation and records
+where each removed line sat on its page so removal_by_item() can report the
+lines and bytes removed inside each item's own text.
+
+Requirements:
+    (standard library only)
+"""
+
+import logging
+import re
+from collections import Counter
+
+from dsm5_items import STANDARD_SECTIONS
+
+logger = logging.getLogger(__name__)
+
+EDGE_LINES = 2        # Lines inspected at the top and at the bottom of each page
+WINDOW_PAGES = 4      # Neighbouring pages (either side) searched for the same running line
+MIN_REPEATS = 3       # Pages in the window a digit-normalized line must sit at the edge of
+MIN_OFFSET_PAGES = 2  # Neighbouring pages that must show the same page number offset
+
+# Lines the segmenter depends on (section headers, criteria lines, criterion
+# and symptom lines, codes) are never running lines
+PROTECTED_PATTERN = re.compile(
+    r'^\s*(?:Diagnostic\s+Criteria|(?:[A-Z]|\d{1,2})\.\s|'
+    + '|'.join(re.escape(section).replace(r'\ ', r'\s+') + (r'\b' if section == 'Functional Consequences' else r'\s*$')
+               for section in STANDARD_SECTIONS)
+    + r')|\b\d{3}\.\d+\s*\([A-Z]\d+',
+    re.IGNORECASE
+)
+
+# A standalone number at the start or the end of a line
+PAGE_NUMBER_PATTERN = re.compile(r'^(\d{1,4})(?:\s|$)|\s(\d{1,4})$')
+
+
+def normalize_line(line):
+    """Normalize a line for frequency counting: digits -> '#', collapsed whitespace, lowercase."""
+    return re.sub(r'\s+', ' ', re.sub(r'\d+', '#', line.strip())).lower()
+
+
+def page_number_tokens(line):
+    """Standalone numbers at the start or the end of a line."""
+    return {int(number) for match in PAGE_NUMBER_PATTERN.finditer(line.strip()) for number in match.groups() if number}
+
+
+def edge_line_indexes(lines, edge_lines=EDGE_LINES):
+    """Indexes of the first and last edge_lines non-empty lines of a page."""
+    non_empty = [idx for idx, line in enumerate(lines) if line.strip()]
+    return set(non_empty[:edge_lines]) | set(non_empty[-edge_lines:])
+
+
+def running_form(line):
+    """Normalize a candidate line without its page number token, whichever side it is on."""
+    return normalize_line(PAGE_NUMBER_PATTERN.sub(' ', line.strip()))
+
+
+def edge_candidates(page_info, edge_lines=EDGE_LINES):
+    """{line index: (running form, page number tokens)} for the page's candidate edge lines."""
+    lines = page_info['text'].split('\n')
+    candidates = {}
+    for idx in edge_line_indexes(lines, edge_lines):
+        tokens = page_number_tokens(lines[idx])
+        if tokens and not PROTECTED_PATTERN.search(lines[idx]):
+            candidates[idx] = (running_form(lines[idx]), tokens)
+    return candidates
+
+
+def detect_running_lines(text_pages, edge_lines=EDGE_LINES, window=WINDOW_PAGES, min_repeats=MIN_REPEATS,
+                         min_offset_pages=MIN_OFFSET_PAGES):
+    """Return, for each page, the set of its line indexes that are running lines."""
+    candidates = [edge_candidates(page_info, edge_lines) for page_info in text_pages]
+    page_nums = [page_info['page_num'] for page_info in text_pages]
+    forms = [{form for form, _ in page.values()} for page in candidates]
+
+    running = []
+    first = last = 0
+    for position, page_num in enumerate(page_nums):
+        # Neighbours by page number, so pages missing from a two-phase run do not widen the window
+        while page_nums[first] < page_num - window:
+            first += 1
+        while last < len(page_nums) and page_nums[last] <= page_num + window:
+            last += 1
+        form_counts = Counter(form for neighbour in range(first, last) for form in forms[neighbour])
+        # Page offsets shown by the neighbours' repeated (running head pattern) lines
+        offset_counts = Counter()
+        for neighbour in range(first, last):
+            if neighbour != position:
+                offset_counts.update({token - page_nums[neighbour]
+                                      for form, tokens in candidates[neighbour].values()
+                                      if form_counts[form] >= min_repeats for token in tokens})
+        page_offsets = {offset for offset, count in offset_counts.items() if count >= min_offset_pages}
+
+        running.append({idx for idx, (form, tokens) in candidates[position].items()
+                        if any(token - page_num in page_offsets for token in tokens)})
+    return running
+
+
+def strip_running_lines(text_pages, running_lines=None, edge_lines=EDGE_LINES):
+    """Remove running lines from page edges.
+
+    running_lines is detect_running_lines() output (computed when omitted).
+    Returns new page dicts with the stripped 'text' plus 'removed_lines' and
+    'removed_bytes' (UTF-8) for the page, and 'removed_at': (line position,
+    bytes) for each removed line, where the position is the index of the
+    stripped line that followed it.
+    """
+    if running_lines is None:
+        running_lines = detect_running_lines(text_pages, edge_lines)
+
+    stripped_pages = []
+    total_lines = 0
+    total_bytes = 0
+
+    for page_info, page_running in zip(text_pages, running_lines):
+        lines = page_info['text'].split('\n')
+        kept = []
+        removed_at = []
+
+        for idx, line in enumerate(lines):
+            if idx in page_running:
+                removed_at.append((len(kept), len(line.encode('utf-8')) + 1))  # Include the newline
+                continue
+            kept.append(line)
+        removed_lines = len(removed_at)
+        removed_bytes = sum(size for _, size in removed_at)
+
+        stripped_page = dict(page_info)
+        stripped_page['text'] = '\n'.join(kept)
+        stripped_page['removed_lines'] = removed_lines
+        stripped_page['removed_bytes'] = removed_bytes
+        stripped_page['removed_at'] = removed_at
+        stripped_pages.append(stripped_page)
+        total_lines += removed_lines
+        total_bytes += removed_bytes
+
+    logger.info(f"Stripped {total_lines} running head/footer lines ({total_bytes} bytes) "
+                f"from {len(text_pages)} pages")
+    return stripped_pages
+
+
+def removal_by_item(diagnostic_items, stripped_pages):
+    """Attach {'lines', 'bytes'} removed inside each item's text as item['running_heads_removed'].
+
+    An item's text runs from its criteria line to the next item's criteria
+    line (end_line), so a boundary page shared with the next item is split
+    between the two and every removed line is counted at most once.
+    """
+    removed_by_page = {page_info['page_num']: page_info.get('removed_at', []) for page_info in stripped_pages}
+
+    for item in diagnostic_items:
+        start = (item['start_page'], item.get('start_line', 0))
+        end_line = item.get('end_line')
+        end = (item['end_page'], float('inf') if end_line is None else end_line)
+        lines = 0
+        size = 0
+        for page in range(item['start_page'], item['end_page'] + 1):
+            for position, removed_bytes in removed_by_page.get(page, []):
+                if start < (page, position) <= end:
+                    lines += 1
+                    size += removed_bytes
+        item['running_heads_removed'] = {'lines': lines, 'bytes': size}
+    return diagnostic_items
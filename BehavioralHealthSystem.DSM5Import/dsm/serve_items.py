@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+DSM5 Local Item Server
+
+Read-only HTTP service over the segmented item store (items.json), for use
+as a local or sidecar replacement for fetching DSM-5 conditions from blob
+storage on every Extended Risk Assessment call. The store is loaded once;
+rendered JSON responses are kept in an in-memory LRU, every response carries
+a strong ETag derived from its rendered body, and requests with a matching
+If-None-Match get a 304 with no body.
+
+Routes:
+    GET /health
+    GET /items                              item summaries (id, title, code, pages)
+    GET /items/{id or code}                 full item (ICD-9, ICD-10 or paired code)
+    GET /items/{id or code}/sections/{name} one section of an item
+    GET /sections/{name}                    that section for every item that has it
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python serve_items.py single-pages/items.json --port 8089
+    python dsm5.py serve single-pages/items.json --port 8089 --cache-size 512
+    python bench_item_server.py single-pages/items.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from urllib.parse import unquote, urlsplit
+
+from dsm5_items import load_items
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8089
+DEFAULT_CACHE_SIZE = 1024
+
+
+def normalize_key(key):
+    """Normalize an item id or code for lookup (case and whitespace insensitive)."""
+    key = re.sub(r'\s+', '', unquote(key)).lower()
+    if key.startswith('(') and key.endswith(')'):
+        key = key[1:-1]
+    return key
+
+
+def normalize_section(name):
+    """Normalize a section name from a URL ("differential-diagnosis" or "Differential%20Diagnosis")."""
+    return re.sub(r'[\s_-]+', ' ', unquote(name)).strip().lower()
+
+
+def strong_etag(body):
+    """Strong ETag over the exact response body, so any change to a served field changes it."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match, etag):
+    """RFC 7232 If-None-Match comparison (weak comparison, '*' matches anything)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+
+class LRUCache:
+    """Thread-safe LRU of rendered responses: key -> (body bytes, etag)."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+
+class ItemStore:
+    """In-memory item store with lookups by id/code and an LRU of rendered JSON."""
+
+    json_indent = None  # Compact responses
+
+    def __init__(self, records, cache_size=DEFAULT_CACHE_SIZE):
+        self.records = records
+        self.cache = LRUCache(cache_size)
+        self.by_key = {}
+        for record in records:
+            for key in (record['id'], record['diagnostic_code'], record.get('icd9', ''), record.get('icd10', '')):
+                if key:
+                    # First item wins for duplicate codes, matching the bundle index
+                    self.by_key.setdefault(normalize_key(key), record)
+
+    @classmethod
+    def from_file(cls, items_path, cache_size=DEFAULT_CACHE_SIZE):
+        records = load_items(items_path)
+        logger.info(f"Loaded {len(records)} items from {items_path}")
+        return cls(records, cache_size)
+
+    def find(self, key):
+        return self.by_key.get(normalize_key(key))
+
+    def find_section(self, record, section):
+        wanted = normalize_section(section)
+        for name, text in record['sections'].items():
+            if name.lower() == wanted:
+                return name, text
+        return None, None
+
+    def render(self, path, query=''):
+        """Return (status, body bytes, etag) for a GET path and query string, using the LRU for hits."""
+        cache_key = f"{path}?{query}" if query else path
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return (200,) + cached
+
+        status, payload = self._build(path, query)
+        separators = (',', ':') if self.json_indent is None else None
+        body = json.dumps(payload, ensure_ascii=False, indent=self.json_indent, separators=separators).encode('utf-8')
+        if status != 200:
+            return status, body, None
+        etag = strong_etag(body)
+        self.cache.put(cache_key, (body, etag))
+        return status, body, etag
+
+    def _build(self, path, query=''):
+        """Return (status, payload) for a GET path and query string."""
+        parts = [part for part in path.split('/') if part]
+
+        if parts == ['health']:
+            return 200, {'status': 'ok', 'items': len(self.records)}
+
+        if parts == ['items']:
+            summaries = [{
+                'id': record['id'],
+                'title': record['title'],
+                'diagnostic_code': record['diagnostic_code'],
+                'page_start': record['page_start'],
+                'page_end': record['page_end']
+            } for record in self.records]
+            return 200, {'count': len(summaries), 'items': summaries}
+
+        if len(parts) in (2, 4) and parts[0] == 'items':
+            record = self.find(parts[1])
+            if record is None:
+                return 404, {'error': f"Item not found: {unquote(parts[1])}"}
+            if len(parts) == 2:
+                return 200, record
+            if parts[2] == 'sections':
+                name, text = self.find_section(record, parts[3])
+                if name is None:
+                    return 404, {'error': f"Section not found: {unquote(parts[3])}"}
+                return 200, {'id': record['id'], 'section': name, 'text': text}
+
+        if len(parts) == 2 and parts[0] == 'sections':
+            matches = []
+            for record in self.records:
+                name, text = self.find_section(record, parts[1])
+                if name is not None:
+                    matches.append({'id': record['id'], 'title': record['title'], 'section': name, 'text': text})
+            return 200, {'count': len(matches), 'items': matches}
+
+        return 404, {'error': f"Unknown route: {path}"}
+
+
+class ItemRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD handler serving from the server's ItemStore."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive for load tests and sidecar callers
+    disable_nagle_algorithm = True  # Headers and body are separate writes; avoid delayed-ACK stalls
+    server_version = "DSM5ItemServer/1.0"
+
+    def do_GET(self):
+        self._respond(include_body=True)
+
+    def do_HEAD(self):
+        self._respond(include_body=False)
+
+    def _respond(self, include_body):
+        target = urlsplit(self.path)
+        path = target.path.rstrip('/') or '/'
+        status, body, etag = self.server.store.render(path, target.query)
+
+        if status == 200 and etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def create_server(store, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Create (but do not start) a threaded item server bound to host:port."""
+    server = ThreadingHTTPServer((host, port), ItemRequestHandler)
+    server.daemon_threads = True
+    server.store = store
+    return server
+
+
+def main(argv=None):
+    """Main function to run the item server."""
+    parser = argparse.ArgumentParser(prog="dsm5 serve", description="Serve DSM-5 items over local HTTP")
+    parser.add_argument("items", help="Path to items.json written by the single-page splitter")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port (default: 8089)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="Rendered responses kept in the LRU")
+    args = parser.parse_args(argv)
+
+    store = ItemStore.from_file(args.items, args.cache_size)
+    server = create_server(store, args.host, args.port)
+    logger.info(f"Serving {len(store.records)} items on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Stopped (LRU hits: {store.cache.hits}, misses: {store.cache.misses})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+DSM5 Sharded Segmentation
+
+The single-page splitter's segmentation is one sequential state machine over
+all pages: an item opens at a "Diagnostic Criteria" line (title looked up on
+the same page, code on the same or a following line), collects every later
+line, and closes at the next "Diagnostic Criteria" line. An item that no
+other item follows (the last one, or one closed by a criteria line without a
+title or code, such as an index entry) ends TAIL_PAGES after its Comorbidity
+heading (the margin DSMDiagnosticSplitter uses for page-range PDFs) instead
+of collecting the appendices; without a Comorbidity heading it runs on.
+
+Because an item only ever closes at the next criteria line, the state
+machine splits cleanly into a map and a reduce step:
+
+    segment_shard(pages)   run on a contiguous page range; returns
+                             prefix       lines before the shard's first criteria line
+                                          (they belong to an item opened in an earlier shard)
+                             boundary     page (and boundary_line) of the first criteria line
+                                          (None if there is none); boundary_opens tells
+                                          whether it opened an item
+                             items        items opened and closed inside the shard
+                             suffix       the item still open at the end of the shard
+    stitch_shards(results) replays each prefix onto the item left open by the
+                           previous shards, closes it at the next boundary and
+                           collects the shard's items, in page order
+
+Title and code lookups never leave the page, so an item whose title sits on
+the previous shard's last page is handled exactly as in the sequential run.
+The splitter's sequential path is stitch_shards([segment_shard(all pages)]),
+so both paths share one state machine and produce identical items.
+
+With shared_text=True the pages are copied once into a SharedTextStore and
+each task carries only the segment name and its page range, instead of a
+pickled copy of the shard's text. segment_shard() accepts any iterable of
+pages, so a worker decodes and segments one page at a time from the store.
+
+Requirements:
+    (standard library only; main() needs pdfplumber to extract the text)
+
+Usage:
+    python sharded_segmentation.py DSM5.pdf --workers 8
+    python sharded_segmentation.py DSM5.pdf --workers 8 --repeat 20   # multi-thousand-page corpus
+"""
+
+import argparse
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from shared_text_store import SharedTextStore, attach_cached
+
+logger = logging.getLogger(__name__)
+
+CRITERIA_PATTERN = re.compile(r'^\s*Diagnostic\s+Criteria\s*(.*)$', re.IGNORECASE)
+CODE_PATTERN = re.compile(r'\b(\d{3}\.\d+)\s*\(([A-Z]\d+[\.\d]*)\)')
+COMORBIDITY_PATTERN = re.compile(r'^Comorbidity\s*$', re.IGNORECASE)
+
+TAIL_PAGES = 2  # Pages after the last item's Comorbidity heading that still belong to it
+
+SHARDS_PER_WORKER = 4
+TITLE_LOOKBACK_LINES = 4   # Lines above "Diagnostic Criteria" searched for the title
+CODE_LOOKAHEAD_LINES = 4   # Lines below it searched for the code
+
+
+def start_item(lines, i, criteria_match, page_num, title_lookback=TITLE_LOOKBACK_LINES,
+               code_lookahead=CODE_LOOKAHEAD_LINES):
+    """Open an item at a criteria line, or return None when no title/code is found on the page."""
+    # Look backwards for the disorder title (previous non-empty line)
+    disorder_title = ""
+    for j in range(i - 1, max(i - 1 - title_lookback, -1), -1):
+        prev_line = lines[j].strip()
+        if prev_line and not re.match(r'^\d+$', prev_line):  # Skip page numbers
+            disorder_title = prev_line
+            break
+    if not disorder_title:
+        return None
+
+    # Code on the same line as "Diagnostic Criteria", else on one of the next lines
+    code_match = CODE_PATTERN.search(criteria_match.group(1).strip())
+    if not code_match:
+        for j in range(i + 1, min(i + 1 + code_lookahead, len(lines))):
+            code_match = CODE_PATTERN.search(lines[j].strip())
+            if code_match:
+                break
+    if not code_match:
+        return None
+
+    diagnostic_code = f"{code_match.group(1)} ({code_match.group(2)})"
+    logger.info(f"Found diagnostic item: {disorder_title} [{diagnostic_code}]")
+    return {
+        'title': disorder_title,
+        'diagnostic_code': diagnostic_code,
+        'start_page': page_num,
+        'start_line': i,
+        'has_criteria': True,
+        'has_comorbidity': False,
+        'item_saved': False,
+        'end_page': page_num,
+        'comorbidity_page': None,
+        'text_lines': [f"{disorder_title}\nDiagnostic Criteria\n{diagnostic_code}\n\n"]
+    }
+
+
+def add_line(item, page_num, line_index, line):
+    """Add one non-empty line to an open item."""
+    if not item['has_comorbidity'] and COMORBIDITY_PATTERN.match(line):
+        # The first "Comorbidity" heading marks the last section; keep collecting its content
+        item['has_comorbidity'] = True
+        item['comorbidity_page'] = page_num
+        item['comorbidity_start_line'] = line_index
+        item['text_lines'].append(line)
+    else:
+        if item['has_comorbidity'] and 'tail_start' not in item and page_num > item['comorbidity_page'] + TAIL_PAGES:
+            # Lines from here on are only kept if another item closes this one
+            item['tail_start'] = len(item['text_lines'])
+        item['text_lines'].append(line)
+        item['end_page'] = page_num
+
+
+def close_item(item, page_num, saved, line_index=None, followed=False):
+    """Close an item at page_num (the next criteria page, or the last page).
+
+    line_index is the closing criteria line on that page (None: the end of the page).
+    Unless another item follows, the item is cut TAIL_PAGES after its
+    Comorbidity page.
+    """
+    tail_start = item.pop('tail_start', None)
+    if not followed and item['has_comorbidity'] and page_num > item['comorbidity_page'] + TAIL_PAGES:
+        page_num = item['comorbidity_page'] + TAIL_PAGES
+        line_index = None
+        if tail_start is not None:
+            del item['text_lines'][tail_start:]
+    item['end_page'] = page_num
+    item['end_line'] = line_index
+    item['full_text'] = '\n'.join(item.pop('text_lines'))
+    if saved:
+        item['item_saved'] = True
+    return item
+
+
+def segment_shard(text_pages, title_lookback=TITLE_LOOKBACK_LINES, code_lookahead=CODE_LOOKAHEAD_LINES):
+    """Map step: segment a contiguous page range (see module docstring)."""
+    prefix = []
+    boundary = None
+    boundary_line = None
+    boundary_opens = False
+    items = []
+    current = None
+
+    for page_info in text_pages:
+        page_num = page_info['page_num']
+        lines = page_info['text'].split('\n')
+
+        for i, raw_line in enumerate(lines):
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            criteria_match = CRITERIA_PATTERN.match(line)
+            if criteria_match:
+                following = start_item(lines, i, criteria_match, page_num, title_lookback, code_lookahead)
+                if boundary is None:
+                    boundary = page_num
+                    boundary_line = i
+                    boundary_opens = following is not None
+                elif current is not None:
+                    items.append(close_item(current, page_num, saved=True, line_index=i,
+                                            followed=following is not None))
+                current = following
+
+            if boundary is None:
+                prefix.append((page_num, i, line))
+            elif current is not None:
+                add_line(current, page_num, i, line)
+
+    return {'prefix': prefix, 'boundary': boundary, 'boundary_line': boundary_line, 'boundary_opens': boundary_opens,
+            'items': items, 'suffix': current}
+
+
+def stitch_shards(shard_results, last_page_num):
+    """Reduce step: stitch shard results (in page order) into the sequential item list."""
+    items = []
+    open_item = None
+
+    for result in shard_results:
+        if open_item is not None:
+            for page_num, line_index, line in result['prefix']:
+                add_line(open_item, page_num, line_index, line)
+        if result['boundary'] is not None:
+            if open_item is not None:
+                items.append(close_item(open_item, result['boundary'], saved=True, line_index=result['boundary_line'],
+                                        followed=result['boundary_opens']))
+            items.extend(result['items'])
+            open_item = result['suffix']
+
+    # The last item runs to its Comorbidity tail (or the end of the document)
+    if open_item is not None:
+        items.append(close_item(open_item, last_page_num, saved=False))
+    return items
+
+
+def segment_sequential(text_pages, **rules):
+    """Segment all pages in-process (one shard); rules are segment_shard() keyword arguments."""
+    if not text_pages:
+        return []
+    return stitch_shards([segment_shard(text_pages, **rules)], text_pages[-1]['page_num'])
+
+
+def split_shards(text_pages, shard_count):
+    """Split pages into shard_count contiguous ranges of (nearly) equal size."""
+    shard_count = max(1, min(shard_count, len(text_pages)))
+    size, extra = divmod(len(text_pages), shard_count)
+    shards = []
+    start = 0
+    for index in range(shard_count):
+        end = start + size + (1 if index < extra else 0)
+        shards.append(text_pages[start:end])
+        start = end
+    return shards
+
+
+def segment_shared_shard(store_name, first, last, rules):
+    """Map step over pages[first:last] of a SharedTextStore (worker side)."""
+    return segment_shard(attach_cached(store_name).iter_pages(first, last), **rules)
+
+
+def shard_bounds(page_count, shard_count):
+    """(first, last) page index ranges matching split_shards()."""
+    bounds = []
+    start = 0
+    for shard in split_shards(range(page_count), shard_count):
+        bounds.append((start, start + len(shard)))
+        start += len(shard)
+    return bounds
+
+
+def segment_sharded(text_pages, workers, shard_count=None, shared_text=False, **rules):
+    """Segment pages across worker processes; identical to segment_sequential()."""
+    if not text_pages:
+        return []
+    if workers <= 1:
+        return segment_sequential(text_pages, **rules)
+
+    shard_count = shard_count or workers * SHARDS_PER_WORKER
+    if shared_text:
+        # Tasks carry the segment name and a page range; workers slice the shared buffer
+        with SharedTextStore.create(text_pages) as store, ProcessPoolExecutor(max_workers=workers) as pool:
+            bounds = shard_bounds(len(text_pages), shard_count)
+            futures = [pool.submit(segment_shared_shard, store.name, first, last, rules) for first, last in bounds]
+            results = [future.result() for future in futures]
+        logger.info(f"Segmented {len(text_pages)} pages in {len(bounds)} shards across {workers} workers "
+                    f"(shared text store: {store.size} bytes)")
+        return stitch_shards(results, text_pages[-1]['page_num'])
+
+    # Only the text crosses the process boundary
+    slim_pages = [{'page_num': page['page_num'], 'text': page['text']} for page in text_pages]
+    shards = split_shards(slim_pages, shard_count)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(partial(segment_shard, **rules), shards))
+    logger.info(f"Segmented {len(text_pages)} pages in {len(shards)} shards across {workers} workers")
+    return stitch_shards(results, text_pages[-1]['page_num'])
+
+
+def main():
+    """Main function to check sharded segmentation against the sequential run and time both."""
+    from split_dsm5_single_page import DSMSinglePageSplitter
+
+    parser = argparse.ArgumentParser(description="Compare sharded and sequential segmentation")
+    parser.add_argument("input", nargs="?", default="DSM5.pdf", help="Input PDF (default: DSM5.pdf)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--shards", type=int, help="Shard count (default: 4 per worker)")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat the extracted pages N times to simulate a larger corpus")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    splitter = DSMSinglePageSplitter(args.input)
+    pages = splitter.extract_text_with_pages()
+    splitter.close_source()
+    text_pages = [{'page_num': copy * len(pages) + page['page_num'], 'text': page['text']}
+                  for copy in range(args.repeat) for page in pages]
+
+    start = time.perf_counter()
+    sequential = segment_sequential(text_pages)
+    sequential_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sharded = segment_sharded(text_pages, args.workers, args.shards)
+    sharded_seconds = time.perf_counter() - start
+
+    # Every single-page shard exercises every boundary case
+    per_page = stitch_shards([segment_shard([page]) for page in text_pages], text_pages[-1]['page_num'])
+
+    print(f"Pages: {len(text_pages)}  items: {len(sequential)}")
+    print(f"Sequential: {sequential_seconds:.3f}s")
+    print(f"Sharded ({args.workers} workers): {sharded_seconds:.3f}s")
+    print(f"Identical to sequential: sharded={sharded == sequential}  one-page-shards={per_page == sequential}")
+
+
+if __name__ == "__main__":
+    main()
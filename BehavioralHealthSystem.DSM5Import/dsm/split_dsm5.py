@@ -10,19 +10,21 @@ Requirements:
 
 Usage:
     python split_dsm5.py
+    python dsm5.py chunk DSM5.pdf --pages-per-split 25 --output-dir chunks
 """
 
 import os
 from PyPDF2 import PdfReader, PdfWriter
 
 
-def split_pdf(input_file, pages_per_split=60:
+def split_pdf(input_file, pages_per_split=60, output_dir="."):
     """
     Split a PDF file into multiple files with specified number of pages each.
     
     Args:
         input_file (str): Path to the input PDF file
-        pages_per_split (int): Number of pages per output file (default: 25)
+        pages_per_split (int): Number of pages per output file (default: 60)
+        output_dir (str): Directory for the output files (default: current directory)
     """
     # Check if input file exists
     if not os.path.exists(input_file):
@@ -36,6 +38,7 @@ def split_pdf(input_file, pages_per_split=60:
         
         print(f"Total pages in {input_file}: {total_pages}")
         print(f"Splitting into files with {pages_per_split} pages each...")
+        os.makedirs(output_dir, exist_ok=True)
         
         # Calculate number of output files needed
         num_files = (total_pages + pages_per_split - 1) // pages_per_split  # Ceiling division
@@ -56,7 +59,7 @@ def split_pdf(input_file, pages_per_split=60:
                 writer.add_page(reader.pages[page_num])
             
             # Write the output file
-            with open(output_filename, 'wb') as output_file:
+            with open(os.path.join(output_dir, output_filename), 'wb') as output_file:
                 writer.write(output_file)
             
             print(f"Created: {output_filename} (pages {start_page + 1}-{end_page + 1})")
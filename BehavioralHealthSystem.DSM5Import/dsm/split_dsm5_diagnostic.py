@@ -10,45 +10,96 @@ Requirements:
 
 Usage:
     python split_dsm5_diagnostic.py
+    python dsm5.py split DSM5.pdf --output-dir diagnostic-items
+    python dsm5.py split DSM5.pdf --output-dir diagnostic-items --slim
 """
 
 import os
 import re
-import pdfplumber
-from PyPDF2 import PdfReader, PdfWriter
+import time
+from contextlib import nullcontext
+from PyPDF2 import PdfWriter
 import logging
 
+from pdf_slimming import slim_pdfs
+from pdf_source import PdfSource
+from two_phase_extraction import TAIL_PAGES, compare_items, locate_item_pages
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Words that mark a line as a candidate disorder title
+DISORDER_KEYWORDS = ['disorder', 'syndrome', 'episode', 'condition', 'phobia', 'anxiety', 'depression', 'bipolar']
+
 
 class DSMDiagnosticSplitter:
-    def __init__(self, input_file):
+    def __init__(self, input_file, output_dir="."):
         self.input_file = input_file
+        self.output_dir = output_dir
         self.diagnostic_items = []
+        self.source = None
+        self.profiler = None  # Optional stage_profiler.StageProfiler
+        self.page_extractor = None  # Optional page_isolation.IsolatedPageExtractor
+        self.disorder_keywords = list(DISORDER_KEYWORDS)  # Tunable live in tuning_session.py
         
-    def extract_text_with_pages(self):
-        """Extract text from PDF with page information."""
+    def profile_stage(self, name):
+        """Profile a stage when a profiler is attached (no-op otherwise)."""
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+    
+    def get_source(self):
+        """The memory-mapped input PDF shared by every stage of this run."""
+        if self.source is None:
+            self.source = PdfSource(self.input_file)
+        return self.source
+    
+    def close_source(self):
+        """Release the shared input PDF."""
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+    
+    def extract_text_with_pages(self, page_numbers=None):
+        """Extract text from PDF with page information.
+        
+        When page_numbers is given, only those (0-based) pages are extracted.
+        With a page_extractor attached, pages are extracted in isolated workers
+        under a time/memory budget instead of in this process.
+        """
         text_pages = []
         
+        if self.page_extractor is not None:
+            if page_numbers is None:
+                page_numbers = range(len(self.get_source().reader.pages))
+            logger.info(f"Processing {len(page_numbers)} pages in isolated workers...")
+            return self.page_extractor.extract(page_numbers)
+        
         try:
-            with pdfplumber.open(self.input_file) as pdf:
+            pdf = self.get_source().plumber
+            if page_numbers is None:
+                pages = enumerate(pdf.pages)
                 logger.info(f"Processing {len(pdf.pages)} pages...")
-                
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text()
-                    if text:
-                        text_pages.append({
-                            'page_num': page_num,
-                            'text': text,
-                            'page_obj': page
-                        })
+            else:
+                pages = ((page_num, pdf.pages[page_num]) for page_num in page_numbers)
+                logger.info(f"Processing {len(page_numbers)} of {len(pdf.pages)} pages...")
+            
+            for page_num, page in pages:
+                page_start_time = time.perf_counter()
+                text = page.extract_text()
+                page.flush_cache()  # The shared document outlives this loop; drop layout objects
+                if self.profiler:
+                    self.profiler.record('page', f"page {page_num + 1}", time.perf_counter() - page_start_time)
+                if text:
+                    text_pages.append({
+                        'page_num': page_num,
+                        'text': text,
+                        'page_obj': page
+                    })
+                    
+                    # Log progress every 50 pages
+                    if (page_num + 1) % 50 == 0:
+                        logger.info(f"Processed {page_num + 1} pages...")
                         
-                        # Log progress every 50 pages
-                        if (page_num + 1) % 50 == 0:
-                            logger.info(f"Processed {page_num + 1} pages...")
-                            
         except Exception as e:
             logger.error(f"Error extracting text: {str(e)}")
             return []
@@ -75,7 +126,7 @@ class DSMDiagnosticSplitter:
                 
                 # Pattern 1: Look for disorder title followed by "Diagnostic Criteria" and code
                 # Example: "Autism Spectrum Disorder" followed by "Diagnostic Criteria 299.00 (F84.0)"
-                disorder_keywords = ['disorder', 'syndrome', 'episode', 'condition', 'phobia', 'anxiety', 'depression', 'bipolar']
+                disorder_keywords = self.disorder_keywords
                 
                 # Check if this is a standalone disorder title
                 if (any(keyword in line.lower() for keyword in disorder_keywords) and
@@ -140,8 +191,12 @@ class DSMDiagnosticSplitter:
                 
                 i += 1
         
-        # Add the last item if it has comorbidity
+        # Add the last item if it has comorbidity; it ends TAIL_PAGES after its Comorbidity
+        # heading instead of running through the index and appendices
         if current_item and current_item.get('has_comorbidity', False):
+            last_page = current_item['comorbidity_page'] + TAIL_PAGES
+            current_item['end_page'] = min(current_item['end_page'], last_page)
+            current_item['content_pages'] = [page for page in current_item['content_pages'] if page <= last_page]
             diagnostic_items.append(current_item)
         
         # Filter items to only include complete diagnostic sections
@@ -155,17 +210,21 @@ class DSMDiagnosticSplitter:
         return complete_items
     
     def create_diagnostic_pdfs(self, diagnostic_items):
-        """Create separate PDF files for each diagnostic item."""
+        """Create separate PDF files for each diagnostic item; returns the paths written."""
+        written = []
         if not diagnostic_items:
             logger.warning("No diagnostic items found!")
-            return
+            return written
         
         logger.info(f"Creating PDFs for {len(diagnostic_items)} diagnostic items...")
         
         try:
-            pdf_reader = PdfReader(self.input_file)
+            pdf_reader = self.get_source().reader
+            os.makedirs(self.output_dir, exist_ok=True)
             
             for idx, item in enumerate(diagnostic_items):
+                item_start_time = time.perf_counter()
+                
                 # Clean the title for filename
                 clean_title = re.sub(r'[^\w\s-]', '', item['title'])
                 clean_title = re.sub(r'\s+', '_', clean_title.strip())
@@ -184,15 +243,21 @@ class DSMDiagnosticSplitter:
                 
                 # Add a few extra pages after comorbidity to ensure complete content
                 if item.get('comorbidity_page'):
-                    end_page = min(item['comorbidity_page'] + 2, len(pdf_reader.pages) - 1)
+                    end_page = min(item['comorbidity_page'] + TAIL_PAGES, len(pdf_reader.pages) - 1)
                 
                 for page_num in range(start_page, end_page + 1):
                     if page_num < len(pdf_reader.pages):
                         pdf_writer.add_page(pdf_reader.pages[page_num])
                 
                 # Write the PDF file
-                with open(output_filename, 'wb') as output_file:
+                output_path = os.path.join(self.output_dir, output_filename)
+                with open(output_path, 'wb') as output_file:
                     pdf_writer.write(output_file)
+                written.append(output_path)
+                
+                if self.profiler:
+                    self.profiler.record('item', f"{item['diagnostic_code']} {item['title']}",
+                                         time.perf_counter() - item_start_time)
                 
                 logger.info(f"Created: {output_filename}")
                 logger.info(f"  Title: {item['title']}")
@@ -202,9 +267,18 @@ class DSMDiagnosticSplitter:
                 
         except Exception as e:
             logger.error(f"Error creating PDFs: {str(e)}")
+        
+        return written
     
-    def split_by_diagnostic_items(self):
-        """Main method to split PDF by diagnostic items."""
+    def split_by_diagnostic_items(self, two_phase=False, verify=False, slim=False):
+        """Main method to split PDF by diagnostic items.
+        
+        two_phase limits layout extraction to candidate item pages; verify
+        additionally runs a full extraction and compares the items.
+        slim rewrites each item PDF as a text-only copy (no images or vector
+        art, compressed content streams, shared fonts) and logs its size
+        before and after.
+        """
         logger.info("Starting DSM-5 diagnostic item extraction...")
         logger.info("Looking for pattern: Disorder Title -> Diagnostic Criteria + Code -> ... -> Comorbidity")
         
@@ -213,18 +287,37 @@ class DSMDiagnosticSplitter:
             logger.error(f"Input file '{self.input_file}' not found.")
             return
         
-        # Extract text with page information
-        text_pages = self.extract_text_with_pages()
+        # Extract text with page information (only candidate item pages in two-phase mode)
+        if two_phase:
+            with self.profile_stage("locate"):
+                locator = locate_item_pages(self.input_file, reader=self.get_source().reader)
+            with self.profile_stage("extract_text"):
+                text_pages = self.extract_text_with_pages(locator['pages'])
+        else:
+            with self.profile_stage("extract_text"):
+                text_pages = self.extract_text_with_pages()
         if not text_pages:
             logger.error("Failed to extract text from PDF.")
+            self.close_source()
             return
         
         # Find diagnostic sections using the proper DSM-5 structure
-        diagnostic_items = self.find_diagnostic_sections(text_pages)
+        with self.profile_stage("segment"):
+            diagnostic_items = self.find_diagnostic_sections(text_pages)
         logger.info(f"Found {len(diagnostic_items)} complete diagnostic sections.")
         
-        # Create individual PDFs
-        self.create_diagnostic_pdfs(diagnostic_items)
+        if two_phase and verify:
+            logger.info("Verifying two-phase items against a full extraction...")
+            compare_items(diagnostic_items, self.find_diagnostic_sections(self.extract_text_with_pages()))
+        
+        # Create individual PDFs (page copies come from the same shared source)
+        with self.profile_stage("write_pdfs"):
+            written = self.create_diagnostic_pdfs(diagnostic_items)
+        self.close_source()
+        
+        if slim:
+            with self.profile_stage("slim_pdfs"):
+                slim_pdfs(written)
         
         # Print summary
         logger.info("\n" + "="*80)
@@ -10,12 +10,26 @@ Requirements:
 
 Usage:
     python split_dsm5_single_page.py
+    python dsm5.py single-page DSM5.pdf --output-dir single-pages
+    python dsm5.py single-page DSM5.pdf --bundle single-pages/items.zip
+    python dsm5.py single-page DSM5.pdf --combined single-pages/dsm5_items.pdf
+    python dsm5.py single-page DSM5.pdf --profile profile
+
+Library use:
+    render_single_page_pdf(item) returns the rendered PDF as a memoryview over
+    the in-memory buffer (no intermediate file or copy); render_items() yields
+    every item that way, and write_bundle() streams them into one archive.
+    write_combined_pdf() puts every item into one multi-page PDF with an
+    outline entry per item and a sidecar <pdf>.pages.json mapping each
+    diagnostic code to its page range, with the pages grouped into
+    pageRanges batches for ranged Document Intelligence calls.
 """
 
+import json
 import os
 import re
-import pdfplumber
-from PyPDF2 import PdfReader, PdfWriter
+import time
+from contextlib import nullcontext
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
@@ -23,37 +37,115 @@ from io import BytesIO
 from pathlib import Path
 import logging
 
+from dsm5_bundle import BundleWriter
+from autocomplete_index import build_index, save_index
+from dsm5_items import item_record, save_items
+from item_groups import drop_exact_duplicates
+from pdf_source import PdfSource
+from running_heads import removal_by_item, strip_running_lines
+from sharded_segmentation import CODE_LOOKAHEAD_LINES, TITLE_LOOKBACK_LINES, segment_sharded
+from two_phase_extraction import compare_items, locate_item_pages
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_PAGES = 50  # Pages per pageRanges batch in the combined PDF sidecar
+
+# Common DSM-5 section headers highlighted when rendering
+SECTION_HEADERS = [
+    'Diagnostic Criteria',
+    'Diagnostic Features',
+    'Associated Features Supporting Diagnosis',
+    'Associated Features',
+    'Prevalence',
+    'Development and Course',
+    'Risk and Prognostic Factors',
+    'Culture-Related Diagnostic Issues',
+    'Gender-Related Diagnostic Issues',
+    'Suicide Risk',
+    'Functional Consequences',
+    'Differential Diagnosis',
+    'Comorbidity',
+    'Specifiers',
+    'Subtypes',
+    'Recording Procedures',
+    'Diagnostic Markers',
+    'Consequences'
+]
+
 
 class DSMSinglePageSplitter:
     def __init__(self, input_file, output_dir="single-pages"):
         self.input_file = input_file
         self.output_dir = output_dir
         self.diagnostic_items = []
+        self.source = None
+        self.profiler = None  # Optional stage_profiler.StageProfiler
+        self.page_extractor = None  # Optional page_isolation.IsolatedPageExtractor
+        self.segment_workers = 1  # Processes for sharded segmentation
+        self.shared_text = False  # Hand page text to segment workers through shared memory
+        # Segmentation rules (tunable live in tuning_session.py)
+        self.title_lookback = TITLE_LOOKBACK_LINES
+        self.code_lookahead = CODE_LOOKAHEAD_LINES
+        self.section_headers = list(SECTION_HEADERS)
+        
+    def profile_stage(self, name):
+        """Profile a stage when a profiler is attached (no-op otherwise)."""
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+    
+    def get_source(self):
+        """The memory-mapped input PDF shared by every stage of this run."""
+        if self.source is None:
+            self.source = PdfSource(self.input_file)
+        return self.source
+    
+    def close_source(self):
+        """Release the shared input PDF."""
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+    
+    def extract_text_with_pages(self, page_numbers=None):
+        """Extract text from PDF with page information.
         
-    def extract_text_with_pages(self):
-        """Extract text from PDF with page information."""
+        When page_numbers is given, only those (0-based) pages are extracted.
+        With a page_extractor attached, pages are extracted in isolated workers
+        under a time/memory budget instead of in this process.
+        """
         text_pages = []
         
+        if self.page_extractor is not None:
+            if page_numbers is None:
+                page_numbers = range(len(self.get_source().reader.pages))
+            logger.info(f"Processing {len(page_numbers)} pages in isolated workers...")
+            return self.page_extractor.extract(page_numbers)
+        
         try:
-            with pdfplumber.open(self.input_file) as pdf:
+            pdf = self.get_source().plumber
+            if page_numbers is None:
+                pages = enumerate(pdf.pages)
                 logger.info(f"Processing {len(pdf.pages)} pages...")
-                
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text()
-                    if text:
-                        text_pages.append({
-                            'page_num': page_num,
-                            'text': text
-                        })
+            else:
+                pages = ((page_num, pdf.pages[page_num]) for page_num in page_numbers)
+                logger.info(f"Processing {len(page_numbers)} of {len(pdf.pages)} pages...")
+            
+            for page_num, page in pages:
+                page_start_time = time.perf_counter()
+                text = page.extract_text()
+                page.flush_cache()  # The shared document outlives this loop; drop layout objects
+                if self.profiler:
+                    self.profiler.record('page', f"page {page_num + 1}", time.perf_counter() - page_start_time)
+                if text:
+                    text_pages.append({
+                        'page_num': page_num,
+                        'text': text
+                    })
+                    
+                    # Log progress every 50 pages
+                    if (page_num + 1) % 50 == 0:
+                        logger.info(f"Processed {page_num + 1} pages...")
                         
-                        # Log progress every 50 pages
-                        if (page_num + 1) % 50 == 0:
-                            logger.info(f"Processed {page_num + 1} pages...")
-                            
         except Exception as e:
             logger.error(f"Error extracting text: {str(e)}")
             return []
@@ -63,111 +155,12 @@ class DSMSinglePageSplitter:
     def find_diagnostic_sections(self, text_pages):
         """Find diagnostic sections using the actual DSM-5 structure.
         Pattern: Disorder Title (line) -> "Diagnostic Criteria" (next line) -> Code (same or next line)
-        """
-        diagnostic_items = []
-        current_item = None
-        current_text = []
-        
-        for page_info in text_pages:
-            page_num = page_info['page_num']
-            text = page_info['text']
-            lines = text.split('\n')
-            
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                if not line:
-                    i += 1
-                    continue
-                
-                # Look for "Diagnostic Criteria" which should follow a disorder title
-                # Pattern 1: "Diagnostic Criteria" on its own line
-                # Pattern 2: "Diagnostic Criteria 292.0 (F12.288)" - criteria + code on same line
-                criteria_match = re.match(r'^\s*Diagnostic\s+Criteria\s*(.*)$', line, re.IGNORECASE)
-                
-                if criteria_match:
-                    # Before starting a new disorder, save the previous one if it exists
-                    if current_item and not current_item.get('item_saved', False):
-                        current_item['end_page'] = page_num
-                        current_item['full_text'] = '\n'.join(current_text)
-                        current_item['item_saved'] = True
-                        diagnostic_items.append(current_item)
-                        logger.info(f"Saved item: {current_item['title']} (found next disorder)")
-                        # Reset for next item
-                        current_item = None
-                        current_text = []
-                    
-                    # Look backwards for the disorder title (previous non-empty line)
-                    disorder_title = ""
-                    for j in range(i - 1, max(i - 5, -1), -1):
-                        prev_line = lines[j].strip()
-                        if prev_line and not re.match(r'^\d+$', prev_line):  # Skip page numbers
-                            disorder_title = prev_line
-                            break
-                    
-                    if disorder_title:
-                        # Check if code is on the same line as "Diagnostic Criteria"
-                        remaining_text = criteria_match.group(1).strip()
-                        code_match = re.search(r'\b(\d{3}\.\d+)\s*\(([A-Z]\d+[\.\d]*)\)', remaining_text)
-                        
-                        if code_match:
-                            # Code is on the same line
-                            diagnostic_code = f"{code_match.group(1)} ({code_match.group(2)})"
-                        else:
-                            # Look ahead for diagnostic code on next lines
-                            diagnostic_code = ""
-                            for j in range(i + 1, min(i + 5, len(lines))):
-                                next_line = lines[j].strip()
-                                
-                                # Extract diagnostic code (e.g., "292.0 (F12.288)" or "299.00 (F84.0)")
-                                code_match = re.search(r'\b(\d{3}\.\d+)\s*\(([A-Z]\d+[\.\d]*)\)', next_line)
-                                if code_match:
-                                    diagnostic_code = f"{code_match.group(1)} ({code_match.group(2)})"
-                                    break
-                        
-                        if diagnostic_code:
-                            # Start new diagnostic item
-                            current_item = {
-                                'title': disorder_title,
-                                'diagnostic_code': diagnostic_code,
-                                'start_page': page_num,
-                                'has_criteria': True,
-                                'has_comorbidity': False,
-                                'item_saved': False,
-                                'end_page': page_num,
-                                'comorbidity_page': None
-                            }
-                            current_text = [f"{disorder_title}\nDiagnostic Criteria\n{diagnostic_code}\n\n"]
-                            logger.info(f"Found diagnostic item: {disorder_title} [{diagnostic_code}]")
-                
-                # Look for "Comorbidity" section (marks end of current disorder)
-                if (current_item and 
-                    not current_item.get('has_comorbidity', False) and
-                    re.match(r'^Comorbidity\s*$', line, re.IGNORECASE)):
-                    
-                    # Mark that we found comorbidity heading
-                    current_item['has_comorbidity'] = True
-                    current_item['comorbidity_page'] = page_num
-                    current_item['comorbidity_start_line'] = i
-                    current_text.append(line)
-                    logger.info(f"Found comorbidity section for: {current_item['title']} - collecting content")
-                
-                # If we're collecting text for an item (not yet saved), add this line
-                elif current_item and not current_item.get('item_saved', False):
-                    # Add line to current collection
-                    if line.strip():
-                        current_text.append(line)
-                        current_item['end_page'] = page_num
-                
-                i += 1
         
-        # Save the last item if it wasn't saved yet
-        if current_item and not current_item.get('item_saved', False):
-            current_item['end_page'] = page_num
-            current_item['full_text'] = '\n'.join(current_text)
-            diagnostic_items.append(current_item)
-            logger.info(f"Saved final item: {current_item['title']}")
+        With segment_workers > 1 the pages are segmented in contiguous shards
+        across processes and stitched back together (identical result).
+        """
+        diagnostic_items = segment_sharded(text_pages, self.segment_workers, shared_text=self.shared_text,
+                                           title_lookback=self.title_lookback, code_lookahead=self.code_lookahead)
         
         # Filter items to only include complete diagnostic sections
         complete_items = []
@@ -180,14 +173,14 @@ class DSMSinglePageSplitter:
         
         # Add standardized headers to each item for uniform structure
         for item in complete_items:
-            item['full_text'] = self.add_standardized_headers(item['full_text'], item['title'])
+            item['sections'] = self.parse_sections(item['full_text'], item['title'])
+            item['full_text'] = self.add_standardized_headers(item['full_text'], item['title'], item['sections'])
                 
         return complete_items
     
-    def add_standardized_headers(self, text, disorder_title):
-        """Add all standardized DSM-5 headers to ensure uniform structure"""
-        # Define the standard order of sections
-        standard_sections = [
+    def get_standard_sections(self, disorder_title):
+        """Return the standard DSM-5 section order for a disorder."""
+        return [
             'Diagnostic Criteria',
             'Specifiers',
             'Diagnostic Features',
@@ -202,6 +195,10 @@ class DSMSinglePageSplitter:
             'Differential Diagnosis',
             'Comorbidity'
         ]
+    
+    def parse_sections(self, text, disorder_title):
+        """Parse item text into a dict of standard section -> content."""
+        standard_sections = self.get_standard_sections(disorder_title)
         
         # Parse existing content into sections
         lines = text.split('\n')
@@ -242,6 +239,14 @@ class DSMSinglePageSplitter:
         if current_section:
             sections[current_section] = '\n'.join(current_content).strip()
         
+        return sections
+    
+    def add_standardized_headers(self, text, disorder_title, sections=None):
+        """Add all standardized DSM-5 headers to ensure uniform structure"""
+        standard_sections = self.get_standard_sections(disorder_title)
+        if sections is None:
+            sections = self.parse_sections(text, disorder_title)
+        
         # Build standardized output
         result = []
         for section in standard_sections:
@@ -256,28 +261,8 @@ class DSMSinglePageSplitter:
         return '\n'.join(result)
     
     def detect_section_headers(self, text):
-        """Detect and mark section headers in the text."""
-        # Common DSM-5 section headers
-        section_headers = [
-            'Diagnostic Criteria',
-            'Diagnostic Features',
-            'Associated Features Supporting Diagnosis',
-            'Associated Features',
-            'Prevalence',
-            'Development and Course',
-            'Risk and Prognostic Factors',
-            'Culture-Related Diagnostic Issues',
-            'Gender-Related Diagnostic Issues',
-            'Suicide Risk',
-            'Functional Consequences',
-            'Differential Diagnosis',
-            'Comorbidity',
-            'Specifiers',
-            'Subtypes',
-            'Recording Procedures',
-            'Diagnostic Markers',
-            'Consequences'
-        ]
+        """Detect and mark section headers (self.section_headers) in the text."""
+        section_headers = self.section_headers
         
         lines = text.split('\n')
         processed_lines = []
@@ -299,13 +284,18 @@ class DSMSinglePageSplitter:
         
         return processed_lines
     
-    def create_single_page_pdf(self, item, output_path):
-        """Create a single-page PDF with multi-column layout to fit all content."""
+    def render_single_page_pdf(self, item):
+        """Render a single-page PDF with multi-column layout to fit all content.
+        
+        Returns a memoryview over the in-memory PDF bytes, or None on failure.
+        """
+        render_start_time = time.perf_counter()
         try:
             buffer = BytesIO()
             
-            # Create PDF with letter size
-            c = canvas.Canvas(buffer, pagesize=letter)
+            # Create PDF with letter size; invariant output (fixed dates and IDs) so an
+            # unchanged item renders byte-identical and uploads can be skipped by hash
+            c = canvas.Canvas(buffer, pagesize=letter, invariant=1)
             width, height = letter
             
             # Set up margins (smaller for more space)
@@ -468,16 +458,48 @@ class DSMSinglePageSplitter:
             c.showPage()
             c.save()
             
-            # Write to file
-            buffer.seek(0)
-            with open(output_path, 'wb') as f:
-                f.write(buffer.read())
-                
-            return True
+            # Expose the rendered bytes without copying them out of the buffer
+            return buffer.getbuffer()
             
         except Exception as e:
             logger.error(f"Error creating single-page PDF: {str(e)}")
+            return None
+        
+        finally:
+            if self.profiler:
+                self.profiler.record('item', f"{item['diagnostic_code']} {item['title']}",
+                                     time.perf_counter() - render_start_time)
+    
+    def create_single_page_pdf(self, item, output_path):
+        """Create a single-page PDF file for one item."""
+        pdf_view = self.render_single_page_pdf(item)
+        if pdf_view is None:
             return False
+        
+        with open(output_path, 'wb') as f:
+            f.write(pdf_view)
+        return True
+    
+    def get_output_filename(self, item):
+        """Build the output file name for an item: dsm5_[CODE]_[DISORDER_NAME].pdf"""
+        # Clean the title for filename
+        clean_title = re.sub(r'[^\w\s-]', '', item['title'])
+        clean_title = re.sub(r'\s+', '_', clean_title.strip())
+        clean_title = clean_title[:50]  # Limit filename length
+        
+        # Include diagnostic code in filename
+        code_part = item['diagnostic_code'].replace('(', '').replace(')', '').replace('.', '_').replace(' ', '_')
+        return f"dsm5_{code_part}_{clean_title}.pdf"
+    
+    def render_items(self, diagnostic_items):
+        """Yield (item, file name, memoryview) for every item that renders successfully."""
+        for item in diagnostic_items:
+            output_filename = self.get_output_filename(item)
+            pdf_view = self.render_single_page_pdf(item)
+            if pdf_view is None:
+                logger.error(f"Failed to render: {output_filename}")
+                continue
+            yield item, output_filename, pdf_view
     
     def create_single_page_pdfs(self, diagnostic_items):
         """Create separate single-page PDF files for each diagnostic item."""
@@ -494,14 +516,7 @@ class DSMSinglePageSplitter:
         success_count = 0
         
         for idx, item in enumerate(diagnostic_items):
-            # Clean the title for filename
-            clean_title = re.sub(r'[^\w\s-]', '', item['title'])
-            clean_title = re.sub(r'\s+', '_', clean_title.strip())
-            clean_title = clean_title[:50]  # Limit filename length
-            
-            # Include diagnostic code in filename
-            code_part = item['diagnostic_code'].replace('(', '').replace(')', '').replace('.', '_').replace(' ', '_')
-            output_filename = f"dsm5_{code_part}_{clean_title}.pdf"
+            output_filename = self.get_output_filename(item)
             output_path = os.path.join(self.output_dir, output_filename)
             
             if self.create_single_page_pdf(item, output_path):
@@ -515,8 +530,128 @@ class DSMSinglePageSplitter:
         
         logger.info(f"\nSuccessfully created {success_count}/{len(diagnostic_items)} single-page PDFs")
     
-    def split_by_diagnostic_items(self):
-        """Main method to split PDF by diagnostic items into single pages."""
+    def write_bundle(self, diagnostic_items, bundle_path):
+        """Stream every rendered item into one zip/tar bundle with a code -> offset index."""
+        if not diagnostic_items:
+            logger.warning("No diagnostic items found!")
+            return None
+        
+        Path(os.path.dirname(bundle_path) or '.').mkdir(parents=True, exist_ok=True)
+        logger.info(f"Writing {len(diagnostic_items)} items to bundle {bundle_path}")
+        
+        with BundleWriter(bundle_path) as bundle:
+            for item, output_filename, pdf_view in self.render_items(diagnostic_items):
+                bundle.add(output_filename, pdf_view, code=item['diagnostic_code'], title=item['title'])
+        
+        total_bytes = sum(member['size'] for member in bundle.members)
+        logger.info(f"Bundled {len(bundle.members)}/{len(diagnostic_items)} items ({total_bytes} bytes)")
+        return bundle_path
+    
+    def write_combined_pdf(self, diagnostic_items, combined_path, batch_pages=DEFAULT_BATCH_PAGES):
+        """Render every item into one multi-page PDF with an outline entry per item.
+        
+        Also writes <combined_path>.pages.json mapping each diagnostic code to
+        its 1-based page range, plus pageRanges batches of up to batch_pages
+        pages that never split an item.
+        """
+        if not diagnostic_items:
+            logger.warning("No diagnostic items found!")
+            return None
+        
+        from PyPDF2 import PdfReader, PdfWriter
+        
+        Path(os.path.dirname(combined_path) or '.').mkdir(parents=True, exist_ok=True)
+        logger.info(f"Writing {len(diagnostic_items)} items to combined PDF {combined_path}")
+        
+        writer = PdfWriter()
+        entries = []
+        for item, output_filename, pdf_view in self.render_items(diagnostic_items):
+            page_start = len(writer.pages) + 1
+            for page in PdfReader(BytesIO(pdf_view)).pages:
+                writer.add_page(page)
+            page_end = len(writer.pages)
+            writer.add_outline_item(f"{item['title']} {item['diagnostic_code']}", page_start - 1)
+            entries.append({
+                'id': item_record(item)['id'],
+                'title': item['title'],
+                'diagnostic_code': item['diagnostic_code'],
+                'page_start': page_start,
+                'page_end': page_end,
+                'pageRanges': f"{page_start}-{page_end}"
+            })
+        
+        writer.page_mode = "/UseOutlines"
+        with open(combined_path, 'wb') as f:
+            writer.write(f)
+        
+        # Code -> page range; the first item wins for duplicate codes, matching the bundle index
+        codes = {}
+        for entry in entries:
+            if entry['diagnostic_code'] in codes:
+                logger.warning(f"Duplicate diagnostic code {entry['diagnostic_code']} ({entry['title']}); "
+                               f"keeping pages {codes[entry['diagnostic_code']]}")
+                continue
+            codes[entry['diagnostic_code']] = entry['pageRanges']
+        
+        # Consecutive items grouped into ranged calls of at most batch_pages pages
+        batches = []
+        for entry in entries:
+            if batches and entry['page_end'] - batches[-1]['page_start'] < batch_pages:
+                batches[-1]['page_end'] = entry['page_end']
+                batches[-1]['codes'].append(entry['diagnostic_code'])
+            else:
+                batches.append({'page_start': entry['page_start'], 'page_end': entry['page_end'],
+                                'codes': [entry['diagnostic_code']]})
+        for batch in batches:
+            batch['pageRanges'] = f"{batch['page_start']}-{batch['page_end']}"
+        
+        sidecar_path = f"{combined_path}.pages.json"
+        with open(sidecar_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': 1,
+                'pdf': os.path.basename(combined_path),
+                'total_pages': len(writer.pages),
+                'items': entries,
+                'codes': codes,
+                'batches': batches
+            }, f, indent=2, ensure_ascii=False)
+        
+        logger.info(f"Combined {len(entries)}/{len(diagnostic_items)} items into {len(writer.pages)} pages; "
+                    f"{len(batches)} pageRanges batches in {sidecar_path}")
+        return combined_path
+    
+    def save_items_json(self, diagnostic_items, output_path=None):
+        """Write the segmented items (codes, title, pages, sections) to the JSON item store."""
+        if output_path is None:
+            output_path = os.path.join(self.output_dir, "items.json")
+        
+        Path(os.path.dirname(output_path) or '.').mkdir(parents=True, exist_ok=True)
+        records = [item_record(item) for item in diagnostic_items]
+        save_items(records, output_path)
+        logger.info(f"Wrote {len(records)} items to {output_path}")
+        return output_path
+    
+    def save_autocomplete_index(self, diagnostic_items, output_path=None):
+        """Write the title/code autocomplete index (prefix trie + trigram table)."""
+        if output_path is None:
+            output_path = os.path.join(self.output_dir, "autocomplete.json")
+        
+        Path(os.path.dirname(output_path) or '.').mkdir(parents=True, exist_ok=True)
+        save_index(build_index([item_record(item) for item in diagnostic_items]), output_path)
+        logger.info(f"Wrote autocomplete index to {output_path}")
+        return output_path
+    
+    def split_by_diagnostic_items(self, bundle_path=None, two_phase=False, verify=False, strip_running_heads=True,
+                                  combined_path=None, batch_pages=DEFAULT_BATCH_PAGES):
+        """Main method to split PDF by diagnostic items into single pages.
+        
+        When bundle_path is given, items go into one zip/tar bundle instead of separate files.
+        When combined_path is given, items go into one multi-page PDF with an
+        outline and a code -> page range sidecar instead.
+        two_phase limits layout extraction to candidate item pages; verify
+        additionally runs a full extraction and compares the items.
+        strip_running_heads removes repeated page heads/footers before segmentation.
+        """
         logger.info("Starting DSM-5 single-page diagnostic item extraction...")
         logger.info("Each diagnostic item will be condensed onto ONE page")
         logger.info("Pattern: Disorder Title -> Diagnostic Criteria + Code -> Content -> Comorbidity")
@@ -526,18 +661,62 @@ class DSMSinglePageSplitter:
             logger.error(f"Input file '{self.input_file}' not found.")
             return
         
-        # Extract text with page information
-        text_pages = self.extract_text_with_pages()
+        # Extract text with page information (only candidate item pages in two-phase mode)
+        if two_phase:
+            with self.profile_stage("locate"):
+                locator = locate_item_pages(self.input_file, reader=self.get_source().reader)
+            with self.profile_stage("extract_text"):
+                text_pages = self.extract_text_with_pages(locator['pages'])
+        else:
+            with self.profile_stage("extract_text"):
+                text_pages = self.extract_text_with_pages()
         if not text_pages:
             logger.error("Failed to extract text from PDF.")
+            self.close_source()
             return
         
+        # Strip running heads, page numbers and footers before segmentation
+        if strip_running_heads:
+            with self.profile_stage("strip_running_heads"):
+                text_pages = strip_running_lines(text_pages)
+        
         # Find diagnostic sections
-        diagnostic_items = self.find_diagnostic_sections(text_pages)
+        with self.profile_stage("segment"):
+            diagnostic_items = self.find_diagnostic_sections(text_pages)
         logger.info(f"Found {len(diagnostic_items)} complete diagnostic sections.")
         
-        # Create individual single-page PDFs
-        self.create_single_page_pdfs(diagnostic_items)
+        if strip_running_heads:
+            removal_by_item(diagnostic_items, text_pages)
+            for item in diagnostic_items:
+                removed = item['running_heads_removed']
+                logger.info(f"Running heads removed from {item['title']}: {removed['lines']} lines, {removed['bytes']} bytes")
+        
+        if two_phase and verify:
+            logger.info("Verifying two-phase items against a full extraction...")
+            full_text_pages = self.extract_text_with_pages()
+            if strip_running_heads:
+                full_text_pages = strip_running_lines(full_text_pages)
+            compare_items(diagnostic_items, self.find_diagnostic_sections(full_text_pages))
+        
+        # Rendering works from the extracted text; the source PDF is no longer needed
+        self.close_source()
+        
+        # Collapse items emitted twice (same title, code and sections) before rendering
+        diagnostic_items = drop_exact_duplicates(diagnostic_items)
+        
+        # Create individual single-page PDFs, one bundle, or one combined PDF
+        with self.profile_stage("render"):
+            if bundle_path:
+                self.write_bundle(diagnostic_items, bundle_path)
+            elif combined_path:
+                self.write_combined_pdf(diagnostic_items, combined_path, batch_pages)
+            else:
+                self.create_single_page_pdfs(diagnostic_items)
+        
+        # Write the item store used by the loaders and indexers
+        with self.profile_stage("save_items"):
+            self.save_items_json(diagnostic_items)
+            self.save_autocomplete_index(diagnostic_items)
         
         # Print summary
         logger.info("\n" + "="*80)
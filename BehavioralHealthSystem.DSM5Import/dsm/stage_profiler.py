@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+DSM5 Stage Profiler
+
+Built-in profiling for the splitters (dsm5.py split/single-page --profile), so
+a slow page or item can be pinned down from one run instead of re-running
+under external tools.
+
+For every stage (extract_text, segment, render, ...) StageProfiler:
+
+    - runs the stage under cProfile and saves <stage>.pstats
+      (python -m pstats profile/render.pstats, or snakeviz)
+    - samples the main thread's stack and adds it to stacks.collapsed, in
+      the collapsed-stack format read by flamegraph.pl and speedscope
+      (one "stage;caller;...;callee count" line per distinct stack)
+
+The splitters also record the elapsed time of every page they extract and
+every item they render; write_report() lists the top-N slowest of each and
+writes everything to profile_summary.json.
+
+Requirements:
+    (standard library only)
+
+Usage:
+    python dsm5.py single-page DSM5.pdf --profile profile --profile-top 20
+    flamegraph.pl profile/stacks.collapsed > profile/flamegraph.svg
+"""
+
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_INTERVAL = 0.001  # Seconds between stack samples
+
+
+def frame_label(frame):
+    """Flamegraph frame name: function (file:line of its definition)."""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Background thread that samples one thread's stack into collapsed-stack counts."""
+
+    def __init__(self, thread_id, root, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            # A sample taken while the stage is being closed would only show stop() itself
+            if labels and not self._stop.is_set():
+                self.stacks[';'.join([self.root] + labels[::-1])] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class StageProfiler:
+    """Per-stage cProfile + stack sampling, plus elapsed times of pages and items."""
+
+    def __init__(self, output_dir="profile", sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.stage_seconds = {}
+        self.timings = {'page': [], 'item': []}
+        self.stacks = Counter()
+        os.makedirs(output_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name):
+        """Profile the enclosed block as one stage."""
+        profile = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), name, self.sample_interval)
+        sampler.start()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            sampler.stop()
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + elapsed
+            self.stacks.update(sampler.stacks)
+            profile.dump_stats(os.path.join(self.output_dir, f"{name}.pstats"))
+            logger.info(f"Profiled stage {name}: {elapsed:.3f}s")
+
+    def record(self, kind, label, seconds):
+        """Record the elapsed time of one page or item."""
+        self.timings[kind].append({'label': label, 'seconds': seconds})
+
+    def slowest(self, kind, top):
+        return sorted(self.timings[kind], key=lambda timing: timing['seconds'], reverse=True)[:top]
+
+    def write_report(self, top=10):
+        """Write stacks.collapsed and profile_summary.json and log the slowest stages, pages and items."""
+        collapsed_path = os.path.join(self.output_dir, 'stacks.collapsed')
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        summary = {
+            'stages': self.stage_seconds,
+            'slowest_pages': self.slowest('page', top),
+            'slowest_items': self.slowest('item', top),
+            'pages_timed': len(self.timings['page']),
+            'items_timed': len(self.timings['item'])
+        }
+        summary_path = os.path.join(self.output_dir, 'profile_summary.json')
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+        logger.info("Stage times:")
+        for name, seconds in sorted(self.stage_seconds.items(), key=lambda kv: kv[1], reverse=True):
+            logger.info(f"  {seconds:8.3f}s  {name}")
+        for kind in ('page', 'item'):
+            if self.timings[kind]:
+                logger.info(f"Top {top} slowest {kind}s:")
+                for timing in summary[f'slowest_{kind}s']:
+                    logger.info(f"  {timing['seconds'] * 1000:9.1f} ms  {timing['label']}")
+        logger.info(f"Wrote .pstats per stage, {collapsed_path} and {summary_path}")
+        return summary
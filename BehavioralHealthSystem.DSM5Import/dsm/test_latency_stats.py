@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+DSM5 Latency Statistics Tests
+
+Checks percentile() against known nearest ranks.
+
+Usage:
+    python -m unittest test_latency_stats
+"""
+
+import unittest
+
+from latency_stats import percentile
+
+
+class PercentileTests(unittest.TestCase):
+    def test_one_to_hundred(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile(values, 0.07), 7)
+        self.assertEqual(percentile(values, 1.0), 100)
+
+    def test_one_to_ten(self):
+        values = list(range(1, 11))
+        self.assertEqual(percentile(values, 0.50), 5)
+        self.assertEqual(percentile(values, 0.95), 10)
+        self.assertEqual(percentile(values, 0.0), 1)
+
+    def test_single_and_empty(self):
+        self.assertEqual(percentile([42], 0.99), 42)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
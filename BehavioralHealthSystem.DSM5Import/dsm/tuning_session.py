@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+DSM5 Tuning Session
+
+A long-lived session for tuning the segmentation rules without re-running a
+splitter for every edit. The PDF text is extracted once (optionally cached in
+a JSON file so a restart is instant); after that every `run` re-segments and
+re-standardizes the cached pages with the current rules and prints the item
+counts and a diff against the previous run of the same mode, typically in
+well under a second.
+
+Tunable rules:
+
+    title_lookback      lines above "Diagnostic Criteria" searched for the title (single-page)
+    code_lookahead      lines below it searched for the code (single-page)
+    section_headers     header list of DSMSinglePageSplitter.detect_section_headers (single-page)
+    disorder_keywords   title keyword list of DSMDiagnosticSplitter (split)
+
+Items are matched across runs by (diagnostic code, start page); a changed
+title, page range, section set or header count shows up as a changed item.
+
+The session is driven from a REPL (the default), or from a local socket API
+with --listen PORT: one JSON request per line, one JSON response per line,
+e.g. {"command": "set", "rule": "title_lookback", "value": 6} then
+{"command": "run"}.
+
+Requirements:
+    pip install pdfplumber PyPDF2 reportlab
+
+Usage:
+    python dsm5.py session DSM5.pdf --pages-cache DSM5.pages.json
+    python dsm5.py session DSM5.pdf --pages-cache DSM5.pages.json --listen 8765
+"""
+
+import argparse
+import cmd
+import json
+import logging
+import os
+import shlex
+import socketserver
+import time
+
+from page_isolation import file_sha256
+from running_heads import strip_running_lines
+from split_dsm5_diagnostic import DISORDER_KEYWORDS, DSMDiagnosticSplitter
+from split_dsm5_single_page import SECTION_HEADERS, DSMSinglePageSplitter
+from sharded_segmentation import CODE_LOOKAHEAD_LINES, TITLE_LOOKBACK_LINES
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MODES = ('single-page', 'split')
+
+# rule -> (mode, kind, default)
+RULES = {
+    'title_lookback': ('single-page', 'int', TITLE_LOOKBACK_LINES),
+    'code_lookahead': ('single-page', 'int', CODE_LOOKAHEAD_LINES),
+    'section_headers': ('single-page', 'list', SECTION_HEADERS),
+    'disorder_keywords': ('split', 'list', DISORDER_KEYWORDS),
+}
+
+
+def load_pages(input_file, pages_cache=None):
+    """Extract page text once, reusing pages_cache when it belongs to the same PDF."""
+    pdf_sha256 = file_sha256(input_file)
+    if pages_cache and os.path.exists(pages_cache):
+        with open(pages_cache, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('pdf_sha256') == pdf_sha256:
+            logger.info(f"Loaded {len(cached['pages'])} pages from {pages_cache}")
+            return cached['pages']
+        logger.warning(f"Page cache {pages_cache} belongs to a different PDF; extracting again")
+
+    splitter = DSMSinglePageSplitter(input_file)
+    text_pages = splitter.extract_text_with_pages()
+    splitter.close_source()
+    if pages_cache:
+        with open(pages_cache, 'w', encoding='utf-8') as f:
+            json.dump({'pdf_sha256': pdf_sha256, 'pages': text_pages}, f, ensure_ascii=False)
+        logger.info(f"Cached page text in {pages_cache}")
+    return text_pages
+
+
+def parse_rule_value(kind, value):
+    """Rule value from the REPL (string) or the socket API (string, int or list)."""
+    if kind == 'int':
+        value = int(value)
+        if value < 1:
+            raise ValueError("must be at least 1")
+        return value
+    if isinstance(value, str):
+        value = [part.strip() for part in value.split(',')]
+    return [part for part in value if part]
+
+
+def item_key(item):
+    return f"{item['diagnostic_code']} @ page {item['start_page'] + 1}"
+
+
+def snapshot_item(splitter, item, mode):
+    """Comparable summary of one item."""
+    summary = {
+        'title': item['title'],
+        'pages': f"{item['start_page'] + 1}-{item['end_page'] + 1}"
+    }
+    if mode == 'single-page':
+        summary['sections'] = sorted(name for name, content in item['sections'].items() if content)
+        summary['headers'] = sum(1 for kind, _ in splitter.detect_section_headers(item['full_text']) if kind == 'HEADER')
+    else:
+        summary['content_pages'] = len(item['content_pages'])
+    return summary
+
+
+def diff_snapshots(previous, current):
+    """Added, removed and changed items between two {key: summary} snapshots."""
+    if previous is None:
+        return None
+    changed = []
+    for key in sorted(previous.keys() & current.keys()):
+        changes = {field: [previous[key][field], current[key][field]]
+                   for field in current[key] if previous[key][field] != current[key][field]}
+        if changes:
+            changed.append({'key': key, 'title': current[key]['title'], 'changes': changes})
+    return {
+        'added': [{'key': key, **current[key]} for key in sorted(current.keys() - previous.keys())],
+        'removed': [{'key': key, **previous[key]} for key in sorted(previous.keys() - current.keys())],
+        'changed': changed
+    }
+
+
+class TuningSession:
+    """Cached page text plus both splitters, re-run on demand with the current rules."""
+
+    def __init__(self, input_file, pages_cache=None, strip_running_heads=True):
+        self.single_page = DSMSinglePageSplitter(input_file)
+        self.diagnostic = DSMDiagnosticSplitter(input_file)
+        text_pages = load_pages(input_file, pages_cache)
+        # The single-page splitter segments stripped pages, the page-range splitter raw pages
+        self.pages = {
+            'single-page': strip_running_lines(text_pages) if strip_running_heads else text_pages,
+            'split': text_pages
+        }
+        self.snapshots = {mode: None for mode in MODES}
+        self.items = {mode: [] for mode in MODES}
+
+    def splitter_for(self, mode):
+        return self.single_page if mode == 'single-page' else self.diagnostic
+
+    def rules(self):
+        return {name: getattr(self.splitter_for(mode), name) for name, (mode, _, _) in RULES.items()}
+
+    def set_rule(self, name, value):
+        if name not in RULES:
+            raise KeyError(f"unknown rule {name!r} (rules: {', '.join(RULES)})")
+        mode, kind, _ = RULES[name]
+        setattr(self.splitter_for(mode), name, parse_rule_value(kind, value))
+        return getattr(self.splitter_for(mode), name)
+
+    def edit_list_rule(self, name, values, add):
+        if name not in RULES or RULES[name][1] != 'list':
+            raise KeyError(f"{name!r} is not a list rule")
+        current = list(getattr(self.splitter_for(RULES[name][0]), name))
+        for value in parse_rule_value('list', values):
+            if add and value not in current:
+                current.append(value)
+            elif not add and value in current:
+                current.remove(value)
+        return self.set_rule(name, current)
+
+    def reset_rules(self):
+        for name, (_, kind, default) in RULES.items():
+            self.set_rule(name, list(default) if kind == 'list' else default)
+
+    def run(self, mode='single-page'):
+        """Re-segment the cached pages; returns counts, elapsed seconds and the diff to the previous run."""
+        if mode not in MODES:
+            raise KeyError(f"unknown mode {mode!r} (modes: {', '.join(MODES)})")
+        splitter = self.splitter_for(mode)
+        start = time.perf_counter()
+        items = splitter.find_diagnostic_sections(self.pages[mode])
+        snapshot = {}
+        for item in items:
+            # Same first-wins rule as the item store
+            snapshot.setdefault(item_key(item), snapshot_item(splitter, item, mode))
+        elapsed = time.perf_counter() - start
+
+        counts = {
+            'items': len(items),
+            'unique_codes': len({item['diagnostic_code'] for item in items}),
+            'duplicate_keys': len(items) - len(snapshot)
+        }
+        if mode == 'single-page':
+            counts['filled_sections'] = sum(len(summary['sections']) for summary in snapshot.values())
+            counts['header_lines'] = sum(summary['headers'] for summary in snapshot.values())
+
+        diff = diff_snapshots(self.snapshots[mode], snapshot)
+        self.snapshots[mode] = snapshot
+        self.items[mode] = items
+        return {'mode': mode, 'seconds': round(elapsed, 4), 'counts': counts, 'diff': diff}
+
+    def show(self, query, mode='single-page'):
+        """Summaries (plus detected header lines in single-page mode) of items from the last run matching query."""
+        query = query.lower()
+        splitter = self.splitter_for(mode)
+        matches = []
+        for item in self.items[mode]:
+            if query in item['title'].lower() or query in item['diagnostic_code'].lower():
+                summary = {'key': item_key(item), **snapshot_item(splitter, item, mode)}
+                if mode == 'single-page':
+                    summary['header_lines'] = [line for kind, line in splitter.detect_section_headers(item['full_text'])
+                                               if kind == 'HEADER']
+                matches.append(summary)
+        return matches
+
+    def handle(self, request):
+        """Socket API: dispatch one JSON request."""
+        command = request.get('command')
+        mode = request.get('mode', 'single-page')
+        if command == 'run':
+            return self.run(mode)
+        if command == 'rules':
+            return self.rules()
+        if command == 'set':
+            return {request['rule']: self.set_rule(request['rule'], request['value'])}
+        if command in ('add', 'remove'):
+            return {request['rule']: self.edit_list_rule(request['rule'], request['value'], command == 'add')}
+        if command == 'reset':
+            self.reset_rules()
+            return self.rules()
+        if command == 'show':
+            return self.show(request['query'], mode)
+        raise KeyError(f"unknown command {command!r}")
+
+
+def print_result(result):
+    counts = ', '.join(f"{name} {value}" for name, value in result['counts'].items())
+    print(f"[{result['mode']}] {counts} ({result['seconds'] * 1000:.0f} ms)")
+    diff = result['diff']
+    if diff is None:
+        return
+    if not (diff['added'] or diff['removed'] or diff['changed']):
+        print("  no changes since the previous run")
+        return
+    for sign, entries in (('+', diff['added']), ('-', diff['removed'])):
+        for entry in entries:
+            print(f"  {sign} {entry['key']}  {entry['title']}  pages {entry['pages']}")
+    for entry in diff['changed']:
+        print(f"  ~ {entry['key']}  {entry['title']}")
+        for field, (old, new) in entry['changes'].items():
+            if isinstance(old, list):
+                gained = sorted(set(new) - set(old))
+                lost = sorted(set(old) - set(new))
+                print(f"      {field}: " + ', '.join([f"+{name}" for name in gained] + [f"-{name}" for name in lost]))
+            else:
+                print(f"      {field}: {old} -> {new}")
+
+
+class TuningShell(cmd.Cmd):
+    """REPL over a TuningSession."""
+
+    intro = "DSM-5 tuning session. Type help or ? to list commands."
+    prompt = "(dsm5) "
+
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+        self.mode = 'single-page'
+
+    def onecmd(self, line):
+        try:
+            return super().onecmd(line)
+        except (KeyError, ValueError) as e:
+            print(f"error: {e.args[0] if e.args else e}")
+
+    def do_run(self, arg):
+        """run [single-page|split]: re-segment with the current rules and diff against the previous run."""
+        print_result(self.session.run(arg.strip() or self.mode))
+
+    def do_mode(self, arg):
+        """mode single-page|split: set the default mode for run and show."""
+        if arg.strip() not in MODES:
+            raise KeyError(f"unknown mode {arg.strip()!r} (modes: {', '.join(MODES)})")
+        self.mode = arg.strip()
+
+    def do_rules(self, arg):
+        """rules: print the current rules."""
+        for name, value in self.session.rules().items():
+            print(f"  {name} = {value}")
+
+    def do_set(self, arg):
+        """set RULE VALUE: set a number, or a comma-separated list."""
+        name, _, value = arg.strip().partition(' ')
+        print(f"  {name} = {self.session.set_rule(name, value.strip())}")
+
+    def do_add(self, arg):
+        """add RULE VALUE[,VALUE...]: append to a list rule."""
+        name, _, value = arg.strip().partition(' ')
+        print(f"  {name} = {self.session.edit_list_rule(name, value, add=True)}")
+
+    def do_remove(self, arg):
+        """remove RULE VALUE[,VALUE...]: remove from a list rule."""
+        name, _, value = arg.strip().partition(' ')
+        print(f"  {name} = {self.session.edit_list_rule(name, value, add=False)}")
+
+    def do_reset(self, arg):
+        """reset: restore the default rules."""
+        self.session.reset_rules()
+        self.do_rules(arg)
+
+    def do_show(self, arg):
+        """show QUERY: items from the last run whose title or code contains QUERY."""
+        for match in self.session.show(' '.join(shlex.split(arg)), self.mode):
+            header_lines = match.pop('header_lines', None)
+            print(f"  {match.pop('key')}  " + '  '.join(f"{field}={value}" for field, value in match.items()))
+            for line in header_lines or []:
+                print(f"      | {line}")
+
+    def do_quit(self, arg):
+        """quit: leave the session."""
+        return True
+
+    do_exit = do_quit
+    do_EOF = do_quit
+
+
+class SessionRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line in, one JSON response per line out."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = {'ok': True, 'result': self.server.session.handle(json.loads(line))}
+            except (KeyError, ValueError, TypeError) as e:
+                response = {'ok': False, 'error': str(e.args[0] if e.args else e)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+def serve(session, port):
+    """Serve the socket API on 127.0.0.1 (requests are handled one at a time)."""
+    socketserver.TCPServer.allow_reuse_address = True
+    with socketserver.TCPServer(('127.0.0.1', port), SessionRequestHandler) as server:
+        server.session = session
+        logger.warning(f"Tuning session listening on 127.0.0.1:{port} (one JSON request per line)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None):
+    """Main function to start a tuning session."""
+    parser = argparse.ArgumentParser(prog="dsm5 session", description="Re-run segmentation with live rule changes")
+    parser.add_argument("input", nargs="?", default="DSM5.pdf", help="Input PDF (default: DSM5.pdf)")
+    parser.add_argument("--pages-cache", metavar="PATH", help="Reuse or write the extracted page text (JSON)")
+    parser.add_argument("--keep-running-heads", action="store_true", help="Do not strip running heads before segmentation")
+    parser.add_argument("--listen", type=int, metavar="PORT", help="Serve the JSON-lines socket API instead of the REPL")
+    args = parser.parse_args(argv)
+
+    session = TuningSession(args.input, args.pages_cache, strip_running_heads=not args.keep_running_heads)
+    # Per-item discovery logging would drown the diffs
+    logging.getLogger().setLevel(logging.WARNING)
+    result = session.run()
+
+    if args.listen:
+        serve(session, args.listen)
+    else:
+        shell = TuningShell(session)
+        print_result(result)
+        shell.cmdloop()
+
+
+if __name__ == "__main__":
+    main()
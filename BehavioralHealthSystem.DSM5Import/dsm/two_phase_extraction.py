@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+DSM5 Two-Phase Extraction
+
+pdfplumber layout extraction is the slowest step of every splitter run, and
+the front matter, index and appendices never contain a diagnostic item.
+Two-phase mode first runs a cheap locator pass with PyPDF2's plain text
+extraction, derives the candidate page range from it, and then runs the full
+pdfplumber extraction on that range only.
+
+In a full run an item collects every line up to the next item's criteria
+page, so the pages between the first and the last item are always needed.
+The last item ends TAIL_PAGES after its Comorbidity heading (the same rule
+the segmenters apply, so two-phase items are identical to a full run). The
+locator therefore only reads pages from both ends of the book: forward to
+the first "Diagnostic Criteria" heading followed by a code, and backward to
+the last one and its Comorbidity heading. Its cost grows with the skipped pages, not the book.
+
+compare_items() checks the two-phase items against a full run: the same
+items must be found, and their end page and full_text must be identical.
+bench_two_phase.py checks the skipped fraction on a DSM-sized synthetic book.
+
+Requirements:
+    pip install PyPDF2
+
+Usage:
+    python dsm5.py single-page DSM5.pdf --two-phase
+    python dsm5.py split DSM5.pdf --two-phase --verify
+"""
+
+import logging
+import re
+import time
+
+from sharded_segmentation import TAIL_PAGES
+
+logger = logging.getLogger(__name__)
+
+# PyPDF2 often runs the heading together ("DiagnosticCriteria")
+CRITERIA_PATTERN = re.compile(r'diagnostic\s*criteria', re.IGNORECASE)
+# An item needs a code within a few lines of its heading; prose mentions
+# ("the diagnostic criteria for ...") in Section I and the appendices have none
+ITEM_CODE_PATTERN = re.compile(r'\b\d{3}\.\d+\s*\(\s*[A-Z]\d')
+CODE_WINDOW_CHARS = 400
+# Only the heading on its own line ends an item; prose mentions of comorbidity do not
+COMORBIDITY_PATTERN = re.compile(r'^\s*comorbidity\s*$', re.IGNORECASE | re.MULTILINE)
+
+
+def derive_page_ranges(criteria_pages, comorbidity_pages, total_pages, tail_pages=TAIL_PAGES):
+    """Merge [criteria page, next criteria page] ranges (0-based, inclusive).
+
+    The last range ends tail_pages after the first Comorbidity page at or
+    after its criteria page, or at the end of the book without one.
+    """
+    ranges = []
+    criteria_pages = sorted(criteria_pages)
+    comorbidity_pages = sorted(comorbidity_pages)
+
+    for idx, start in enumerate(criteria_pages):
+        if idx + 1 < len(criteria_pages):
+            # An item's text runs up to the page where the next item starts
+            end = criteria_pages[idx + 1]
+        else:
+            end = next((page for page in comorbidity_pages if page >= start), None)
+            end = total_pages - 1 if end is None else min(end + tail_pages, total_pages - 1)
+
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+
+    return [tuple(page_range) for page_range in ranges]
+
+
+def item_headings(text):
+    """Positions where a "Diagnostic Criteria" heading is followed by a code."""
+    return [match for match in CRITERIA_PATTERN.finditer(text)
+            if ITEM_CODE_PATTERN.search(text, match.end(), match.end() + CODE_WINDOW_CHARS)]
+
+
+def locate_item_pages(pdf_path, reader=None, tail_pages=TAIL_PAGES):
+    """Cheap locator pass: find the candidate item pages without layout extraction.
+
+    Pass an already-parsed PdfReader (e.g. PdfSource.reader) to reuse it.
+    Pages that cannot be read are treated as criteria pages, so an item is
+    never lost to a locator error.
+
+    Returns a dict with the candidate page numbers, their ranges, the total
+    page count, the fraction of pages skipped, the number of pages the
+    locator read and the locator time.
+    """
+    start_time = time.perf_counter()
+    if reader is None:
+        from PyPDF2 import PdfReader
+        reader = PdfReader(pdf_path)
+    total_pages = len(reader.pages)
+    texts = {}
+
+    def page_text(page_num):
+        if page_num not in texts:
+            try:
+                texts[page_num] = reader.pages[page_num].extract_text() or ''
+            except Exception as e:
+                logger.warning(f"Locator could not read page {page_num + 1}: {e}")
+                texts[page_num] = None
+        return texts[page_num]
+
+    # Forward to the first item
+    first = next((page_num for page_num in range(total_pages)
+                  if page_text(page_num) is None or item_headings(page_text(page_num))), None)
+
+    # Backward to the last item, noting the nearest Comorbidity heading after its criteria
+    criteria_pages = []
+    comorbidity_pages = []
+    if first is not None:
+        for page_num in range(total_pages - 1, first - 1, -1):
+            text = page_text(page_num)
+            if text is None:
+                criteria_pages = [first, page_num]
+                break
+            criteria = item_headings(text)
+            # On the last criteria page only a heading below the criteria belongs to the last item
+            if COMORBIDITY_PATTERN.search(text, criteria[-1].end() if criteria else 0):
+                comorbidity_pages = [page_num]
+            if criteria:
+                criteria_pages = [first, page_num]
+                break
+
+    ranges = derive_page_ranges(criteria_pages, comorbidity_pages, total_pages, tail_pages)
+    pages = [page for first_page, last_page in ranges for page in range(first_page, last_page + 1)]
+    skipped_fraction = 1 - len(pages) / total_pages if total_pages else 0.0
+    elapsed = time.perf_counter() - start_time
+
+    logger.info(f"Locator pass: read {len(texts)}/{total_pages} pages in {elapsed:.1f}s")
+    logger.info(f"Two-phase extraction will parse {len(pages)}/{total_pages} pages "
+                f"in {len(ranges)} ranges ({skipped_fraction:.1%} skipped)")
+
+    return {
+        'pages': pages,
+        'ranges': ranges,
+        'total_pages': total_pages,
+        'skipped_fraction': skipped_fraction,
+        'locator_pages': len(texts),
+        'locate_seconds': elapsed
+    }
+
+
+def item_identity(item):
+    """Fields that identify the same item in a two-phase and a full run."""
+    return (item['title'], item['diagnostic_code'], item['start_page'], item.get('comorbidity_page'))
+
+
+# Fields that must also be identical for a matched item
+COMPARED_FIELDS = ['end_page', 'full_text']
+
+
+def compare_items(two_phase_items, full_items):
+    """Compare two-phase items with a full run; returns a report dict with an 'ok' flag."""
+    two_phase_ids = [item_identity(item) for item in two_phase_items]
+    full_ids = [item_identity(item) for item in full_items]
+
+    missing = [identity for identity in full_ids if identity not in two_phase_ids]
+    extra = [identity for identity in two_phase_ids if identity not in full_ids]
+
+    full_by_identity = {item_identity(item): item for item in full_items}
+    different = []
+    for item in two_phase_items:
+        full_item = full_by_identity.get(item_identity(item))
+        if full_item is None:
+            continue
+        fields = [field for field in COMPARED_FIELDS if item.get(field) != full_item.get(field)]
+        if fields:
+            different.append((item_identity(item), fields))
+
+    report = {
+        'ok': not missing and not extra and not different,
+        'matched': len(two_phase_ids) - len(extra) - len(different),
+        'missing': missing,
+        'extra': extra,
+        'different': different
+    }
+
+    if report['ok']:
+        logger.info(f"Verification passed: {report['matched']} items match the full run")
+    else:
+        for identity in missing:
+            logger.error(f"Missing from two-phase run: {identity[1]} - {identity[0]} (page {identity[2] + 1})")
+        for identity in extra:
+            logger.error(f"Not in full run: {identity[1]} - {identity[0]} (page {identity[2] + 1})")
+        for identity, fields in different:
+            logger.error(f"Differs from full run ({', '.join(fields)}): {identity[1]} - {identity[0]} "
+                         f"(page {identity[2] + 1})")
+    return report
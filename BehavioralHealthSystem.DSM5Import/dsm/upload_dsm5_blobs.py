@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+DSM5 Concurrent Blob Uploader
+
+Pushes the splitter outputs (rendered single-page PDFs and/or the JSON items
+from items.json) into the dsm5-data container, instead of going through the
+C# DSM5Importer one file at a time.
+
+    - one pooled async BlobServiceClient (a single aiohttp session with a
+      bounded connection pool) shared by all uploads
+    - at most --concurrency uploads in flight
+    - every blob carries a content_sha256 metadata value; blobs whose stored
+      hash matches the local content are skipped without re-uploading
+    - transient errors (timeouts, connection resets, 408/429/5xx) are retried
+      with exponential backoff and jitter; other errors fail that blob only
+
+Blob names:
+    {prefix}/pdf/{file name}.pdf     rendered single-page PDFs
+    {prefix}/items/{item id}.json    item records from items.json
+    {prefix}/groups/{base id}.json   with --groups: one blob per group from groups.json
+                                     (base item plus variant deltas, see item_groups.py)
+                                     instead of one blob per item
+
+Requirements:
+    pip install azure-storage-blob aiohttp azure-identity
+
+Usage:
+    # Against the Azurite emulator (docker run -p 10000:10000 mcr.microsoft.com/azure-storage/azurite azurite-blob --blobHost 0.0.0.0)
+    python upload_dsm5_blobs.py single-pages --azurite
+
+    # Against Azure with a connection string or Managed Identity / az login
+    python upload_dsm5_blobs.py single-pages --connection-string "$AZURE_STORAGE_CONNECTION_STRING"
+    python upload_dsm5_blobs.py single-pages --account-name bhsdevstg --what json --concurrency 32
+    python upload_dsm5_blobs.py single-pages --azurite --what json --groups single-pages/groups.json
+
+Connection settings default to the app's AZURE_STORAGE_CONNECTION_STRING,
+DSM5_STORAGE_ACCOUNT_NAME / AZURE_STORAGE_ACCOUNT_NAME and DSM5_CONTAINER_NAME
+variables.
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+from dsm5_items import load_items
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+logging.getLogger('azure').setLevel(logging.WARNING)
+
+DEFAULT_CONTAINER = "dsm5-data"
+DEFAULT_PREFIX = "split"
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RETRIES = 5
+HASH_METADATA_KEY = "content_sha256"
+
+# Well-known Azurite development account (public emulator credentials)
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def ascii_metadata(value):
+    """Blob metadata values must be ASCII."""
+    return str(value).encode('ascii', 'ignore').decode('ascii')
+
+
+def collect_group_uploads(groups_path, prefix):
+    """One upload per group in groups.json (written by item_groups.py)."""
+    with open(groups_path, 'r', encoding='utf-8') as f:
+        groups = json.load(f)['groups']
+    uploads = []
+    for group in groups:
+        base = group['base']
+        uploads.append({
+            'blob_name': f"{prefix}/groups/{base['id']}.json",
+            'data': json.dumps(group, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+            'content_type': 'application/json; charset=utf-8',
+            'metadata': {
+                'condition_name': ascii_metadata(base['title']),
+                'condition_code': ascii_metadata(base['diagnostic_code']),
+                'group_items': str(1 + len(group['variants']))
+            }
+        })
+    item_count = sum(1 + len(group['variants']) for group in groups)
+    logger.info(f"{len(groups)} group blobs replace {item_count} item blobs")
+    return uploads
+
+
+def collect_uploads(output_dir, what, prefix, items_path=None, groups_path=None):
+    """Build the upload list: dicts with blob_name, data (bytes), content_type and metadata."""
+    uploads = []
+    prefix = prefix.strip('/')
+
+    if what in ('pdf', 'both'):
+        for pdf_path in sorted(glob.glob(os.path.join(output_dir, '*.pdf'))):
+            with open(pdf_path, 'rb') as f:
+                data = f.read()
+            uploads.append({
+                'blob_name': f"{prefix}/pdf/{os.path.basename(pdf_path)}",
+                'data': data,
+                'content_type': 'application/pdf',
+                'metadata': {}
+            })
+
+    if what in ('json', 'both') and groups_path:
+        uploads.extend(collect_group_uploads(groups_path, prefix))
+    elif what in ('json', 'both'):
+        items_path = items_path or os.path.join(output_dir, 'items.json')
+        seen_ids = set()
+        for record in load_items(items_path):
+            # First item wins for duplicate ids, matching the loader and bundle index
+            if record['id'] in seen_ids:
+                logger.warning(f"Duplicate item id {record['id']} ({record['diagnostic_code']}); keeping the first")
+                continue
+            seen_ids.add(record['id'])
+            data = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            uploads.append({
+                'blob_name': f"{prefix}/items/{record['id']}.json",
+                'data': data,
+                'content_type': 'application/json; charset=utf-8',
+                'metadata': {
+                    'condition_name': ascii_metadata(record['title']),
+                    'condition_code': ascii_metadata(record['diagnostic_code']),
+                    'item_content_hash': record['content_hash']
+                }
+            })
+
+    for upload in uploads:
+        upload['metadata'][HASH_METADATA_KEY] = hashlib.sha256(upload['data']).hexdigest()
+    return uploads
+
+
+def is_transient(error):
+    """True for errors worth retrying (network failures, throttling, server errors)."""
+    from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+
+    if isinstance(error, (ServiceRequestError, ServiceResponseError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, HttpResponseError):
+        return error.status_code in TRANSIENT_STATUS_CODES
+    return False
+
+
+async def with_retries(operation, description, retries, base_delay=0.5):
+    """Await operation(), retrying transient errors with exponential backoff and jitter."""
+    for attempt in range(retries + 1):
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            delay = base_delay * (2 ** attempt) * (0.5 + random.random())
+            logger.warning(f"Transient error on {description} (attempt {attempt + 1}/{retries + 1}): "
+                           f"{type(e).__name__}; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+async def upload_one(container_client, upload, semaphore, retries, force, counts):
+    """Upload one blob unless its stored content hash already matches."""
+    from azure.core.exceptions import ResourceNotFoundError
+    from azure.storage.blob import ContentSettings
+
+    blob_client = container_client.get_blob_client(upload['blob_name'])
+    local_hash = upload['metadata'][HASH_METADATA_KEY]
+
+    async with semaphore:
+        try:
+            if not force:
+                try:
+                    properties = await with_retries(blob_client.get_blob_properties,
+                                                    f"HEAD {upload['blob_name']}", retries)
+                    if properties.metadata.get(HASH_METADATA_KEY) == local_hash:
+                        counts['skipped'] += 1
+                        return
+                except ResourceNotFoundError:
+                    pass
+
+            await with_retries(
+                lambda: blob_client.upload_blob(
+                    upload['data'],
+                    overwrite=True,
+                    metadata=upload['metadata'],
+                    content_settings=ContentSettings(content_type=upload['content_type'])
+                ),
+                f"PUT {upload['blob_name']}",
+                retries
+            )
+            counts['uploaded'] += 1
+            counts['bytes'] += len(upload['data'])
+        except Exception as e:
+            counts['failed'] += 1
+            logger.error(f"Failed to upload {upload['blob_name']}: {e}")
+
+
+async def upload_all(uploads, connection_string=None, account_name=None, container=DEFAULT_CONTAINER,
+                     concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES, force=False):
+    """Upload everything over one pooled client; returns counts of uploaded/skipped/failed blobs."""
+    import aiohttp
+    from azure.core.exceptions import ResourceExistsError
+    from azure.core.pipeline.transport import AioHttpTransport
+    from azure.storage.blob.aio import BlobServiceClient
+
+    counts = {'uploaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+    credential = None
+
+    # One connection pool sized to the concurrency limit, shared by every request
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency))
+    transport = AioHttpTransport(session=session, session_owner=False)
+    # Retries are handled here (with is_transient) rather than by the SDK, so they are not doubled
+    client_options = {'transport': transport, 'retry_total': 0}
+
+    try:
+        if connection_string:
+            service_client = BlobServiceClient.from_connection_string(connection_string, **client_options)
+        else:
+            from azure.identity.aio import DefaultAzureCredential
+            credential = DefaultAzureCredential()
+            service_client = BlobServiceClient(f"https://{account_name}.blob.core.windows.net",
+                                               credential=credential, **client_options)
+
+        async with service_client:
+            container_client = service_client.get_container_client(container)
+            try:
+                await container_client.create_container()
+                logger.info(f"Created container {container}")
+            except ResourceExistsError:
+                pass
+
+            semaphore = asyncio.Semaphore(concurrency)
+            await asyncio.gather(*(
+                upload_one(container_client, upload, semaphore, retries, force, counts)
+                for upload in uploads
+            ))
+    finally:
+        if credential is not None:
+            await credential.close()
+        await session.close()
+
+    return counts
+
+
+def main(argv=None):
+    """Main function to upload split outputs to blob storage."""
+    parser = argparse.ArgumentParser(prog="dsm5 upload", description="Upload split DSM-5 outputs to the dsm5-data container")
+    parser.add_argument("output_dir", help="Splitter output directory (PDFs and items.json)")
+    parser.add_argument("--items", help="items.json path (default: OUTPUT_DIR/items.json)")
+    parser.add_argument("--groups", help="Upload JSON as one blob per group from this groups.json instead of one per item")
+    parser.add_argument("--what", choices=["pdf", "json", "both"], default="both", help="What to upload (default: both)")
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="Blob name prefix (default: split)")
+    parser.add_argument("--container", default=os.getenv("DSM5_CONTAINER_NAME", DEFAULT_CONTAINER))
+    parser.add_argument("--connection-string", default=os.getenv("AZURE_STORAGE_CONNECTION_STRING"))
+    parser.add_argument("--account-name",
+                        default=os.getenv("DSM5_STORAGE_ACCOUNT_NAME") or os.getenv("AZURE_STORAGE_ACCOUNT_NAME"),
+                        help="Storage account for DefaultAzureCredential (when no connection string is given)")
+    parser.add_argument("--azurite", action="store_true", help="Use the local Azurite emulator (127.0.0.1:10000)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Uploads in flight (default: 16)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Retries per transient error (default: 5)")
+    parser.add_argument("--force", action="store_true", help="Upload even when the stored content hash matches")
+    args = parser.parse_args(argv)
+
+    connection_string = AZURITE_CONNECTION_STRING if args.azurite else args.connection_string
+    if not connection_string and not args.account_name:
+        parser.error("Configure --connection-string, --account-name or --azurite")
+
+    uploads = collect_uploads(args.output_dir, args.what, args.prefix, args.items, args.groups)
+    if not uploads:
+        logger.warning(f"Nothing to upload in {args.output_dir}")
+        return
+    logger.info(f"Uploading {len(uploads)} blobs to {args.container} (concurrency {args.concurrency})")
+
+    start = time.perf_counter()
+    counts = asyncio.run(upload_all(
+        uploads,
+        connection_string=connection_string,
+        account_name=args.account_name,
+        container=args.container,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        force=args.force
+    ))
+    elapsed = time.perf_counter() - start
+
+    logger.info(f"Uploaded {counts['uploaded']} ({counts['bytes'] / 1024:.1f} KB), "
+                f"skipped {counts['skipped']} unchanged, failed {counts['failed']} in {elapsed:.2f}s")
+    if counts['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
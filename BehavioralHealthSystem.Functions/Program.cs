@@ -305,6 +305,9 @@ if (storageBackendInit?.Equals("PostgreSQL", StringComparison.OrdinalIgnoreCase)
                         "RAISE NOTICE 'Created file_groups table'; " +
                         "END IF; " +
                         "END $$;");
+                    // Columns added to existing entities after the table was created
+                    await db.Database.ExecuteSqlRawAsync(
+                        "ALTER TABLE IF EXISTS dsm5_conditions ADD COLUMN IF NOT EXISTS \"ContentHash\" text;");
                     Console.WriteLine("Missing table check complete.");
                 }
                 catch (Exception schemaEx)
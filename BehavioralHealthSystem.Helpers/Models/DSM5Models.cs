@@ -153,6 +153,12 @@ public class DSM5ConditionData
     /// </summary>
     [JsonPropertyName("extractionMetadata")]
     public DSM5ExtractionMetadata? ExtractionMetadata { get; set; }
+
+    /// <summary>
+    /// Hash of the imported item content, used by the bulk loader to skip unchanged rows
+    /// </summary>
+    [JsonPropertyName("contentHash")]
+    public string? ContentHash { get; set; }
 }
 
 /// <summary>
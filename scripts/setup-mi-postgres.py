@@ -15,11 +15,24 @@ Usage:
 
   # Or let the script get the token automatically (requires az CLI in PATH)
   python scripts/setup-mi-postgres.py --auto-token
+
+  # Ignore the local az lookup cache and fetch everything fresh
+  python scripts/setup-mi-postgres.py --auto-token --refresh-cache
+
+The Entra token (with its expiry), the Container App's principalId and the
+principalId -> appId lookup are cached in ~/.bhs/az-cache.json (override with
+BHS_AZ_CACHE), keyed by the default tenant and user read from az's own
+azureProfile.json, so a run with a valid cached token makes no az calls at all.
+The principalId expires after PRINCIPAL_CACHE_SECONDS and is dropped as soon as
+a grant fails, so a recreated app or identity is picked up on the next run.
 """
 import subprocess
 import json
 import sys
 import os
+import time
+from datetime import datetime
+from functools import lru_cache
 
 # Configuration — update these for your environment
 PG_HOST = "bhs-dev-postgres2.postgres.database.azure.com"
@@ -33,6 +46,11 @@ MI_ROLE_NAME = "bhs-api-dam"   # PG role name for the managed identity
 # Full path to az CLI (fallback if not in PATH)
 AZ_CLI_PATH = r"C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin\az.cmd"
 
+# Local cache for az lookups (token + managed identity ids)
+AZ_CACHE_PATH = os.environ.get("BHS_AZ_CACHE") or os.path.join(os.path.expanduser("~"), ".bhs", "az-cache.json")
+TOKEN_REFRESH_SKEW_SECONDS = 300  # Refresh the cached token this long before it expires
+PRINCIPAL_CACHE_SECONDS = 24 * 3600  # Re-resolve the Container App's principalId after this long
+
 
 def get_az_cmd():
     """Return the az command, trying PATH first, then the known install location."""
@@ -46,6 +64,83 @@ def get_az_cmd():
     sys.exit(1)
 
 
+def run_az(args):
+    """Run an az CLI command and return its stripped stdout."""
+    az = get_az_cmd()
+    result = subprocess.run([az] + args, capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+@lru_cache(maxsize=None)
+def get_az_account_key():
+    """Return "<tenantId>/<user>" for the default az subscription, read from azureProfile.json."""
+    config_dir = os.environ.get("AZURE_CONFIG_DIR") or os.path.join(os.path.expanduser("~"), ".azure")
+    try:
+        # az writes this file with a UTF-8 BOM
+        with open(os.path.join(config_dir, "azureProfile.json"), "r", encoding="utf-8-sig") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return ""
+    for subscription in profile.get("subscriptions", []):
+        if subscription.get("isDefault"):
+            tenant_id = subscription.get("tenantId")
+            user = (subscription.get("user") or {}).get("name")
+            return f"{tenant_id}/{user}" if tenant_id and user else ""
+    return ""
+
+
+def load_az_cache():
+    """Load the az lookup cache, returning an empty cache if missing or unreadable."""
+    if "--refresh-cache" in sys.argv:
+        return {}
+    try:
+        with open(AZ_CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def account_cache(cache, account_key):
+    """Return the cache entries for one az tenant/user, creating them if missing."""
+    accounts = cache.setdefault("accounts", {})
+    entry = accounts.get(account_key)
+    if not isinstance(entry, dict):
+        entry = accounts[account_key] = {}
+    return entry
+
+
+def save_az_cache(cache):
+    """Write the az lookup cache atomically, readable by the current user only."""
+    cache_dir = os.path.dirname(AZ_CACHE_PATH)
+    if cache_dir:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    tmp_path = AZ_CACHE_PATH + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, AZ_CACHE_PATH)
+    try:
+        os.chmod(AZ_CACHE_PATH, 0o600)
+    except OSError:
+        pass  # Best effort on filesystems without POSIX permissions
+
+
+def parse_token_expiry(token_info):
+    """Return the token expiry as a Unix timestamp from az get-access-token output."""
+    # Newer az versions report 'expires_on' as epoch seconds
+    if token_info.get("expires_on"):
+        return int(token_info["expires_on"])
+    # Older versions only report 'expiresOn' as local time, e.g. "2024-05-01 13:45:12.000000"
+    expires_on = token_info.get("expiresOn", "")
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return int(datetime.strptime(expires_on, fmt).timestamp())
+        except ValueError:
+            continue
+    return 0
+
+
 def get_token():
     """Get an Entra access token for Azure OSS RDBMS."""
     # Check environment variable first
@@ -59,37 +154,82 @@ def get_token():
         print("  Or run with --auto-token to fetch automatically.")
         sys.exit(1)
 
-    az = get_az_cmd()
-    result = subprocess.run(
-        [az, "account", "get-access-token", "--resource-type", "oss-rdbms", "--query", "accessToken", "-o", "tsv"],
-        capture_output=True, text=True
-    )
-    return result.stdout.strip()
+    account_key = get_az_account_key()
+    cache = load_az_cache()
+    entry = account_cache(cache, account_key) if account_key else {}
+    cached = entry.get("token", {})
+    if cached.get("accessToken") and cached.get("expires_on", 0) - TOKEN_REFRESH_SKEW_SECONDS > time.time():
+        print("   Using cached token")
+        return cached["accessToken"]
+
+    output = run_az(["account", "get-access-token", "--resource-type", "oss-rdbms", "-o", "json"])
+    try:
+        token_info = json.loads(output)
+    except ValueError:
+        return ""
+
+    token = token_info.get("accessToken", "")
+    # Without a known tenant/user the token can't be attributed safely, so it is not cached
+    if token and account_key:
+        entry["token"] = {"accessToken": token, "expires_on": parse_token_expiry(token_info)}
+        save_az_cache(cache)
+    return token
+
+
+def principal_cache_key():
+    """Return the cache key for the configured Container App."""
+    return f"{RESOURCE_GROUP}/{CONTAINER_APP_NAME}"
 
 
 def get_mi_info():
     """Get Container App managed identity principal ID and client ID."""
-    az = get_az_cmd()
+    account_key = get_az_account_key()
+    cache = load_az_cache()
+    entry = account_cache(cache, account_key) if account_key else {}
+    principals = entry.setdefault("principals", {})
+    app_ids = entry.setdefault("appIds", {})
 
-    result = subprocess.run(
-        [az, "containerapp", "show", "--name", CONTAINER_APP_NAME,
-         "--resource-group", RESOURCE_GROUP,
-         "--query", "identity.principalId", "-o", "tsv"],
-        capture_output=True, text=True
-    )
-    principal_id = result.stdout.strip()
+    # The principalId changes when the app or its identity is recreated, so it expires
+    cached = principals.get(principal_cache_key(), {})
+    if cached.get("principalId") and cached.get("resolved_at", 0) + PRINCIPAL_CACHE_SECONDS > time.time():
+        principal_id = cached["principalId"]
+        print("   Using cached principal ID")
+    else:
+        principal_id = run_az(["containerapp", "show", "--name", CONTAINER_APP_NAME,
+                               "--resource-group", RESOURCE_GROUP,
+                               "--query", "identity.principalId", "-o", "tsv"])
+        if not principal_id:
+            return "", ""
+        if account_key:
+            principals[principal_cache_key()] = {"principalId": principal_id, "resolved_at": int(time.time())}
+            save_az_cache(cache)
 
-    result = subprocess.run(
-        [az, "ad", "sp", "show", "--id", principal_id, "--query", "appId", "-o", "tsv"],
-        capture_output=True, text=True
-    )
-    client_id = result.stdout.strip()
+    # A principalId always maps to the same appId, so this lookup is safe to keep
+    client_id = app_ids.get(principal_id, "")
+    if not client_id:
+        client_id = run_az(["ad", "sp", "show", "--id", principal_id, "--query", "appId", "-o", "tsv"])
+        if client_id and account_key:
+            app_ids[principal_id] = client_id
+            save_az_cache(cache)
 
     return principal_id, client_id
 
 
+def forget_principal():
+    """Drop the cached principalId so the next run resolves it again."""
+    account_key = get_az_account_key()
+    if not account_key:
+        return
+    cache = load_az_cache()
+    if account_cache(cache, account_key).get("principals", {}).pop(principal_cache_key(), None):
+        save_az_cache(cache)
+
+
 def run_sql(token, dbname, sql_statements):
-    """Connect to PostgreSQL with Entra token and execute SQL statements."""
+    """Connect to PostgreSQL with Entra token and execute SQL statements.
+
+    Returns the number of statements that failed.
+    """
     import psycopg2
 
     conn = psycopg2.connect(
@@ -102,6 +242,7 @@ def run_sql(token, dbname, sql_statements):
     )
     conn.autocommit = True
     cur = conn.cursor()
+    failures = 0
     for sql in sql_statements:
         print(f"  Executing: {sql[:80]}...")
         try:
@@ -114,8 +255,10 @@ def run_sql(token, dbname, sql_statements):
                 print("    -> OK")
         except Exception as e:
             print(f"    -> Error: {e}")
+            failures += 1
     cur.close()
     conn.close()
+    return failures
 
 if __name__ == "__main__":
     print("=== PostgreSQL Managed Identity Setup ===\n")
@@ -143,7 +286,7 @@ if __name__ == "__main__":
         f"SELECT * FROM pgaadauth_create_principal('{MI_ROLE_NAME}', false, false);",
         f'GRANT CONNECT ON DATABASE {PG_APP_DB} TO "{MI_ROLE_NAME}";',
     ]
-    run_sql(token, PG_ADMIN_DB, create_role_sql)
+    failures = run_sql(token, PG_ADMIN_DB, create_role_sql)
 
     # Step 4: Grant permissions on the application database
     print(f"\n4. Granting permissions on '{PG_APP_DB}' database...")
@@ -154,7 +297,10 @@ if __name__ == "__main__":
         f'GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO "{MI_ROLE_NAME}";',
         f'ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT USAGE, SELECT ON SEQUENCES TO "{MI_ROLE_NAME}";',
     ]
-    run_sql(token, PG_APP_DB, grant_sql)
+    failures += run_sql(token, PG_APP_DB, grant_sql)
+    if failures:
+        # The cached identity may be stale (recreated app or identity); resolve it afresh next run
+        forget_principal()
 
     # Verify
     print("\n5. Verifying role exists...")